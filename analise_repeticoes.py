@@ -0,0 +1,231 @@
+# Análise estatística das repetições de cada configuração (stack, script, CPU/RAM de backend e banco):
+# mediana, média, desvio, coeficiente de variação, intervalo de confiança bootstrap (percentil) da mediana e
+# outliers pelo z-score modificado (MAD). Todas as configurações são processadas juntas numa matriz NumPy
+# configurações x repetições (completada com NaN), então o custo cresce só linearmente com milhares de execuções.
+# Configurações com poucas repetições, variação alta, intervalo largo ou intervalo cruzando o threshold do K6
+# são marcadas com mais_repeticoes.
+# Uso: python analise_repeticoes.py --resultados resultados [--stack node-postgres] [--script get_users_50vus] [--saida analise.json]
+
+import os
+import glob
+import json
+import argparse
+import warnings
+import numpy as np
+
+from armazenamento_colunar import particao_execucao
+from prometheus import metricas_fase
+from teste_sequencial import extrair_valores_k6
+
+# Métricas extraídas de cada _metrics.json; CPU em núcleos e memória em bytes (Prometheus ou SSH)
+METRICAS = ('http_req_duration_p95', 'http_req_failed', 'http_reqs_rate', 'taxa_descarte',
+            'cpu_backend_cores', 'mem_backend_bytes', 'cpu_database_cores', 'mem_database_bytes')
+
+MIN_REPETICOES = 3
+LIMITE_CV = 0.10
+LIMITE_IC_RELATIVO = 0.10
+LIMITE_Z_OUTLIER = 3.5
+
+
+def _float(valor):
+    return float(valor) if isinstance(valor, (int, float)) else None
+
+
+def metricas_execucao(metrics: dict) -> dict:
+    """
+    Extrai de um _metrics.json as METRICAS da execução (None nas ausentes).
+    Usa o Prometheus quando existe e, na falta dele, as médias da coleta SSH (CPU em %, memória em MiB);
+    em ambos, só o estado estável do K6 quando a execução tem fases.
+    """
+    k6 = extrair_valores_k6(metrics)
+    k6_summary = metrics.get('k6_summary') or {}
+    reqs = (k6_summary.get('metrics') or {}).get('http_reqs') or {}
+    valores = dict(k6, http_reqs_rate=_float(reqs.get('values', reqs).get('rate')))
+    media_ssh = (metrics.get('media_fases') or {}).get('estavel') or metrics.get('media') or {}
+    for alvo, chave_prom, chave_ssh in (('backend', 'prometheus_metrics_backend', 'backend'),
+                                        ('database', 'prometheus_metrics_database', 'banco_de_dados')):
+        prom = metricas_fase(metrics.get(chave_prom))
+        ssh = media_ssh.get(chave_ssh) or {}
+        cpu = _float(prom.get('cpu_avg_cores'))
+        mem = _float(prom.get('mem_avg_bytes'))
+        if cpu is None and _float(ssh.get('cpu')) is not None:
+            cpu = ssh['cpu'] / 100
+        if mem is None and _float(ssh.get('memoria')) is not None:
+            mem = ssh['memoria'] * 1024 * 1024
+        valores[f'cpu_{alvo}_cores'] = cpu
+        valores[f'mem_{alvo}_bytes'] = mem
+    return valores
+
+
+def chave_configuracao(metrics_path: str, metrics: dict) -> tuple:
+    """
+    (stack, script, backend_cpu, backend_ram, db_cpu, db_ram) da execução, independente da repetição.
+    """
+    particao = particao_execucao(metrics_path, metrics)
+    cenario = metrics.get('cenario') or {}
+    db_cpu = cenario.get('db_cpu')
+    db_ram = cenario.get('db_ram')
+    return (particao['stack'], particao['script'], round(float(particao['cpu']), 3), int(float(particao['ram'])),
+            round(float(db_cpu), 3) if db_cpu is not None else None, int(db_ram) if db_ram is not None else None)
+
+
+def matriz_repeticoes(grupos) -> np.ndarray:
+    """
+    Converte uma lista de listas (valores de cada configuração) numa matriz configurações x repetições com NaN
+    nas posições vazias; valores None também viram NaN.
+    """
+    n_max = max((len(g) for g in grupos), default=0)
+    matriz = np.full((len(grupos), max(n_max, 1)), np.nan)
+    for i, grupo in enumerate(grupos):
+        matriz[i, :len(grupo)] = [np.nan if v is None else v for v in grupo]
+    return matriz
+
+
+def _ic_bootstrap(valores, n, n_bootstrap, nivel, rng, bloco=256):
+    # Valores válidos de cada linha no início, para sortear índices em [0, n); em blocos de linhas para
+    # limitar a memória (bloco x n_bootstrap x repetições)
+    validos = ~np.isnan(valores)
+    compactos = np.take_along_axis(valores, np.argsort(~validos, axis=1, kind='stable'), axis=1)
+    n_max = valores.shape[1]
+    alfa = (1 - nivel) / 2
+    inferior = np.full(len(valores), np.nan)
+    superior = np.full(len(valores), np.nan)
+    for ini in range(0, len(valores), bloco):
+        fim = min(ini + bloco, len(valores))
+        n_bloco = n[ini:fim]
+        sorteio = (rng.random((fim - ini, n_bootstrap, n_max)) * np.maximum(n_bloco, 1)[:, None, None]).astype(int)
+        reamostras = np.take_along_axis(compactos[ini:fim, None, :], sorteio, axis=2)
+        # Cada reamostra tem o tamanho n da sua configuração
+        reamostras = np.where(np.arange(n_max)[None, None, :] < n_bloco[:, None, None], reamostras, np.nan)
+        medianas = np.nanmedian(reamostras, axis=2)
+        inferior[ini:fim] = np.nanquantile(medianas, alfa, axis=1)
+        superior[ini:fim] = np.nanquantile(medianas, 1 - alfa, axis=1)
+    return inferior, superior
+
+
+def analisar_matriz(valores, n_bootstrap=2000, nivel=0.95, limite=None, limite_cv=LIMITE_CV,
+                    limite_ic=LIMITE_IC_RELATIVO, semente=0) -> dict:
+    """
+    Estatísticas por linha de uma matriz configurações x repetições (NaN = ausente).
+    O bootstrap sorteia, para cada configuração, n_bootstrap reamostras do mesmo tamanho que suas repetições válidas
+    e calcula a mediana de cada uma; o IC é o intervalo percentil no nível pedido.
+    limite: threshold do K6 para a métrica; um IC que o contém significa que aprovação/reprovação ainda é incerta.
+    Retorna um dicionário de arrays: n, mediana, media, desvio, cv, ic_inferior, ic_superior, outliers
+    (máscara do mesmo formato de valores) e mais_repeticoes.
+    """
+    valores = np.asarray(valores, dtype=float)
+    n = (~np.isnan(valores)).sum(axis=1)
+    # Linhas só com NaN geram RuntimeWarning em nanmedian/nanmean; aqui isso é esperado
+    with np.errstate(all='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mediana = np.nanmedian(valores, axis=1)
+        media = np.nanmean(valores, axis=1)
+        desvio = np.where(n > 1, np.nanstd(valores, axis=1, ddof=1), np.nan)
+        cv = np.where(media != 0, desvio / np.abs(media), np.nan)
+        ic_inferior, ic_superior = _ic_bootstrap(valores, n, n_bootstrap, nivel, np.random.default_rng(semente))
+        # Z-score modificado (Iglewicz-Hoaglin): robusto a outliers porque usa mediana e MAD
+        mad = np.nanmedian(np.abs(valores - mediana[:, None]), axis=1)
+        z = 0.6745 * (valores - mediana[:, None]) / np.where(mad > 0, mad, np.nan)[:, None]
+        outliers = np.nan_to_num(np.abs(z), nan=0.0) > LIMITE_Z_OUTLIER
+        largura = (ic_superior - ic_inferior) / 2 / np.abs(mediana)
+    mais_repeticoes = (n < MIN_REPETICOES) | (np.nan_to_num(cv) > limite_cv) | (np.nan_to_num(largura) > limite_ic)
+    if limite is not None:
+        mais_repeticoes |= (ic_inferior <= limite) & (limite <= ic_superior)
+    return {
+        'n': n, 'mediana': mediana, 'media': media, 'desvio': desvio, 'cv': cv,
+        'ic_inferior': ic_inferior, 'ic_superior': ic_superior, 'outliers': outliers,
+        'mais_repeticoes': mais_repeticoes,
+    }
+
+
+def _numero(valor):
+    valor = float(valor)
+    return None if np.isnan(valor) else valor
+
+
+def analisar_execucoes(execucoes, limites: dict = None, **kwargs) -> list:
+    """
+    execucoes: lista de (chave_configuracao, metricas_execucao(...)), em qualquer ordem.
+    limites: threshold do K6 por métrica (ex.: {'http_req_duration_p95': 500, 'http_req_failed': 0.01}).
+    Retorna, por configuração, {'configuracao', 'repeticoes', 'mais_repeticoes', 'metricas': {métrica: estatísticas}},
+    com 'outliers' como índices (na ordem recebida) das repetições atípicas.
+    """
+    limites = limites or {}
+    grupos = {}
+    for chave, valores in execucoes:
+        grupos.setdefault(chave, []).append(valores)
+    chaves = list(grupos)
+    resultado = [{'configuracao': chave, 'repeticoes': len(grupos[chave]), 'mais_repeticoes': False, 'metricas': {}}
+                 for chave in chaves]
+    for metrica in METRICAS:
+        matriz = matriz_repeticoes([[v.get(metrica) for v in grupos[chave]] for chave in chaves])
+        if np.isnan(matriz).all():
+            continue
+        analise = analisar_matriz(matriz, limite=limites.get(metrica), **kwargs)
+        for i, item in enumerate(resultado):
+            if analise['n'][i] == 0:
+                continue
+            item['metricas'][metrica] = {
+                'n': int(analise['n'][i]),
+                'mediana': _numero(analise['mediana'][i]),
+                'media': _numero(analise['media'][i]),
+                'desvio': _numero(analise['desvio'][i]),
+                'cv': _numero(analise['cv'][i]),
+                'ic': [_numero(analise['ic_inferior'][i]), _numero(analise['ic_superior'][i])],
+                'outliers': [int(j) for j in np.flatnonzero(analise['outliers'][i])],
+                'mais_repeticoes': bool(analise['mais_repeticoes'][i]),
+            }
+            # Só as métricas do K6 decidem se a configuração precisa de mais repetições
+            if metrica.startswith('http_') and analise['mais_repeticoes'][i]:
+                item['mais_repeticoes'] = True
+    return resultado
+
+
+def carregar_execucoes(pasta: str = 'resultados', stack: str = None, script: str = None) -> list:
+    """
+    Lê os *_metrics.json de pasta e retorna [(chave_configuracao, metricas_execucao)], filtrando por stack/script.
+    """
+    execucoes = []
+    for metrics_path in sorted(glob.glob(os.path.join(pasta, '*_metrics.json'))):
+        try:
+            with open(metrics_path, 'r') as f:
+                metrics = json.load(f)
+            chave = chave_configuracao(metrics_path, metrics)
+        except Exception as e:
+            print(f"[ANALISE] Ignorando {metrics_path}: {e}")
+            continue
+        if (stack and chave[0] != stack) or (script and chave[1] != script):
+            continue
+        execucoes.append((chave, metricas_execucao(metrics)))
+    return execucoes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resultados', default='resultados', help='Pasta com os _metrics.json')
+    parser.add_argument('--stack', default=None)
+    parser.add_argument('--script', default=None, help='Nome do script K6 sem extensão')
+    parser.add_argument('--limite_p95', type=float, default=None, help='Threshold de p95 (ms) do K6')
+    parser.add_argument('--limite_falha', type=float, default=None, help='Threshold de http_req_failed do K6')
+    parser.add_argument('--bootstrap', type=int, default=2000, help='Reamostras do bootstrap')
+    parser.add_argument('--nivel', type=float, default=0.95, help='Nível de confiança do intervalo')
+    parser.add_argument('--saida', default=None, help='Grava a análise completa em JSON')
+    args = parser.parse_args()
+    limites = {'http_req_duration_p95': args.limite_p95, 'http_req_failed': args.limite_falha}
+    analise = analisar_execucoes(carregar_execucoes(args.resultados, args.stack, args.script),
+                                 limites={k: v for k, v in limites.items() if v is not None},
+                                 n_bootstrap=args.bootstrap, nivel=args.nivel)
+    for item in sorted(analise, key=lambda a: tuple(str(c) for c in a['configuracao'])):
+        p95 = item['metricas'].get('http_req_duration_p95') or {}
+        print(f"{item['configuracao']} | n={item['repeticoes']} | p95 mediana={p95.get('mediana')} "
+              f"IC={p95.get('ic')} CV={p95.get('cv')} outliers={p95.get('outliers')}"
+              f"{' | MAIS REPETIÇÕES' if item['mais_repeticoes'] else ''}")
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(analise, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    # Como executar no terminal:
+    # python analise_repeticoes.py --resultados resultados --stack node-postgres --limite_p95 500 --saida analise.json
+    main()
@@ -0,0 +1,278 @@
+# Conversão dos resultados para formato colunar (Parquet), particionado por stack/cpu/ram/db_cpu/db_ram/script e
+# com uma pasta por execução (o nome da execução, ex.: 1.get_users_50vus-node-postgres-1_1024).
+# Tabelas geradas em <destino>/<tabela>/stack=.../cpu=.../ram=.../db_cpu=.../db_ram=.../script=.../execucao=.../parte.parquet:
+# - k6_pontos:   um registro por ponto da saída --out json do K6 (instante, métrica, valor, method, url, status)
+# - prometheus:  (container, métrica, instante, valor): as séries de CPU/memória de cada container (backend/database)
+#                e, com instante nulo, os resumos (média, máximo, p95)
+# - ssh:         (alvo, métrica, instante, indice, valor): amostras de CPU/RAM do host e dos containers e as séries
+#                de cgroup coletadas via SSH, com o instante de cada amostra
+# - execucoes:   um registro por execução com os indicadores principais do _metrics.json
+# Com o instante nas três tabelas de amostras, K6, Prometheus e SSH podem ser juntados no tempo.
+# Requer: pyarrow (pip install pyarrow)
+# Uso: python armazenamento_colunar.py --resultados resultados --destino resultados/colunar
+
+import os
+import re
+import json
+import glob
+import argparse
+
+from k6_stream import ler_pontos_k6, instante_epoch
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+TAMANHO_LOTE = 100000
+
+_NOME_EXECUCAO = re.compile(r'^(\d+)\.(.+?)-(.+)-([0-9.]+)_(\d+)$')
+
+COLUNAS_PARTICAO = ('stack', 'cpu', 'ram', 'db_cpu', 'db_ram', 'script', 'execucao')
+# Valor de partição para campos desconhecidos (convenção hive, lido como nulo)
+PARTICAO_NULA = '__HIVE_DEFAULT_PARTITION__'
+
+# Séries do Prometheus por container -> nome da métrica na tabela
+SERIES_PROMETHEUS = {'serie_mem': 'mem_bytes', 'serie_cpu': 'cpu_cores'}
+
+ESQUEMA_K6 = None
+if pa is not None:
+    ESQUEMA_K6 = pa.schema([
+        ('instante', pa.float64()),
+        ('metrica', pa.dictionary(pa.int32(), pa.string())),
+        ('valor', pa.float64()),
+        ('method', pa.dictionary(pa.int32(), pa.string())),
+        ('url', pa.string()),
+        ('status', pa.dictionary(pa.int32(), pa.string())),
+    ])
+    # Esquemas fixos: evitam que partições com colunas só de nulos fiquem com tipos diferentes
+    ESQUEMAS = {
+        'execucoes': pa.schema([
+            ('nome', pa.string()), ('repeticao', pa.int64()),
+            ('inicio_teste', pa.string()), ('fim_teste', pa.string()), ('duracao_segundos', pa.float64()),
+            ('http_req_duration_avg', pa.float64()), ('http_req_duration_p95', pa.float64()),
+            ('http_req_failed', pa.float64()), ('http_reqs_rate', pa.float64()), ('erro', pa.string()),
+        ]),
+        'prometheus': pa.schema([('container', pa.string()), ('metrica', pa.string()), ('instante', pa.float64()),
+                                 ('valor', pa.float64())]),
+        'ssh': pa.schema([('alvo', pa.string()), ('metrica', pa.string()), ('instante', pa.float64()),
+                          ('indice', pa.int64()), ('valor', pa.float64())]),
+    }
+
+
+def _exigir_pyarrow():
+    if pa is None:
+        raise ImportError('Armazenamento colunar requer pyarrow (pip install pyarrow).')
+
+
+def particao_execucao(metrics_path: str, metrics: dict = None) -> dict:
+    """
+    Retorna as colunas de partição da execução. Usa o 'cenario' do _metrics.json quando existe
+    e, na falta dele, o nome do arquivo (<rep>.<script>-<stack>-<cpu>_<ram>_metrics.json).
+    'execucao' é o nome da execução (único por _metrics.json); 'repeticao' só existe quando o nome traz o
+    índice da repetição (scripts de varredura) e fica None nas execuções do main.py.
+    """
+    nome = os.path.basename(metrics_path)[:-len('_metrics.json')]
+    cenario = (metrics or {}).get('cenario') or {}
+    m = _NOME_EXECUCAO.match(nome)
+    particao = {
+        'stack': cenario.get('backend') or (m.group(3) if m else None),
+        'cpu': cenario.get('backend_cpu') if cenario.get('backend_cpu') is not None else (m.group(4) if m else None),
+        'ram': cenario.get('backend_ram') if cenario.get('backend_ram') is not None else (m.group(5) if m else None),
+        'db_cpu': cenario.get('db_cpu'),
+        'db_ram': cenario.get('db_ram'),
+        'script': os.path.splitext(os.path.basename(cenario['k6_script']))[0] if cenario.get('k6_script') else (m.group(2) if m else nome),
+        'execucao': nome,
+        'repeticao': m.group(1) if m else None,
+    }
+    return {k: str(v) if v is not None else None for k, v in particao.items()}
+
+
+def diretorio_particao(destino: str, tabela: str, particao: dict) -> str:
+    partes = [f"{k}={_valor_particao(particao.get(k))}" for k in COLUNAS_PARTICAO]
+    return os.path.join(destino, tabela, *partes)
+
+
+def _valor_particao(valor) -> str:
+    if valor is None:
+        return PARTICAO_NULA
+    return str(valor).replace('/', '_').replace(os.sep, '_')
+
+
+def _gravar_tabela(destino, tabela, particao, colunas: dict):
+    if not colunas or not next(iter(colunas.values())):
+        return
+    pasta = diretorio_particao(destino, tabela, particao)
+    os.makedirs(pasta, exist_ok=True)
+    pq.write_table(pa.table(colunas, schema=ESQUEMAS[tabela]), os.path.join(pasta, 'parte.parquet'), compression='zstd')
+
+
+def converter_pontos_k6(output_path: str, destino: str, particao: dict) -> int:
+    """
+    Converte em lotes a saída NDJSON do K6 para Parquet, sem carregar o arquivo inteiro em memória.
+    Retorna a quantidade de pontos gravados.
+    """
+    _exigir_pyarrow()
+    pasta = diretorio_particao(destino, 'k6_pontos', particao)
+    os.makedirs(pasta, exist_ok=True)
+    total = 0
+    lote = {nome: [] for nome in ESQUEMA_K6.names}
+    with pq.ParquetWriter(os.path.join(pasta, 'parte.parquet'), ESQUEMA_K6, compression='zstd') as writer:
+        for metrica, data in ler_pontos_k6(output_path):
+            tags = data.get('tags') or {}
+            lote['instante'].append(instante_epoch(data['time']))
+            lote['metrica'].append(metrica)
+            lote['valor'].append(float(data.get('value', 0)))
+            lote['method'].append(tags.get('method'))
+            lote['url'].append(tags.get('name') or tags.get('url'))
+            lote['status'].append(tags.get('status'))
+            if len(lote['instante']) >= TAMANHO_LOTE:
+                writer.write_table(pa.table(lote, schema=ESQUEMA_K6))
+                total += len(lote['instante'])
+                lote = {nome: [] for nome in ESQUEMA_K6.names}
+        if lote['instante']:
+            writer.write_table(pa.table(lote, schema=ESQUEMA_K6))
+            total += len(lote['instante'])
+    return total
+
+
+def _linhas_prometheus(metrics: dict) -> dict:
+    colunas = {'container': [], 'metrica': [], 'instante': [], 'valor': []}
+    blocos = {
+        'backend': metrics.get('prometheus_metrics_backend'),
+        'database': metrics.get('prometheus_metrics_database'),
+        'container': metrics.get('prometheus_metrics'),
+    }
+    for container, bloco in blocos.items():
+        if not isinstance(bloco, dict):
+            continue
+        for metrica, valor in bloco.items():
+            if metrica in SERIES_PROMETHEUS:
+                # Série [[epoch, valor], ...]: uma linha por amostra
+                for instante, v in valor or []:
+                    colunas['container'].append(container)
+                    colunas['metrica'].append(SERIES_PROMETHEUS[metrica])
+                    colunas['instante'].append(float(instante))
+                    colunas['valor'].append(float(v) if v is not None else None)
+            elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                colunas['container'].append(container)
+                colunas['metrica'].append(metrica)
+                colunas['instante'].append(None)
+                colunas['valor'].append(float(valor))
+    return colunas
+
+
+def _linhas_ssh(metrics: dict) -> dict:
+    alvos = {'host': 'host', 'backend': 'backend', 'banco_de_dados': 'db'}
+    if not any(isinstance(metrics.get(a), dict) for a in alvos):
+        return {}
+    # Instante (epoch) de cada amostra; execuções antigas não têm e ficam só com o índice
+    instantes = metrics.get('instantes_ssh') or []
+    colunas = {'alvo': [], 'metrica': [], 'instante': [], 'indice': [], 'valor': []}
+
+    def acrescentar(alvo, metrica, valores):
+        for i, v in enumerate(valores or []):
+            if v is None:
+                continue
+            colunas['alvo'].append(alvo)
+            colunas['metrica'].append(metrica)
+            colunas['instante'].append(float(instantes[i]) if i < len(instantes) and instantes[i] is not None else None)
+            colunas['indice'].append(i)
+            colunas['valor'].append(float(v))
+
+    for secao, alvo in alvos.items():
+        bloco = metrics.get(secao) or {}
+        acrescentar(alvo, 'cpu', bloco.get('cpu'))
+        acrescentar(alvo, 'mem', bloco.get('memoria'))
+        # Séries de cgroup v2 (coleta stream), uma por campo
+        for campo, valores in (bloco.get('cgroup') or {}).items():
+            acrescentar(alvo, f'cgroup_{campo}', valores)
+    return colunas
+
+
+def _valor_k6(k6_summary, metrica, campo):
+    metricas = (k6_summary or {}).get('metrics', {}) if isinstance(k6_summary, dict) else {}
+    m = metricas.get(metrica, {})
+    valor = m.get('values', m).get(campo) if isinstance(m, dict) else None
+    return float(valor) if isinstance(valor, (int, float)) else None
+
+
+def _linha_execucao(metrics: dict, particao: dict) -> dict:
+    # Esquema atual (registro_execucao): summary em 'k6_summary'; arquivos antigos do main.py o traziam na raiz ('metrics')
+    k6_summary = metrics.get('k6_summary') if 'k6_summary' in metrics else metrics
+    cenario = metrics.get('cenario') or {}
+    return {
+        'nome': [cenario.get('nome')],
+        # db_cpu/db_ram vêm da partição; a repetição, quando o nome a traz, fica como coluna
+        'repeticao': [int(particao['repeticao']) if particao.get('repeticao') is not None else None],
+        'inicio_teste': [metrics.get('inicio_teste')],
+        'fim_teste': [metrics.get('fim_teste')],
+        'duracao_segundos': [metrics.get('duracao_segundos')],
+        'http_req_duration_avg': [_valor_k6(k6_summary, 'http_req_duration', 'avg')],
+        'http_req_duration_p95': [_valor_k6(k6_summary, 'http_req_duration', 'p(95)')],
+        'http_req_failed': [_valor_k6(k6_summary, 'http_req_failed', 'value')],
+        'http_reqs_rate': [_valor_k6(k6_summary, 'http_reqs', 'rate')],
+        'erro': [metrics.get('erro')],
+    }
+
+
+def converter_execucao(metrics_path: str, destino: str, incluir_pontos: bool = True) -> dict:
+    """
+    Converte uma execução (o _metrics.json e, se existir, a saída NDJSON do K6 ao lado) para Parquet.
+    Retorna a partição usada.
+    """
+    _exigir_pyarrow()
+    with open(metrics_path, 'r') as f:
+        metrics = json.load(f)
+    particao = particao_execucao(metrics_path, metrics)
+    _gravar_tabela(destino, 'prometheus', particao, _linhas_prometheus(metrics))
+    _gravar_tabela(destino, 'ssh', particao, _linhas_ssh(metrics))
+    output_path = metrics_path[:-len('_metrics.json')] + '.json'
+    if incluir_pontos and os.path.exists(output_path):
+        converter_pontos_k6(output_path, destino, particao)
+    # Gravada por último: sua presença indica que a execução foi convertida por completo
+    _gravar_tabela(destino, 'execucoes', particao, _linha_execucao(metrics, particao))
+    return particao
+
+
+def carregar_tabela(destino: str, tabela: str, colunas=None, filtro=None):
+    """
+    Abre a tabela como dataset particionado (hive) e lê só as colunas pedidas.
+    filtro é uma expressão de pyarrow.dataset, ex.: ds.field('stack') == 'node-postgres'.
+    Retorna um pyarrow.Table (use .to_pandas() se quiser um DataFrame).
+    """
+    _exigir_pyarrow()
+    # Partições lidas como texto: evita que cpu=1 e cpu=0.5 sejam inferidas com tipos diferentes
+    particionamento = ds.partitioning(pa.schema([(k, pa.string()) for k in COLUNAS_PARTICAO]), flavor='hive')
+    dataset = ds.dataset(os.path.join(destino, tabela), format='parquet', partitioning=particionamento)
+    return dataset.to_table(columns=colunas, filter=filtro)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resultados', default='resultados', help='Pasta com os _metrics.json e saídas do K6')
+    parser.add_argument('--destino', default='resultados/colunar', help='Pasta de saída dos arquivos Parquet')
+    parser.add_argument('--sem_pontos', action='store_true', help='Não converte os pontos brutos do K6')
+    parser.add_argument('--forcar', action='store_true', help='Reconverte execuções que já estão no destino')
+    args = parser.parse_args()
+    _exigir_pyarrow()
+    for metrics_path in sorted(glob.glob(os.path.join(args.resultados, '*_metrics.json'))):
+        try:
+            with open(metrics_path, 'r') as f:
+                metrics = json.load(f)
+        except Exception as e:
+            print(f"[COLUNAR] Ignorando {metrics_path}: {e}")
+            continue
+        particao = particao_execucao(metrics_path, metrics)
+        if not args.forcar and os.path.exists(diretorio_particao(args.destino, 'execucoes', particao)):
+            continue
+        converter_execucao(metrics_path, args.destino, incluir_pontos=not args.sem_pontos)
+        print(f"[COLUNAR] {metrics_path} -> {particao}")
+
+
+if __name__ == "__main__":
+    # Como executar no terminal:
+    # python armazenamento_colunar.py --resultados resultados --destino resultados/colunar
+    main()
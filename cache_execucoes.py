@@ -0,0 +1,97 @@
+# Cache de execuções já medidas, endereçado pelo conteúdo: cada repetição tem uma chave (sha256) calculada a partir
+# da stack, do hash do script K6, da CPU/RAM de backend e banco, do índice da repetição e de uma impressão do ambiente
+# (versão do K6, URL da aplicação e os extras de cada script: coletor, nome do script, --abortar_cedo).
+# A chave vai para o _metrics.json e para o catálogo (catalogo.py); com --retomar, os scripts de varredura
+# reaproveitam a execução concluída com a mesma chave em vez de medir de novo.
+# Alterar o script K6 muda o hash e invalida as execuções antigas dele; para um cenário JSON (cenarios_k6.py),
+# entram o arquivo do cenário e o script genérico que o executa.
+
+import os
+import json
+import hashlib
+import subprocess
+
+from catalogo import Catalogo, NOME_ARQUIVO
+from registro_execucao import VERSAO_ESQUEMA
+from cenarios_k6 import eh_cenario, SCRIPT_CENARIO
+
+
+def hash_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(65536), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_script(caminho: str) -> str:
+    if eh_cenario(caminho):
+        return hash_arquivo(caminho) + hash_arquivo(SCRIPT_CENARIO)
+    return hash_arquivo(caminho)
+
+
+def versao_k6() -> str:
+    try:
+        return subprocess.run(['k6', 'version'], capture_output=True, text=True, check=False).stdout.strip()
+    except OSError:
+        return 'desconhecida'
+
+
+def impressao_ambiente(app_url: str = None, extras: dict = None) -> str:
+    """
+    Hash do que, fora do cenário, muda o resultado de uma medição: versão do K6, URL da aplicação,
+    versão do esquema do _metrics.json e os extras informados.
+    """
+    dados = {'k6': versao_k6(), 'app_url': app_url, 'versao_esquema': VERSAO_ESQUEMA, 'extras': extras or {}}
+    return hashlib.sha256(json.dumps(dados, sort_keys=True).encode()).hexdigest()
+
+
+class CacheExecucoes:
+    """
+    chave(cenario, repeticao) identifica uma repetição; obter(chave) devolve o _metrics.json de uma execução
+    concluída (com summary do K6, sem erro e não abortada) com essa chave, ou None. extras entra na impressão do
+    ambiente: os scripts informam o coletor, o próprio nome e se abortam cedo, para não reaproveitar execuções
+    gravadas por outra varredura. Sem retomar, obter nunca reaproveita
+    nada, mas as chaves continuam sendo gravadas para que uma retomada futura as encontre.
+    """
+    def __init__(self, app_url: str = None, pasta: str = 'resultados', retomar: bool = False, extras: dict = None):
+        self.pasta = pasta
+        self.retomar = retomar
+        self.ambiente = impressao_ambiente(app_url, extras)
+
+    def chave(self, cenario: dict, repeticao: int) -> str:
+        dados = {
+            'stack': cenario['backend'],
+            'script': hash_script(cenario['k6_script']),
+            'backend_cpu': round(float(cenario.get('backend_cpu', 0.5)), 3),
+            'backend_ram': int(cenario.get('backend_ram', 512)),
+            'db_cpu': round(float(cenario.get('db_cpu', 0.5)), 3),
+            'db_ram': int(cenario.get('db_ram', 512)),
+            'repeticao': int(repeticao),
+            'ambiente': self.ambiente,
+        }
+        return hashlib.sha256(json.dumps(dados, sort_keys=True).encode()).hexdigest()
+
+    def obter(self, chave: str):
+        if not self.retomar:
+            return None
+        caminho = os.path.join(self.pasta, NOME_ARQUIVO)
+        if not os.path.exists(caminho):
+            return None
+        with Catalogo(caminho) as catalogo:
+            linhas = catalogo.buscar(chave_cache=chave)
+        # Mais recente primeiro
+        for linha in reversed(linhas):
+            if linha['erro'] or not os.path.exists(linha['caminho']):
+                continue
+            try:
+                with open(linha['caminho'], 'r') as f:
+                    metrics = json.load(f)
+            except Exception:
+                continue
+            # Execução interrompida pelo MonitorK6 (--abortar_cedo) tem summary, mas não mediu a duração inteira
+            if metrics.get('k6_abortado'):
+                continue
+            if metrics.get('chave_cache') == chave and metrics.get('k6_summary') and not metrics.get('erro'):
+                return metrics
+        return None
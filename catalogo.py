@@ -0,0 +1,279 @@
+# Catálogo SQLite das execuções: uma linha por _metrics.json, indexada por stack, script, VUs, CPU/RAM de backend e
+# banco, repetição, instantes e resultado (passou/falhou), para consultar execuções anteriores sem varrer resultados/.
+# O RegistroExecucao atualiza <pasta do _metrics.json>/catalogo.sqlite a cada execução gravada; "indexar" cataloga
+# (ou atualiza) arquivos antigos.
+# Uso: python catalogo.py indexar --resultados resultados
+#      python catalogo.py buscar --stack node-postgres --script post_users_500vus --cpu 1 --ram 2048 [--formato csv --saida x.csv]
+
+import os
+import re
+import csv
+import sys
+import glob
+import json
+import sqlite3
+import argparse
+
+from armazenamento_colunar import particao_execucao
+from teste_sequencial import extrair_valores_k6
+
+NOME_ARQUIVO = 'catalogo.sqlite'
+
+_VUS = re.compile(r'(\d+)vus')
+
+COLUNAS = (
+    ('caminho', 'TEXT PRIMARY KEY'), ('nome', 'TEXT'), ('stack', 'TEXT'), ('script', 'TEXT'), ('vus', 'INTEGER'),
+    ('backend_cpu', 'REAL'), ('backend_ram', 'INTEGER'), ('db_cpu', 'REAL'), ('db_ram', 'INTEGER'),
+    ('repeticao', 'INTEGER'), ('inicio_teste', 'TEXT'), ('fim_teste', 'TEXT'), ('duracao_segundos', 'REAL'),
+    ('http_req_duration_p95', 'REAL'), ('http_req_failed', 'REAL'), ('http_reqs_rate', 'REAL'),
+    ('k6_exit_code', 'INTEGER'), ('k6_thresholds_ok', 'INTEGER'), ('passou', 'INTEGER'), ('erro', 'TEXT'),
+    ('versao_esquema', 'INTEGER'), ('modificado_em', 'REAL'), ('chave_cache', 'TEXT'),
+    ('taxa_chegada', 'REAL'), ('iteracoes_descartadas', 'INTEGER'), ('taxa_descarte', 'REAL'),
+)
+
+INDICES = {
+    'idx_configuracao': ('stack', 'script', 'backend_cpu', 'backend_ram', 'db_cpu', 'db_ram'),
+    'idx_script': ('script', 'vus'),
+    'idx_inicio': ('inicio_teste',),
+    'idx_passou': ('passou',),
+    'idx_chave_cache': ('chave_cache',),
+}
+
+# Filtros aceitos por buscar(): nome do filtro -> coluna
+FILTROS = {
+    'stack': 'stack', 'script': 'script', 'vus': 'vus', 'cpu': 'backend_cpu', 'ram': 'backend_ram',
+    'db_cpu': 'db_cpu', 'db_ram': 'db_ram', 'repeticao': 'repeticao', 'passou': 'passou', 'chave_cache': 'chave_cache',
+    'taxa': 'taxa_chegada',
+}
+
+
+def _numero(valor, tipo):
+    try:
+        return tipo(valor) if valor is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _cpu(valor):
+    # CPUs vêm de somas de 0.1 nos scripts; arredonda para que 0.7000000000000001 e 0.7 sejam a mesma configuração
+    valor = _numero(valor, float)
+    return round(valor, 3) if valor is not None else None
+
+
+def _booleano(valor):
+    return None if valor is None else int(bool(valor))
+
+
+def linha_execucao(metrics_path: str, metrics: dict) -> dict:
+    """
+    Monta a linha do catálogo a partir de um _metrics.json (esquema do RegistroExecucao ou arquivos antigos).
+    passou: 1 se os thresholds do K6 foram atingidos sem erro, 0 se não, NULL se o K6 não gerou summary.
+    """
+    particao = particao_execucao(metrics_path, metrics)
+    cenario = metrics.get('cenario') or {}
+    valores = extrair_valores_k6(metrics if 'k6_summary' in metrics else {'k6_summary': metrics})
+    k6_summary = metrics.get('k6_summary') if 'k6_summary' in metrics else metrics
+    reqs = ((k6_summary or {}).get('metrics') or {}).get('http_reqs') or {}
+    rate = reqs.get('values', reqs).get('rate')
+    thresholds_ok = metrics.get('k6_thresholds_ok')
+    erro = metrics.get('erro')
+    passou = None
+    if erro:
+        passou = 0
+    elif thresholds_ok is not None:
+        passou = _booleano(thresholds_ok)
+    vus = _VUS.search(particao['script'])
+    return {
+        'caminho': os.path.abspath(metrics_path),
+        'nome': cenario.get('nome') or os.path.basename(metrics_path)[:-len('_metrics.json')],
+        'stack': particao['stack'],
+        'script': particao['script'],
+        'vus': (metrics.get('cenario_k6') or {}).get('vus') or (int(vus.group(1)) if vus else None),
+        'backend_cpu': _cpu(particao['cpu']),
+        'backend_ram': _numero(particao['ram'], int),
+        'db_cpu': _cpu(cenario.get('db_cpu')),
+        'db_ram': _numero(cenario.get('db_ram'), int),
+        'repeticao': _numero(particao['repeticao'], int),
+        'inicio_teste': metrics.get('inicio_teste'),
+        'fim_teste': metrics.get('fim_teste'),
+        'duracao_segundos': _numero(metrics.get('duracao_segundos'), float),
+        'http_req_duration_p95': valores['http_req_duration_p95'],
+        'http_req_failed': valores['http_req_failed'],
+        'http_reqs_rate': _numero(rate, float),
+        'k6_exit_code': _numero(metrics.get('k6_exit_code'), int),
+        'k6_thresholds_ok': _booleano(thresholds_ok),
+        'passou': passou,
+        'erro': erro,
+        'versao_esquema': _numero(metrics.get('versao_esquema'), int),
+        'modificado_em': os.path.getmtime(metrics_path) if os.path.exists(metrics_path) else None,
+        'chave_cache': metrics.get('chave_cache'),
+        'taxa_chegada': _numero((metrics.get('cenario_k6') or {}).get('taxa'), float),
+        'iteracoes_descartadas': _numero(valores['iteracoes_descartadas'], int),
+        'taxa_descarte': valores['taxa_descarte'],
+    }
+
+
+class Catalogo:
+    """
+    Catálogo de execuções em SQLite. Cada instância abre sua própria conexão; várias threads ou processos
+    podem gravar no mesmo arquivo (o SQLite serializa as escritas).
+    """
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self.conexao = sqlite3.connect(caminho, timeout=30)
+        self.conexao.row_factory = sqlite3.Row
+        with self.conexao:
+            colunas = ', '.join(f'{nome} {tipo}' for nome, tipo in COLUNAS)
+            self.conexao.execute(f'CREATE TABLE IF NOT EXISTS execucoes ({colunas})')
+            # Catálogos criados por versões anteriores ganham as colunas novas
+            existentes = {linha['name'] for linha in self.conexao.execute('PRAGMA table_info(execucoes)')}
+            for nome, tipo in COLUNAS:
+                if nome not in existentes:
+                    self.conexao.execute(f'ALTER TABLE execucoes ADD COLUMN {nome} {tipo}')
+            for nome, campos in INDICES.items():
+                self.conexao.execute(f'CREATE INDEX IF NOT EXISTS {nome} ON execucoes ({", ".join(campos)})')
+
+    def registrar(self, metrics_path: str, metrics: dict = None):
+        """
+        Insere ou atualiza a execução de metrics_path (lê o arquivo se metrics não for fornecido).
+        """
+        if metrics is None:
+            with open(metrics_path, 'r') as f:
+                metrics = json.load(f)
+        linha = linha_execucao(metrics_path, metrics)
+        nomes = [nome for nome, _ in COLUNAS]
+        with self.conexao:
+            self.conexao.execute(
+                f'INSERT OR REPLACE INTO execucoes ({", ".join(nomes)}) VALUES ({", ".join("?" for _ in nomes)})',
+                [linha[nome] for nome in nomes])
+
+    def indexar_pasta(self, pasta: str, forcar: bool = False) -> int:
+        """
+        Cataloga os *_metrics.json de pasta que ainda não estão no catálogo ou mudaram desde a última indexação.
+        Retorna a quantidade de arquivos (re)indexados.
+        """
+        conhecidos = {linha['caminho']: linha['modificado_em']
+                      for linha in self.conexao.execute('SELECT caminho, modificado_em FROM execucoes')}
+        total = 0
+        for metrics_path in sorted(glob.glob(os.path.join(pasta, '*_metrics.json'))):
+            caminho = os.path.abspath(metrics_path)
+            if not forcar and conhecidos.get(caminho) == os.path.getmtime(metrics_path):
+                continue
+            try:
+                self.registrar(metrics_path)
+            except Exception as e:
+                print(f"[CATALOGO] Ignorando {metrics_path}: {e}")
+                continue
+            total += 1
+        return total
+
+    def buscar(self, ordem: str = 'inicio_teste', **filtros) -> list:
+        """
+        Retorna as execuções (lista de dicionários) que batem com todos os filtros informados (ver FILTROS),
+        ex.: buscar(stack='node-postgres', script='post_users_500vus', cpu=1, ram=2048).
+        """
+        condicoes, parametros = [], []
+        for chave, valor in filtros.items():
+            if valor is None:
+                continue
+            if chave not in FILTROS:
+                raise ValueError(f'Filtro desconhecido: {chave}')
+            if chave in ('cpu', 'db_cpu'):
+                valor = _cpu(valor)
+            elif chave == 'passou':
+                valor = _booleano(valor)
+            condicoes.append(f'{FILTROS[chave]} = ?')
+            parametros.append(valor)
+        if ordem not in dict(COLUNAS):
+            raise ValueError(f'Coluna de ordenação desconhecida: {ordem}')
+        sql = 'SELECT * FROM execucoes'
+        if condicoes:
+            sql += ' WHERE ' + ' AND '.join(condicoes)
+        sql += f' ORDER BY {ordem}, repeticao'
+        return [dict(linha) for linha in self.conexao.execute(sql, parametros)]
+
+    def fechar(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+
+
+def caminho_catalogo(metrics_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(metrics_path)), NOME_ARQUIVO)
+
+
+def registrar_execucao(metrics_path: str, metrics: dict = None):
+    """
+    Atualiza o catálogo da pasta de metrics_path com uma execução recém-gravada.
+    """
+    with Catalogo(caminho_catalogo(metrics_path)) as catalogo:
+        catalogo.registrar(metrics_path, metrics)
+
+
+def _exportar(linhas, formato, saida):
+    nomes = [nome for nome, _ in COLUNAS]
+    if formato == 'json':
+        json.dump(linhas, saida, indent=4, ensure_ascii=False)
+        saida.write('\n')
+    elif formato == 'csv':
+        escritor = csv.DictWriter(saida, fieldnames=nomes)
+        escritor.writeheader()
+        escritor.writerows(linhas)
+    else:
+        for linha in linhas:
+            print(f"{linha['nome']} | cpu={linha['backend_cpu']} ram={linha['backend_ram']} "
+                  f"db_cpu={linha['db_cpu']} db_ram={linha['db_ram']} | p95={linha['http_req_duration_p95']} "
+                  f"falhas={linha['http_req_failed']} | vazao={linha['http_reqs_rate']} "
+                  f"descartadas={linha['iteracoes_descartadas']} | passou={linha['passou']} | {linha['inicio_teste']}", file=saida)
+        print(f"{len(linhas)} execução(ões)", file=saida)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--catalogo', default=None, help=f'Arquivo SQLite (padrão: <resultados>/{NOME_ARQUIVO})')
+    parser.add_argument('--resultados', default='resultados', help='Pasta com os _metrics.json')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    indexar = sub.add_parser('indexar', help='Cataloga os _metrics.json novos ou alterados')
+    indexar.add_argument('--forcar', action='store_true', help='Reindexa todos os arquivos')
+    buscar = sub.add_parser('buscar', help='Lista ou exporta execuções')
+    buscar.add_argument('--stack')
+    buscar.add_argument('--script', help='Nome do script K6 sem extensão, ex.: post_users_500vus')
+    buscar.add_argument('--vus', type=int)
+    buscar.add_argument('--taxa', type=float, help='Taxa de chegada do cenário (req/s), execuções com taxa_constante')
+    buscar.add_argument('--cpu', type=float, help='CPU do backend')
+    buscar.add_argument('--ram', type=int, help='RAM do backend (MB)')
+    buscar.add_argument('--db_cpu', type=float)
+    buscar.add_argument('--db_ram', type=int)
+    buscar.add_argument('--repeticao', type=int)
+    buscar.add_argument('--passou', choices=['sim', 'nao'])
+    buscar.add_argument('--ordem', default='inicio_teste', help='Coluna de ordenação')
+    buscar.add_argument('--formato', choices=['tabela', 'json', 'csv'], default='tabela')
+    buscar.add_argument('--saida', default=None, help='Arquivo de saída (padrão: terminal)')
+    args = parser.parse_args()
+    with Catalogo(args.catalogo or os.path.join(args.resultados, NOME_ARQUIVO)) as catalogo:
+        if args.comando == 'indexar':
+            print(f"[CATALOGO] {catalogo.indexar_pasta(args.resultados, forcar=args.forcar)} execução(ões) indexada(s).")
+            return
+        linhas = catalogo.buscar(ordem=args.ordem, stack=args.stack, script=args.script, vus=args.vus, taxa=args.taxa,
+                                 cpu=args.cpu,
+                                 ram=args.ram, db_cpu=args.db_cpu, db_ram=args.db_ram, repeticao=args.repeticao,
+                                 passou=None if args.passou is None else args.passou == 'sim')
+    if args.saida:
+        with open(args.saida, 'w', newline='') as f:
+            _exportar(linhas, args.formato, f)
+    else:
+        _exportar(linhas, args.formato, sys.stdout)
+
+
+if __name__ == "__main__":
+    # Como executar no terminal:
+    # python catalogo.py indexar --resultados resultados
+    # python catalogo.py buscar --stack node-postgres --script post_users_500vus --cpu 1 --ram 2048
+    # python catalogo.py buscar --stack node-postgres --passou sim --formato csv --saida execucoes.csv
+    # python catalogo.py buscar --script get_users_200rps --taxa 200     # node-postgres x node-mysql na mesma carga oferecida
+    main()
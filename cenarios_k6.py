@@ -0,0 +1,254 @@
+# Cenários de carga declarativos: um arquivo JSON (mix de operações, executor, VUs ou taxa, duração, thresholds)
+# executado pelo script genérico "tests k6/cenario.js", que recebe a especificação inteira em --env CENARIO.
+# Substitui as cópias por VU/operação dos scripts K6 e entrega os thresholds ao Python como dados, sem regex no JS.
+# Qualquer script de varredura aceita o JSON no lugar do .js (--k6_script cenarios/get_users.json);
+# executar_k6 troca o caminho pelo script genérico.
+# Uso: python cenarios_k6.py cenarios/get_users.json --vus 50,250,500
+
+import os
+import re
+import json
+import math
+import argparse
+
+SCRIPT_CENARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests k6', 'cenario.js')
+
+OPERACOES = ('get', 'post', 'put')
+EXECUTORES = ('vus', 'rampa_vus', 'taxa_constante')
+
+PADRAO = {
+    'operacoes': {'get': 1},
+    'executor': 'vus',
+    'vus': 50,
+    'taxa': None,
+    'duracao': '3m',
+    'pre_vus': None,
+    'max_vus': None,
+    'pausa': None,
+    'limite_check_ms': None,
+    'thresholds': {
+        'http_req_duration': ['p(95)<500'],
+        'http_req_failed': ['rate<0.01'],
+    },
+}
+
+# Fração máxima de iterações descartadas (dropped_iterations) para uma execução com taxa de chegada valer como
+# medida na carga oferecida; acima disso o K6 não teve VUs para manter a taxa
+LIMITE_DESCARTE = 0.01
+# Folga de max_vus sobre pre_vus quando o cenário não informa
+FATOR_MAX_VUS = 10
+# Latência usada para dimensionar os VUs quando o cenário não tem threshold de http_req_duration
+LATENCIA_PADRAO_S = 1.0
+
+_THRESHOLD = re.compile(r'^\s*(avg|min|max|med|count|rate|p\((\d+(?:\.\d+)?)\))\s*(<=|>=|<|>|==|===|!=)\s*(-?[0-9.]+)\s*$')
+_DURACAO = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNIDADES = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def eh_cenario(caminho: str) -> bool:
+    return str(caminho).lower().endswith('.json')
+
+
+def duracao_segundos(duracao) -> float:
+    """
+    Converte uma duração do K6 ('3m', '1m30s', '500ms') ou um número de segundos em segundos.
+    """
+    if isinstance(duracao, (int, float)):
+        return float(duracao)
+    partes = _DURACAO.findall(str(duracao))
+    if not partes or ''.join(n + u for n, u in partes) != str(duracao).strip():
+        raise ValueError(f"Duração inválida: {duracao!r}")
+    return sum(float(n) * _UNIDADES[u] for n, u in partes)
+
+
+def normalizar_cenario(spec: dict) -> dict:
+    """
+    Completa a especificação com os valores padrão e valida os campos; levanta ValueError se algo não fizer sentido.
+    """
+    cenario = dict(PADRAO, **spec)
+    cenario['thresholds'] = dict(spec.get('thresholds', PADRAO['thresholds']))
+    operacoes = cenario['operacoes']
+    if isinstance(operacoes, str):
+        operacoes = {operacoes: 1}
+    if not operacoes or any(op not in OPERACOES for op in operacoes):
+        raise ValueError(f"operacoes deve usar {OPERACOES}: {operacoes!r}")
+    if any(int(peso) < 1 for peso in operacoes.values()):
+        raise ValueError(f"Os pesos das operações devem ser inteiros positivos: {operacoes!r}")
+    cenario['operacoes'] = {op: int(peso) for op, peso in operacoes.items()}
+    if cenario['executor'] not in EXECUTORES:
+        raise ValueError(f"executor deve ser um de {EXECUTORES}: {cenario['executor']!r}")
+    duracao_segundos(cenario['duracao'])
+    for metrica, expressoes in cenario['thresholds'].items():
+        if isinstance(expressoes, str):
+            expressoes = [expressoes]
+        for expr in expressoes:
+            interpretar_threshold(expr)
+        cenario['thresholds'][metrica] = list(expressoes)
+    if cenario['executor'] == 'taxa_constante':
+        if not cenario['taxa'] or cenario['taxa'] <= 0:
+            raise ValueError("executor taxa_constante exige 'taxa' (iterações por segundo)")
+        # Os VUs são alocados pelo K6 conforme a taxa (pre_vus/max_vus)
+        cenario['vus'] = None
+        # Sem pausa: o intervalo entre iterações é dado pela taxa
+        if cenario['pausa'] is None:
+            cenario['pausa'] = 0
+        if cenario['pre_vus'] is None:
+            cenario['pre_vus'] = vus_necessarios(cenario['taxa'], cenario['pausa'] + _latencia_limite(cenario))
+        if cenario['max_vus'] is None:
+            cenario['max_vus'] = cenario['pre_vus'] * FATOR_MAX_VUS
+        if cenario['max_vus'] < cenario['pre_vus']:
+            raise ValueError(f"max_vus ({cenario['max_vus']}) menor que pre_vus ({cenario['pre_vus']})")
+    else:
+        if not cenario['vus'] or int(cenario['vus']) < 1:
+            raise ValueError(f"executor {cenario['executor']} exige 'vus' >= 1")
+        cenario['vus'] = int(cenario['vus'])
+        # Mesma pausa de 1 s por iteração dos scripts por VU
+        if cenario['pausa'] is None:
+            cenario['pausa'] = 1
+    return cenario
+
+
+def vus_necessarios(taxa: float, duracao_iteracao_s: float) -> int:
+    """
+    VUs para manter 'taxa' iterações/s com iterações de duracao_iteracao_s (lei de Little: L = λW).
+    """
+    return max(1, math.ceil(taxa * duracao_iteracao_s))
+
+
+def _latencia_limite(cenario: dict) -> float:
+    # Maior limite de http_req_duration do cenário, em segundos: até ele, os VUs pré-alocados bastam
+    limites = [interpretar_threshold(expr)['valor'] for expr in cenario['thresholds'].get('http_req_duration', [])]
+    limites = [v for v in limites if v > 0]
+    return max(limites) / 1000 if limites else LATENCIA_PADRAO_S
+
+
+def carregar_cenario(caminho: str, **ajustes) -> dict:
+    """
+    Lê o cenário JSON de caminho; ajustes (ex.: executor='taxa_constante', taxa=200) substituem campos antes da validação.
+    """
+    with open(caminho, 'r') as f:
+        spec = json.load(f)
+    try:
+        return normalizar_cenario(dict(spec, **ajustes))
+    except ValueError as e:
+        raise ValueError(f"{caminho}: {e}") from None
+
+
+def ambiente_cenario(cenario: dict) -> dict:
+    """
+    Variáveis de ambiente do cenario.js (passadas a executar_k6 em env).
+    """
+    return {'CENARIO': json.dumps(cenario, separators=(',', ':'))}
+
+
+def interpretar_threshold(expr: str) -> dict:
+    """
+    'p(95)<500' -> {'agregacao': 'p95', 'operador': '<', 'valor': 500.0}.
+    """
+    achado = _THRESHOLD.match(expr)
+    if not achado:
+        raise ValueError(f"Threshold não reconhecido: {expr!r}")
+    agregacao, percentil, operador, valor = achado.groups()
+    if percentil is not None:
+        agregacao = f"p{percentil.replace('.', '_')}"
+    return {'agregacao': agregacao, 'operador': '==' if operador == '===' else operador, 'valor': float(valor)}
+
+
+def thresholds_cenario(cenario: dict) -> dict:
+    """
+    Thresholds como dados: {chave: {'metrica', 'agregacao', 'operador', 'valor', 'expressao'}}. A chave segue os nomes
+    já usados pelos scripts: a métrica para taxas ('http_req_failed', 'checks') e <métrica>_<agregação> para o resto
+    ('http_req_duration_p95', 'http_req_duration_avg').
+    """
+    limites = {}
+    for metrica, expressoes in cenario['thresholds'].items():
+        for expr in expressoes:
+            limite = dict(interpretar_threshold(expr), metrica=metrica, expressao=expr)
+            chave = metrica if limite['agregacao'] == 'rate' else f"{metrica}_{limite['agregacao']}"
+            limites[chave] = limite
+    return limites
+
+
+def limites_planos(cenario: dict) -> dict:
+    """
+    {chave: valor} no mesmo formato de extrair_thresholds_k6.
+    """
+    return {chave: limite['valor'] for chave, limite in thresholds_cenario(cenario).items()}
+
+
+def atende(limite: dict, valor) -> bool:
+    """
+    Aplica o operador do threshold ao valor medido (False se não houver valor).
+    """
+    if valor is None:
+        return False
+    alvo = limite['valor']
+    return {
+        '<': valor < alvo, '<=': valor <= alvo, '>': valor > alvo, '>=': valor >= alvo,
+        '==': valor == alvo, '!=': valor != alvo,
+    }[limite['operador']]
+
+
+def valor_medido(k6_summary: dict, limite: dict):
+    """
+    Valor do summary do K6 (--summary-export, formato antigo ou com 'values') comparado pelo threshold:
+    'p95' -> p(95), 'rate' -> taxa, demais agregações pelo próprio nome. None se o valor não estiver no summary;
+    um counter ausente vale 0 (o K6 só exporta counters que receberam amostras, ex.: dropped_iterations).
+    """
+    metricas = (k6_summary.get('metrics') or {}) if isinstance(k6_summary, dict) else {}
+    metrica = metricas.get(limite['metrica'])
+    agregacao = limite['agregacao']
+    if metrica is None:
+        return 0.0 if agregacao == 'count' and metricas else None
+    valores = metrica.get('values', metrica)
+    if agregacao == 'rate':
+        valor = valores.get('rate', valores.get('value'))
+    elif re.fullmatch(r'p\d+(_\d+)?', agregacao):
+        valor = valores.get(f"p({agregacao[1:].replace('_', '.')})")
+    else:
+        valor = valores.get(agregacao)
+    return float(valor) if valor is not None else None
+
+
+def variar_cenario(spec: dict, nome_base: str, vus=(), taxas=()) -> dict:
+    """
+    Deriva da especificação (o JSON como escrito, antes de normalizar_cenario) um cenário por valor de VUs ou taxa, nomeados <nome_base>_<N>vus / <nome_base>_<N>rps
+    (o sufixo é o que o catálogo e o modelo de capacidade usam para separar operação e carga).
+    """
+    variantes = {}
+    for n in vus:
+        variantes[f"{nome_base}_{int(n)}vus"] = normalizar_cenario(dict(spec, vus=int(n)))
+    for taxa in taxas:
+        variantes[f"{nome_base}_{int(taxa)}rps"] = normalizar_cenario(dict(spec, executor='taxa_constante', taxa=taxa))
+    return variantes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('cenario', help='Arquivo JSON do cenário')
+    parser.add_argument('--vus', default=None, help='Gera uma variante por quantidade de VUs (separadas por vírgula)')
+    parser.add_argument('--taxas', default=None, help='Gera uma variante com taxa de chegada constante por valor (req/s)')
+    parser.add_argument('--saida', default='resultados/cenarios', help='Pasta das variantes geradas')
+    args = parser.parse_args()
+    with open(args.cenario, 'r') as f:
+        spec = json.load(f)
+    cenario = normalizar_cenario(spec)
+    if not args.vus and not args.taxas:
+        print(json.dumps({'cenario': cenario, 'thresholds': thresholds_cenario(cenario)}, indent=4, ensure_ascii=False))
+        return
+    nome_base = os.path.splitext(os.path.basename(args.cenario))[0]
+    vus = [int(v) for v in args.vus.split(',')] if args.vus else []
+    taxas = [float(t) for t in args.taxas.split(',')] if args.taxas else []
+    os.makedirs(args.saida, exist_ok=True)
+    for nome, variante in variar_cenario(spec, nome_base, vus, taxas).items():
+        caminho = os.path.join(args.saida, f"{nome}.json")
+        with open(caminho, 'w') as f:
+            json.dump(variante, f, indent=4, ensure_ascii=False)
+        print(caminho)
+
+
+if __name__ == "__main__":
+    # Como executar no terminal:
+    # python cenarios_k6.py cenarios/mix_users.json                      # mostra o cenário completo e os thresholds
+    # python cenarios_k6.py cenarios/mix_users.json --vus 50,250,500     # grava resultados/cenarios/mix_users_<N>vus.json
+    main()
@@ -0,0 +1,285 @@
+# Coleta de métricas por um agente remoto de longa duração: um único exec_command roda um laço em shell
+# que lê /proc/stat, /proc/meminfo e os arquivos de cgroup dos containers (só builtins do shell, sem abrir
+# processos a cada amostra além do sleep) e escreve tudo num único canal SSH. O parsing é feito localmente.
+# Usado pelo modo 'stream' dos coletores SSH dos scripts.
+
+import re
+import time
+import threading
+
+from k6_stream import agregar_serie_por_fases
+
+# Resolve o diretório de cgroup de cada container uma única vez e entra no laço de amostragem.
+# Cada amostra é um bloco: "T <uptime>", a linha "cpu" do /proc/stat, "MEM <chave> <kB>" e
+# "CG <alvo> <arquivo> <chave> <valor>" para os containers; termina com "FIM".
+SCRIPT_AGENTE = r'''
+cg() {
+    id=$(docker inspect -f '{{.Id}}' "$1" 2>/dev/null)
+    [ -z "$id" ] && return
+    for d in /sys/fs/cgroup/system.slice/docker-$id.scope /sys/fs/cgroup/docker/$id; do
+        [ -f "$d/cgroup.controllers" ] && { echo "$d"; return; }
+    done
+    [ -d /sys/fs/cgroup/cpu,cpuacct/docker/$id ] && echo "v1:$id"
+}
+ler() {
+    alvo=$1; d=$2
+    case $d in
+    v1:*)
+        id=${d#v1:}
+        read v < /sys/fs/cgroup/cpu,cpuacct/docker/$id/cpuacct.usage && echo "CG $alvo cpuacct.usage valor $v"
+        read v < /sys/fs/cgroup/memory/docker/$id/memory.usage_in_bytes && echo "CG $alvo memory.usage_in_bytes valor $v"
+        ;;
+    ?*)
+        for arq in __ARQUIVOS__; do
+            [ -f "$d/$arq" ] || continue
+            while read -r linha; do
+                case $linha in
+                *" "*) echo "CG $alvo $arq $linha" ;;
+                *) echo "CG $alvo $arq valor $linha" ;;
+                esac
+            done < "$d/$arq"
+        done
+        ;;
+    esac
+}
+CG_BACKEND=$(cg '__BACKEND__')
+CG_DB=$(cg '__DATABASE__')
+read up _ < /proc/uptime
+echo "INICIO $(date +%s.%N) $up"
+while :; do
+    read up _ < /proc/uptime
+    echo "T $up"
+    read -r linha < /proc/stat
+    echo "$linha"
+    while read -r k v _; do
+        case $k in MemTotal:|MemAvailable:) echo "MEM $k $v" ;; esac
+    done < /proc/meminfo
+    ler backend "$CG_BACKEND"
+    ler db "$CG_DB"
+    echo FIM
+    sleep __INTERVALO__
+done
+'''
+
+# Arquivos de cgroup v2 lidos a cada amostra
+ARQUIVOS_CGROUP = ('cpu.stat', 'memory.current', 'memory.stat', 'io.stat', 'cpu.pressure', 'memory.pressure', 'io.pressure')
+
+# Campos de memory.stat guardados em cada amostra (bytes)
+CAMPOS_MEMORY_STAT = ('anon', 'file', 'kernel', 'sock', 'shmem')
+
+_UNIDADES_MIB = {
+    'b': 1 / (1024 * 1024), 'kib': 1 / 1024, 'mib': 1, 'gib': 1024, 'tib': 1024 * 1024,
+    'kb': 1000 / (1024 * 1024), 'mb': 1000 ** 2 / (1024 * 1024), 'gb': 1000 ** 3 / (1024 * 1024),
+}
+
+
+def montar_script_agente(backend_name, db_name, intervalo, arquivos=ARQUIVOS_CGROUP):
+    return (SCRIPT_AGENTE.replace('__BACKEND__', backend_name).replace('__DATABASE__', db_name)
+            .replace('__INTERVALO__', str(intervalo)).replace('__ARQUIVOS__', ' '.join(arquivos)))
+
+
+class ColetorStreamSSH:
+    """
+    Mantém um agente remoto amostrando a cada 'intervalo' segundos (aceita frações) enquanto a coleta estiver ativa.
+    parar() retorna as amostras no mesmo formato dos coletores por comandos (host_cpu/backend_cpu em %,
+    host_mem/backend_mem em MiB), com 'instante' em cada amostra. O instante usa o relógio local, como as fases do
+    K6 e o modo por comandos: o epoch local de quando a linha INICIO do agente chega mais o uptime remoto decorrido
+    desde ela. desvio_relogio guarda a diferença local - remoto (s) vista nessa linha.
+    """
+    def __init__(self, ssh, intervalo=0.5, arquivos=ARQUIVOS_CGROUP):
+        self.ssh = ssh
+        self.intervalo = intervalo
+        self.arquivos = arquivos
+        self._canal = None
+        self._thread = None
+        self._amostras = []
+        self.desvio_relogio = None
+
+    def iniciar(self, backend_name, db_name):
+        self._amostras = []
+        script = montar_script_agente(backend_name, db_name, self.intervalo, self.arquivos)
+        self._canal = self.ssh.get_transport().open_session()
+        self._canal.exec_command(f"sh -c {_aspas(script)}")
+        self._thread = threading.Thread(target=self._ler, daemon=True)
+        self._thread.start()
+
+    def _ler(self):
+        epoch_inicio = uptime_inicio = None
+        bloco = {}
+        anterior = None
+        for linha in self._canal.makefile('r'):
+            partes = linha.split()
+            if not partes:
+                continue
+            if partes[0] == 'INICIO':
+                # Relógio local: o epoch remoto pode estar adiantado ou atrasado em relação a esta máquina
+                epoch_inicio, uptime_inicio = time.time(), float(partes[2])
+                self.desvio_relogio = epoch_inicio - float(partes[1])
+            elif partes[0] == 'T':
+                bloco = {'uptime': float(partes[1]), 'cg': {'backend': {}, 'db': {}}}
+            elif partes[0] == 'cpu':
+                valores = [int(v) for v in partes[1:]]
+                # idle + iowait contam como ociosos, como no top
+                bloco['cpu_ocioso'] = valores[3] + (valores[4] if len(valores) > 4 else 0)
+                bloco['cpu_total'] = sum(valores[:8])
+            elif partes[0] == 'MEM':
+                bloco[partes[1].rstrip(':')] = int(partes[2])
+            elif partes[0] == 'CG' and len(partes) >= 5 and partes[1] in bloco.get('cg', {}):
+                interpretar_linha_cgroup(bloco['cg'][partes[1]], partes[2], partes[3:])
+            elif partes[0] == 'FIM' and 'uptime' in bloco:
+                if anterior is not None and epoch_inicio is not None:
+                    self._amostras.append(self._amostra(anterior, bloco, epoch_inicio + bloco['uptime'] - uptime_inicio))
+                anterior = bloco
+
+    def _amostra(self, anterior, atual, instante):
+        dt = atual['uptime'] - anterior['uptime']
+        host_cpu = host_mem = None
+        d_total = atual.get('cpu_total', 0) - anterior.get('cpu_total', 0)
+        if d_total > 0:
+            host_cpu = 100.0 * (1 - (atual['cpu_ocioso'] - anterior['cpu_ocioso']) / d_total)
+        if 'MemTotal' in atual and 'MemAvailable' in atual:
+            host_mem = (atual['MemTotal'] - atual['MemAvailable']) / 1024
+        amostra = {'instante': instante, 'host_cpu': host_cpu, 'host_mem': host_mem}
+        for alvo in ('backend', 'db'):
+            amostra[f'{alvo}_cpu'] = _cpu_container(anterior['cg'][alvo], atual['cg'][alvo], dt)
+            amostra[f'{alvo}_mem'] = _mem_container(atual['cg'][alvo])
+            amostra.update({f'{alvo}_{campo}': valor
+                            for campo, valor in metricas_cgroup(anterior['cg'][alvo], atual['cg'][alvo], dt).items()})
+        return amostra
+
+    def parar(self) -> list:
+        if self._canal is not None:
+            # Fechar o canal encerra o agente remoto (o próximo echo recebe SIGPIPE)
+            self._canal.close()
+            self._thread.join(timeout=5)
+            self._canal = None
+        return self._amostras
+
+
+def interpretar_linha_cgroup(leituras: dict, arquivo: str, tokens: list):
+    """
+    Guarda em leituras[(arquivo, chave)] os valores de uma linha de arquivo de cgroup:
+    - "chave valor" (cpu.stat, memory.stat, memory.current como "valor N");
+    - io.stat "MAJ:MIN rbytes=.. wbytes=.. rios=.. wios=.." somado entre os dispositivos;
+    - pressure "some|full avg10=.. avg60=.. avg300=.. total=.." como some_total, full_avg10 etc.
+    """
+    try:
+        if len(tokens) == 2 and '=' not in tokens[1]:
+            leituras[(arquivo, tokens[0])] = int(tokens[1])
+            return
+        for par in tokens[1:]:
+            chave, _, valor = par.partition('=')
+            valor = float(valor) if '.' in valor else int(valor)
+            if arquivo == 'io.stat':
+                leituras[(arquivo, chave)] = leituras.get((arquivo, chave), 0) + valor
+            else:
+                leituras[(arquivo, f'{tokens[0]}_{chave}')] = valor
+    except ValueError:
+        pass
+
+
+def _delta(anterior, atual, chave):
+    if chave in atual and chave in anterior:
+        return atual[chave] - anterior[chave]
+    return None
+
+
+def metricas_cgroup(anterior: dict, atual: dict, dt: float) -> dict:
+    """
+    Métricas derivadas dos arquivos de cgroup v2 entre duas leituras (só as disponíveis):
+    cpu_segundos (CPU consumida no intervalo), cpu_throttled (% do intervalo com throttling),
+    mem_bytes e mem_<campo> do memory.stat (bytes), io_leitura/io_escrita (bytes/s),
+    psi_cpu/psi_mem/psi_io (% do intervalo com alguma tarefa parada esperando o recurso).
+    """
+    r = {}
+    if dt <= 0:
+        return r
+    d = _delta(anterior, atual, ('cpu.stat', 'usage_usec'))
+    if d is not None:
+        r['cpu_segundos'] = d / 1e6
+    d = _delta(anterior, atual, ('cpu.stat', 'throttled_usec'))
+    if d is not None:
+        r['cpu_throttled'] = 100.0 * d / 1e6 / dt
+    if ('memory.current', 'valor') in atual:
+        r['mem_bytes'] = atual[('memory.current', 'valor')]
+    for campo in CAMPOS_MEMORY_STAT:
+        if ('memory.stat', campo) in atual:
+            r[f'mem_{campo}'] = atual[('memory.stat', campo)]
+    for chave, campo in (('rbytes', 'io_leitura'), ('wbytes', 'io_escrita')):
+        d = _delta(anterior, atual, ('io.stat', chave))
+        if d is not None:
+            r[campo] = d / dt
+    for arquivo, campo in (('cpu.pressure', 'psi_cpu'), ('memory.pressure', 'psi_mem'), ('io.pressure', 'psi_io')):
+        d = _delta(anterior, atual, (arquivo, 'some_total'))
+        if d is not None:
+            r[campo] = 100.0 * d / 1e6 / dt
+    return r
+
+
+def series_cgroup(amostras: list, alvo: str) -> dict:
+    """
+    Séries por campo das métricas de cgroup de um alvo ('backend' ou 'db'), só com os campos presentes.
+    """
+    prefixo = f'{alvo}_'
+    campos = []
+    for amostra in amostras:
+        for chave in amostra:
+            campo = chave[len(prefixo):]
+            if chave.startswith(prefixo) and campo not in ('cpu', 'mem') and campo not in campos:
+                campos.append(campo)
+    return {campo: [a.get(prefixo + campo) for a in amostras] for campo in campos}
+
+
+def medias_por_fase(metricas: dict, fases: dict) -> dict:
+    """
+    Médias de CPU e memória de host, backend e banco em cada fase do K6 (RegistroExecucao.fases), a partir do
+    JSON dos coletores SSH ('instantes' e as listas 'cpu'/'memoria' de cada alvo).
+    Retorna {fase: {'host': {'cpu', 'memoria'}, 'backend': {...}, 'banco_de_dados': {...}}}.
+    """
+    instantes = metricas.get('instantes') or []
+    por_fase = {}
+    for alvo in ('host', 'backend', 'banco_de_dados'):
+        for campo in ('cpu', 'memoria'):
+            serie = [(t, v) for t, v in zip(instantes, (metricas.get(alvo) or {}).get(campo) or []) if t is not None]
+            for fase, r in agregar_serie_por_fases(serie, fases).items():
+                por_fase.setdefault(fase, {}).setdefault(alvo, {})[campo] = r['media']
+    return por_fase
+
+
+def memoria_docker_mib(texto: str):
+    """
+    Converte o uso de memória do docker stats ("35.33MiB / 1GiB", "1.2GiB / 2GiB", "512KiB / 1GiB") para MiB.
+    """
+    m = re.match(r'\s*([0-9]+(?:[.,][0-9]+)?)\s*([KMGT]?i?B)', texto, re.IGNORECASE)
+    if not m:
+        return None
+    return float(m.group(1).replace(',', '.')) * _UNIDADES_MIB[m.group(2).lower()]
+
+
+def _cpu_container(anterior, atual, dt):
+    """
+    Uso de CPU em % de um núcleo (mesma escala do CPUPerc do docker stats) entre duas leituras.
+    """
+    if dt <= 0:
+        return None
+    if ('cpu.stat', 'usage_usec') in atual and ('cpu.stat', 'usage_usec') in anterior:
+        segundos = (atual[('cpu.stat', 'usage_usec')] - anterior[('cpu.stat', 'usage_usec')]) / 1e6
+    elif ('cpuacct.usage', 'valor') in atual and ('cpuacct.usage', 'valor') in anterior:
+        segundos = (atual[('cpuacct.usage', 'valor')] - anterior[('cpuacct.usage', 'valor')]) / 1e9
+    else:
+        return None
+    return 100.0 * segundos / dt
+
+
+def _mem_container(atual):
+    """
+    Memória do container em MiB.
+    """
+    for chave in (('memory.current', 'valor'), ('memory.usage_in_bytes', 'valor')):
+        if chave in atual:
+            return atual[chave] / (1024 * 1024)
+    return None
+
+
+def _aspas(texto):
+    return "'" + texto.replace("'", "'\"'\"'") + "'"
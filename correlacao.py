@@ -0,0 +1,260 @@
+# Correlação no tempo entre a latência do K6 e o uso de recursos dos containers: a série por segundo do K6 (RPS, p95,
+# erros, VUs; do <nome>_resumo.json ou, na falta dele, da saída NDJSON) e as amostras de CPU/memória (séries do
+# Prometheus ou amostras SSH com instante) são reamostradas numa grade comum de 1 s, por interpolação linear.
+# Sobre essas linhas detecta o joelho da latência (regressão segmentada do p95 no tempo) e, para cada recurso, quando
+# ele satura e em que nível de uso a latência se inflete, apontando qual recurso bate no limite primeiro.
+# Uso: python correlacao.py resultados/1.get_users_500vus-node-postgres-1_1024_metrics.json [...] [--csv]
+
+import os
+import csv
+import sys
+import json
+import argparse
+import warnings
+import numpy as np
+
+from k6_stream import AgregadorK6, caminho_resumo
+
+# Uso (fração do limite do container) a partir do qual o recurso é considerado saturado, por SEGUNDOS_SATURACAO seguidos
+LIMITE_SATURACAO = 0.9
+SEGUNDOS_SATURACAO = 3
+# Janela (s) da mediana móvel aplicada ao p95 por segundo antes de procurar o joelho
+JANELA_SUAVIZACAO = 5
+# Redução mínima do erro quadrático da reta para aceitar um joelho
+MELHORIA_MINIMA = 0.3
+# Um recurso que satura até esta quantidade de segundos depois do joelho da latência ainda conta como causa
+TOLERANCIA_JOELHO = 10
+
+COLUNAS = ('t', 'rps', 'erros', 'vus', 'p95', 'cpu_backend_cores', 'cpu_database_cores', 'mem_backend_bytes',
+           'mem_database_bytes', 'cpu_host_pct', 'mem_host_mib', 'uso_cpu_backend', 'uso_cpu_database',
+           'uso_mem_backend', 'uso_mem_database')
+
+# Recursos com limite conhecido: coluna de uso -> (coluna absoluta, chave do limite no cenário, escala do limite)
+RECURSOS = {
+    'uso_cpu_backend': ('cpu_backend_cores', 'backend_cpu', 1),
+    'uso_cpu_database': ('cpu_database_cores', 'db_cpu', 1),
+    'uso_mem_backend': ('mem_backend_bytes', 'backend_ram', 1024 * 1024),
+    'uso_mem_database': ('mem_database_bytes', 'db_ram', 1024 * 1024),
+}
+
+
+def serie_k6(metrics_path: str) -> list:
+    """
+    Série por segundo do K6 da execução: lê o <nome>_resumo.json e, se ele não existir, processa a saída NDJSON.
+    """
+    saida = metrics_path[:-len('_metrics.json')] + '.json'
+    resumo_path = caminho_resumo(saida)
+    if os.path.exists(resumo_path):
+        with open(resumo_path, 'r') as f:
+            return json.load(f).get('serie_temporal') or []
+    if os.path.exists(saida):
+        return AgregadorK6().processar_arquivo(saida).serie_temporal()
+    return []
+
+
+def series_recursos(metrics: dict) -> dict:
+    """
+    Séries [(epoch, valor)] de CPU e memória do _metrics.json, nas unidades das COLUNAS: CPU em núcleos e memória
+    em bytes dos containers (Prometheus ou SSH, que mede CPU em % de um núcleo e memória em MiB) e, com SSH,
+    CPU (%) e memória (MiB) do host.
+    """
+    series = {}
+    for alvo, chaves in (('backend', ('prometheus_metrics_backend', 'prometheus_metrics')),
+                         ('database', ('prometheus_metrics_database',))):
+        prom = next((metrics[c] for c in chaves if metrics.get(c)), None) or {}
+        if prom.get('serie_cpu'):
+            series[f'cpu_{alvo}_cores'] = [(t, v) for t, v in prom['serie_cpu']]
+        if prom.get('serie_mem'):
+            series[f'mem_{alvo}_bytes'] = [(t, v) for t, v in prom['serie_mem']]
+    instantes = metrics.get('instantes_ssh') or []
+    for chave, secao, campo, escala in (('cpu_backend_cores', 'backend', 'cpu', 0.01),
+                                        ('mem_backend_bytes', 'backend', 'memoria', 1024 * 1024),
+                                        ('cpu_database_cores', 'banco_de_dados', 'cpu', 0.01),
+                                        ('mem_database_bytes', 'banco_de_dados', 'memoria', 1024 * 1024),
+                                        ('cpu_host_pct', 'host', 'cpu', 1), ('mem_host_mib', 'host', 'memoria', 1)):
+        valores = (metrics.get(secao) or {}).get(campo) or []
+        serie = [(t, v * escala) for t, v in zip(instantes, valores) if t is not None and v is not None]
+        if serie and chave not in series:
+            series[chave] = serie
+    return series
+
+
+def reamostrar(serie, grade: np.ndarray) -> np.ndarray:
+    """
+    Interpola linearmente a série [(epoch, valor)] nos instantes da grade; fora da faixa amostrada fica NaN.
+    """
+    if not serie:
+        return np.full(len(grade), np.nan)
+    pontos = np.asarray(sorted(serie), dtype=float)
+    valores = np.interp(grade, pontos[:, 0], pontos[:, 1])
+    valores[(grade < pontos[0, 0]) | (grade > pontos[-1, 0])] = np.nan
+    return valores
+
+
+def linhas_por_segundo(metrics_path: str, metrics: dict) -> dict:
+    """
+    Junta K6 e recursos numa grade de 1 s (os segundos da série do K6). Retorna {coluna: array} com as COLUNAS
+    presentes; uso_* é a fração do limite de CPU/RAM do container definido no cenário.
+    """
+    serie = serie_k6(metrics_path)
+    if not serie:
+        return {}
+    grade = np.asarray([s['t'] for s in serie], dtype=float)
+    linhas = {'t': grade}
+    for coluna in ('rps', 'erros', 'vus', 'p95'):
+        linhas[coluna] = np.asarray([np.nan if s.get(coluna) is None else s[coluna] for s in serie], dtype=float)
+    for coluna, pontos in series_recursos(metrics).items():
+        linhas[coluna] = reamostrar(pontos, grade)
+    cenario = metrics.get('cenario') or {}
+    for uso, (coluna, chave_limite, escala) in RECURSOS.items():
+        limite = cenario.get(chave_limite)
+        if coluna in linhas and limite:
+            linhas[uso] = linhas[coluna] / (float(limite) * escala)
+    return linhas
+
+
+def mediana_movel(valores: np.ndarray, janela: int = JANELA_SUAVIZACAO) -> np.ndarray:
+    if len(valores) < janela:
+        return valores
+    borda = janela // 2
+    estendido = np.pad(valores, borda, mode='edge')
+    janelas = np.lib.stride_tricks.sliding_window_view(estendido, janela)
+    # Janelas só com NaN geram RuntimeWarning em nanmedian; o resultado NaN é o esperado
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmedian(janelas, axis=1)[:len(valores)]
+
+
+def ajustar_joelho(x, y, candidatos: int = 50) -> dict:
+    """
+    Regressão segmentada y = a + b·x + c·max(0, x - x0): procura x0 entre os percentis 10 e 90 de x.
+    Retorna x0, as inclinações antes e depois e a redução do erro em relação a uma reta, ou None se não houver
+    joelho para cima (c > 0) que reduza o erro em pelo menos MELHORIA_MINIMA.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    validos = ~np.isnan(x) & ~np.isnan(y)
+    x, y = x[validos], y[validos]
+    if len(np.unique(x)) < 6:
+        return None
+    reta = np.column_stack([np.ones_like(x), x])
+    erro_reta = ((y - reta @ np.linalg.lstsq(reta, y, rcond=None)[0]) ** 2).sum()
+    if erro_reta <= 0:
+        return None
+    melhor = None
+    for x0 in np.unique(np.percentile(x, np.linspace(10, 90, candidatos))):
+        A = np.column_stack([reta, np.maximum(0, x - x0)])
+        coef = np.linalg.lstsq(A, y, rcond=None)[0]
+        erro = ((y - A @ coef) ** 2).sum()
+        if melhor is None or erro < melhor[0]:
+            melhor = (erro, x0, coef)
+    erro, x0, (_, b, c) = melhor
+    melhoria = 1 - erro / erro_reta
+    if c <= 0 or melhoria < MELHORIA_MINIMA:
+        return None
+    return {'x': float(x0), 'inclinacao_antes': float(b), 'inclinacao_depois': float(b + c), 'melhoria': float(melhoria)}
+
+
+def inicio_saturacao(t: np.ndarray, uso: np.ndarray):
+    """
+    Primeiro instante em que o uso fica em LIMITE_SATURACAO ou mais por SEGUNDOS_SATURACAO segundos seguidos.
+    """
+    acima = np.nan_to_num(uso, nan=0.0) >= LIMITE_SATURACAO
+    seguidos = 0
+    for i, a in enumerate(acima):
+        seguidos = seguidos + 1 if a else 0
+        if seguidos >= SEGUNDOS_SATURACAO:
+            return float(t[i - SEGUNDOS_SATURACAO + 1])
+    return None
+
+
+def diagnosticar(linhas: dict) -> dict:
+    """
+    Joelho da latência no tempo e, por recurso com limite, o instante de saturação, o uso no joelho e o nível de uso
+    em que o p95 se inflete (regressão segmentada do p95 contra o uso). 'gargalo' é o recurso que satura primeiro até
+    TOLERANCIA_JOELHO segundos depois do joelho; sem saturação, o de maior uso no joelho.
+    """
+    if not linhas or np.isnan(linhas['p95']).all():
+        return {'joelho_latencia': None, 'recursos': {}, 'gargalo': None}
+    t = linhas['t']
+    p95 = mediana_movel(linhas['p95'])
+    joelho = ajustar_joelho(t - t[0], p95)
+    t_joelho = t[0] + joelho['x'] if joelho else None
+    if joelho:
+        joelho = dict(joelho, t=t_joelho, segundos_desde_inicio=joelho.pop('x'))
+    recursos = {}
+    for uso in RECURSOS:
+        if uso not in linhas or np.isnan(linhas[uso]).all():
+            continue
+        valores = linhas[uso]
+        r = {'uso_max': float(np.nanmax(valores)), 'inicio_saturacao': inicio_saturacao(t, valores)}
+        if t_joelho is not None:
+            r['uso_no_joelho'] = float(np.interp(t_joelho, t[~np.isnan(valores)], valores[~np.isnan(valores)]))
+        joelho_uso = ajustar_joelho(valores, p95)
+        r['uso_inflexao_latencia'] = joelho_uso['x'] if joelho_uso else None
+        recursos[uso] = r
+    saturados = [(r['inicio_saturacao'], uso) for uso, r in recursos.items() if r['inicio_saturacao'] is not None
+                 and (t_joelho is None or r['inicio_saturacao'] <= t_joelho + TOLERANCIA_JOELHO)]
+    gargalo = None
+    if saturados:
+        gargalo = {'recurso': min(saturados)[1], 'criterio': 'saturacao'}
+    elif t_joelho is not None and recursos:
+        gargalo = {'recurso': max(recursos, key=lambda u: recursos[u].get('uso_no_joelho', 0)), 'criterio': 'uso_no_joelho'}
+    return {'joelho_latencia': joelho, 'recursos': recursos, 'gargalo': gargalo}
+
+
+def correlacionar_execucao(metrics_path: str, gravar_csv: bool = False) -> dict:
+    """
+    Monta as linhas por segundo e o diagnóstico de uma execução; com gravar_csv, grava as linhas em
+    <nome>_correlacao.csv ao lado do _metrics.json.
+    """
+    with open(metrics_path, 'r') as f:
+        metrics = json.load(f)
+    linhas = linhas_por_segundo(metrics_path, metrics)
+    diagnostico = diagnosticar(linhas)
+    diagnostico['segundos'] = int(len(linhas.get('t', [])))
+    if gravar_csv and linhas:
+        colunas = [c for c in COLUNAS if c in linhas]
+        caminho = metrics_path[:-len('_metrics.json')] + '_correlacao.csv'
+        with open(caminho, 'w', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(colunas)
+            for i in range(len(linhas['t'])):
+                escritor.writerow(['' if np.isnan(linhas[c][i]) else f'{linhas[c][i]:.6g}' for c in colunas])
+        diagnostico['csv'] = caminho
+    return diagnostico
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('metrics', nargs='+', help='Arquivos <nome>_metrics.json')
+    parser.add_argument('--csv', action='store_true', help='Grava as linhas por segundo em <nome>_correlacao.csv')
+    parser.add_argument('--saida', default=None, help='Grava os diagnósticos em JSON')
+    args = parser.parse_args()
+    diagnosticos = {}
+    for metrics_path in args.metrics:
+        if not metrics_path.endswith('_metrics.json'):
+            continue
+        try:
+            d = correlacionar_execucao(metrics_path, gravar_csv=args.csv)
+        except Exception as e:
+            print(f"[CORRELACAO] Ignorando {metrics_path}: {e}", file=sys.stderr)
+            continue
+        diagnosticos[metrics_path] = d
+        joelho = d['joelho_latencia']
+        gargalo = d['gargalo']
+        print(f"{metrics_path}: {d['segundos']} s | joelho do p95 "
+              f"{'aos ' + format(joelho['segundos_desde_inicio'], '.0f') + ' s' if joelho else 'não encontrado'} | "
+              f"gargalo: {gargalo['recurso'] + ' (' + gargalo['criterio'] + ')' if gargalo else 'nenhum'}")
+        for uso, r in d['recursos'].items():
+            print(f"    {uso}: máx={r['uso_max']:.2f} saturação={r['inicio_saturacao']} "
+                  f"no joelho={r.get('uso_no_joelho')} inflexão do p95 em uso={r['uso_inflexao_latencia']}")
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(diagnosticos, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    # Como executar no terminal:
+    # python correlacao.py resultados/*_metrics.json --csv --saida correlacao.json
+    main()
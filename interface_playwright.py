@@ -0,0 +1,228 @@
+# Automação da interface React com Playwright: criação do container pelo modal, espera do build,
+# leitura da URL e das informações do card e remoção. Usado pelo ProvisionadorPlaywright (provisionadores.py).
+
+import time
+
+def iniciar_navegador(playwright):
+    """
+    Inicia o navegador com Playwright e retorna o browser.
+    """
+    browser = playwright.chromium.launch(headless=True)
+    return browser
+
+def acessar_aplicacao(page, url: str):
+    """
+    Abre a aplicação React na URL fornecida.
+    """
+    page.goto(url)
+
+def criar_container(page, config: dict):
+    """
+    Preenche os campos de criação de container com base na configuração.
+    Aguarda o botão aparecer antes de clicar.
+    Seletores ajustados conforme o HTML do modal fornecido.
+    """
+    # Botão para abrir modal de criação
+    BOTAO_CRIAR = 'button.btn.btn-primary[data-bs-target="#staticBackdrop"]'  # Botão "Add Container"
+    page.wait_for_selector(BOTAO_CRIAR, timeout=60000)
+    page.click(BOTAO_CRIAR)
+    # Aguarda o modal abrir
+    page.wait_for_selector('#staticBackdrop.show', timeout=10000)
+    # Seleciona a stack (Options)
+    page.select_option('#config-selection', config["backend"])  # Ex: node-postgres
+    # Backend CPU e RAM
+    page.fill('input.value-viewer[data-for="backend-cpu"]', str(float(config.get("backend_cpu", 0.5))))
+    page.fill('input.value-viewer[data-for="backend-ram"]', str(int(config.get("backend_ram", 512))))
+    # Abrir o accordion do Database antes de preencher
+    db_accordion_btn = 'button.accordion-button[aria-controls="collapseTwo"]'
+    page.click(db_accordion_btn)
+    page.wait_for_selector('input.value-viewer[data-for="database-cpu"]', state='visible', timeout=5000)
+    # Database CPU e RAM
+    page.fill('input.value-viewer[data-for="database-cpu"]', str(float(config.get("db_cpu", 0.5))))
+    page.fill('input.value-viewer[data-for="database-ram"]', str(int(config.get("db_ram", 512))))
+    # Clica no botão Build
+    page.click('#request-btn')
+
+def aguardar_container_ativo(page, timeout=240000) -> None:
+    """
+    Aguarda até que a interface indique que o container está pronto para testes.
+    Espera pelo texto 'Container build successfully!' e clica em 'Ok'.
+    A espera é feita pelo próprio Playwright (observa o DOM), retornando assim que a mensagem aparece.
+    """
+    try:
+        page.wait_for_selector('text=Container build successfully!', timeout=timeout)
+    except Exception:
+        raise TimeoutError('Mensagem de sucesso do container não detectada. Ajuste o seletor se necessário.')
+    page.click('text=Ok')
+
+def excluir_container(page):
+    """
+    Realiza a exclusão do container pela interface.
+    Aguarda o botão 'Remove' aparecer, clica nele e espera 3 segundos para garantir remoção.
+    """
+    BOTAO_REMOVE = 'a:has-text("Remove")'
+    try:
+        page.wait_for_selector(BOTAO_REMOVE, timeout=60000)
+        page.click(BOTAO_REMOVE)
+        page.wait_for_timeout(3000)  # Aguarda 3 segundos para o popup sumir e o container ser removido
+    except Exception:
+        print('Botão Remove não encontrado. Ajuste o seletor se necessário.')
+
+def seletor_card(container_id):
+    """
+    Retorna o seletor do card do container com o id informado.
+    """
+    return f'div.card:has(h5.card-title:text-is("{container_id}"))'
+
+def seletor_no_card(seletor: str, container_id=None) -> str:
+    """
+    Restringe o seletor ao card do container, se container_id for fornecido.
+    Seletores com vírgula são restringidos parte a parte.
+    """
+    if not container_id:
+        return seletor
+    return ', '.join(f'{seletor_card(container_id)} {parte.strip()}' for parte in seletor.split(','))
+
+def listar_ids_containers(page) -> list:
+    """
+    Retorna os ids de todos os containers exibidos na interface.
+    """
+    return [e.inner_text().strip() for e in page.query_selector_all('h5.card-title')]
+
+def listar_ids_estaveis(page, intervalo=1000, timeout=30000) -> list:
+    """
+    Recarrega a página e retorna os ids dos containers quando a lista parar de mudar (duas leituras iguais com
+    intervalo ms entre elas). No modo paralelo, a página de um worker só mostra os cards que outros workers
+    criaram depois de recarregar.
+    """
+    page.reload(wait_until='networkidle')
+    limite = time.monotonic() + timeout / 1000
+    ids = listar_ids_containers(page)
+    while True:
+        page.wait_for_timeout(intervalo)
+        atuais = listar_ids_containers(page)
+        if atuais == ids:
+            return atuais
+        if time.monotonic() > limite:
+            raise TimeoutError('A lista de containers da interface não estabilizou.')
+        ids = atuais
+
+def identificar_novo_container(page, ids_antes, timeout=60000):
+    """
+    Aguarda aparecer na interface um container cujo id não estava em ids_antes.
+    Retorna o id do novo container; lança erro se nenhum aparecer ou se aparecer mais de um (não dá para saber
+    qual é o do build atual).
+    """
+    try:
+        page.wait_for_function(
+            """(antes) => Array.from(document.querySelectorAll('h5.card-title'))
+                .some(e => e.innerText.trim() && !antes.includes(e.innerText.trim()))""",
+            arg=list(ids_antes), timeout=timeout)
+    except Exception:
+        raise Exception('Novo container não encontrado na interface após o build.')
+    novos = [i for i in listar_ids_containers(page) if i and i not in ids_antes]
+    if len(novos) != 1:
+        raise Exception(f'Esperado um único container novo na interface após o build, encontrados {len(novos)}: {novos}.')
+    return novos[0]
+
+def extrair_url_container(page, container_id=None, timeout=210000):
+    """
+    Após o container ser criado, extrai o href do botão/link 'Run' correspondente ao container recém-criado.
+    Se o href for '#', aguarda (observando o DOM) até que seja atualizado para a URL real do container.
+    Se container_id for fornecido, procura apenas no card desse container.
+    Retorna a URL encontrada ou lança erro se não encontrar.
+    """
+    # Só casa quando o link/botão já tem a URL real (href/data-href diferente de '#')
+    seletor = seletor_no_card('a[href]:has-text("Run"):not([href="#"]), button[data-href]:has-text("Run"):not([data-href="#"])', container_id)
+    try:
+        elem = page.wait_for_selector(seletor, timeout=timeout)
+    except Exception:
+        raise Exception('Nenhum link ou botão Run válido encontrado para extrair URL do container.')
+    return elem.get_attribute('href') or elem.get_attribute('data-href')
+
+def extrair_url_container_debug(page):
+    print('[DEBUG] Iniciando extração da URL do container (Run)')
+    tentativas = 60  # até 2 minutos
+    for i in range(tentativas):
+        print(f'[DEBUG] Tentativa {i+1}/{tentativas}')
+        run_links = page.query_selector_all('a:has-text("Run")')
+        if run_links:
+            for idx, link in enumerate(run_links):
+                href = link.get_attribute('href')
+                print(f'[DEBUG] Link {idx}: href={href}')
+                if href and href != "#":
+                    print(f'[DEBUG] Encontrado href válido: {href}')
+                    return href
+        run_btns = page.query_selector_all('button:has-text("Run")')
+        if run_btns:
+            for idx, btn in enumerate(run_btns):
+                href = btn.get_attribute('data-href')
+                print(f'[DEBUG] Botão {idx}: data-href={href}')
+                if href and href != "#":
+                    print(f'[DEBUG] Encontrado data-href válido: {href}')
+                    return href
+        if (i+1) % 5 == 0:
+            print('[DEBUG] Dando reload na página para tentar atualizar o estado do Run')
+            page.reload()
+        page.wait_for_timeout(5000)
+    raise Exception('Nenhum link ou botão Run válido encontrado para extrair URL do container.')
+
+def extrair_info_container(page, container_id=None):
+    """
+    Extrai informações do container criado na interface:
+    - id (h5.card-title)
+    - stack (div.card-header)
+    - backend_cpu, backend_ram, db_cpu, db_ram (parágrafos na card-body)
+    Se container_id for fornecido, lê apenas o card desse container.
+    Retorna um dicionário com esses dados.
+    """
+    info = {}
+    # Extrai o id do container
+    id_elem = page.query_selector(seletor_no_card('h5.card-title', container_id))
+    info['id'] = id_elem.inner_text().strip() if id_elem else None
+    # Extrai a stack
+    stack_elem = page.query_selector(seletor_no_card('div.card-header', container_id))
+    info['stack'] = stack_elem.inner_text().strip() if stack_elem else None
+    # Extrai CPU/RAM Backend e Database
+    backend_div = page.query_selector(seletor_no_card('div.card-body .d-flex .bg-primary-subtle:nth-child(1)', container_id))
+    db_div = page.query_selector(seletor_no_card('div.card-body .d-flex .bg-primary-subtle:nth-child(2)', container_id))
+    if backend_div:
+        backend_texts = backend_div.inner_text().split('\n')
+        for t in backend_texts:
+            if 'Cpus:' in t:
+                info['backend_cpu'] = t.split(':',1)[1].strip()
+            if 'Memória Ram:' in t:
+                info['backend_ram'] = t.split(':',1)[1].strip()
+    if db_div:
+        db_texts = db_div.inner_text().split('\n')
+        for t in db_texts:
+            if 'Cpus:' in t:
+                info['db_cpu'] = t.split(':',1)[1].strip()
+            if 'Memória Ram:' in t:
+                info['db_ram'] = t.split(':',1)[1].strip()
+    return info
+
+def excluir_container_ate_sucesso(page, container_id=None):
+    """
+    Tenta excluir o container até ter certeza que foi removido.
+    Só retorna quando o botão Remove não estiver mais disponível.
+    Se container_id for fornecido, remove apenas o card desse container.
+    """
+    BOTAO_REMOVE = seletor_no_card('a:has-text("Remove")', container_id)
+    try:
+        page.wait_for_selector(BOTAO_REMOVE, timeout=5000)
+    except Exception:
+        # Botão nunca apareceu: nada a remover
+        return
+    tentativas = 0
+    while page.query_selector(BOTAO_REMOVE):
+        # Se já tentou muitas vezes, pode ser um erro
+        if tentativas >= 20:
+            raise Exception('Não foi possível remover o container após várias tentativas.')
+        page.click(BOTAO_REMOVE)
+        tentativas += 1
+        # Retorna assim que o botão sai do DOM; se não sair em 5s, clica de novo
+        try:
+            page.wait_for_selector(BOTAO_REMOVE, state='detached', timeout=5000)
+        except Exception:
+            pass
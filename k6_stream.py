@@ -0,0 +1,603 @@
+# Leitura em streaming dos arquivos gerados por `k6 run --out json=...` (NDJSON, uma linha por ponto).
+# Os arquivos podem ter milhões de linhas; tudo aqui é calculado linha a linha, com memória constante
+# em relação ao número de requisições (histogramas log-lineares em vez de listas de valores).
+# Uso: python k6_stream.py resultados/1.get_users_50vus-node-postgres-1_1024.json [...]
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import signal
+import threading
+from collections import deque
+from functools import lru_cache
+from datetime import datetime
+
+# Erro relativo máximo de cada balde do histograma (1%)
+PRECISAO_HISTOGRAMA = 0.01
+
+# Fases da carga (fases_k6): o estado estável é o platô de VUs (até TOLERANCIA_VUS abaixo do máximo), depois de
+# pelo menos AQUECIMENTO_MIN_SEGUNDOS de carga; se o platô for menor que MIN_ESTAVEL_SEGUNDOS (rampa contínua,
+# como em stages de um único estágio), descarta FRACAO_AQUECIMENTO do início da carga.
+TOLERANCIA_VUS = 0.02
+AQUECIMENTO_MIN_SEGUNDOS = 10
+MIN_ESTAVEL_SEGUNDOS = 30
+FRACAO_AQUECIMENTO = 0.2
+
+# Grupos com que o K6 marca as requisições de setup() e teardown()
+GRUPOS_CICLO = {'::setup': 'setup_k6', '::teardown': 'teardown_k6'}
+
+_SEGMENTO_ID = re.compile(r'/(\d+|[0-9a-fA-F-]{32,36})(?=/|$|\?)')
+
+
+class HistogramaLog:
+    """
+    Histograma no estilo HDR: baldes logarítmicos com erro relativo limitado por `precisao`.
+    Guarda só contagens por balde, então a memória depende da faixa de valores e não da quantidade de amostras.
+    """
+    def __init__(self, precisao=PRECISAO_HISTOGRAMA):
+        self.precisao = precisao
+        self._log_base = math.log1p(precisao)
+        self.baldes = {}
+        self.zeros = 0
+        self.contagem = 0
+        self.soma = 0.0
+        self.minimo = None
+        self.maximo = None
+
+    def adicionar(self, valor: float, vezes: int = 1):
+        self.contagem += vezes
+        self.soma += valor * vezes
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+        if self.maximo is None or valor > self.maximo:
+            self.maximo = valor
+        if valor <= 0:
+            self.zeros += vezes
+            return
+        indice = math.floor(math.log(valor) / self._log_base)
+        self.baldes[indice] = self.baldes.get(indice, 0) + vezes
+
+    def mesclar(self, outro: 'HistogramaLog'):
+        for indice, n in outro.baldes.items():
+            self.baldes[indice] = self.baldes.get(indice, 0) + n
+        self.zeros += outro.zeros
+        self.contagem += outro.contagem
+        self.soma += outro.soma
+        if outro.minimo is not None and (self.minimo is None or outro.minimo < self.minimo):
+            self.minimo = outro.minimo
+        if outro.maximo is not None and (self.maximo is None or outro.maximo > self.maximo):
+            self.maximo = outro.maximo
+
+    def percentil(self, p: float):
+        """
+        Retorna o percentil p (0-100), com erro relativo de no máximo `precisao`.
+        """
+        if self.contagem == 0:
+            return None
+        alvo = max(1, math.ceil(self.contagem * p / 100.0))
+        acumulado = self.zeros
+        if acumulado >= alvo:
+            return 0.0
+        for indice in sorted(self.baldes):
+            acumulado += self.baldes[indice]
+            if acumulado >= alvo:
+                # Ponto médio do balde, limitado ao mínimo/máximo observados
+                valor = math.exp((indice + 0.5) * self._log_base)
+                return min(max(valor, self.minimo), self.maximo)
+        return self.maximo
+
+    def media(self):
+        return self.soma / self.contagem if self.contagem else None
+
+    def resumo(self) -> dict:
+        return {
+            'contagem': self.contagem,
+            'media': self.media(),
+            'min': self.minimo,
+            'max': self.maximo,
+            'p50': self.percentil(50),
+            'p90': self.percentil(90),
+            'p95': self.percentil(95),
+            'p99': self.percentil(99),
+        }
+
+
+def segundo_epoch(timestamp: str) -> int:
+    """
+    Converte o timestamp RFC3339 do K6 (com nanossegundos e fuso) para segundos epoch (inteiro).
+    A fração de segundo é descartada; a conversão é memorizada por segundo (_segundo_epoch_chave).
+    """
+    return _segundo_epoch_chave(timestamp[:19] + (timestamp[-6:] if timestamp[-6] in '+-' else 'Z'))
+
+
+# Os pontos chegam em ordem de tempo: poucos segundos distintos ficam "quentes" ao mesmo tempo
+@lru_cache(maxsize=4096)
+def _segundo_epoch_chave(chave: str) -> int:
+    fuso = chave[19:]
+    return int(datetime.fromisoformat(chave[:19] + ('+00:00' if fuso == 'Z' else fuso)).timestamp())
+
+
+def instante_epoch(timestamp: str) -> float:
+    """
+    Converte o timestamp RFC3339 do K6 para segundos epoch com a fração de segundo.
+    """
+    segundo = segundo_epoch(timestamp)
+    if len(timestamp) > 20 and timestamp[19] == '.':
+        fim = len(timestamp) - (1 if timestamp[-1] == 'Z' else 6)
+        return segundo + float('0' + timestamp[19:fim])
+    return float(segundo)
+
+
+def normalizar_url(url: str) -> str:
+    """
+    Troca segmentos numéricos/UUID da URL por ':id' (ex.: /users/123 -> /users/:id),
+    para que o agrupamento por URL não crie um grupo por registro.
+    """
+    return _SEGMENTO_ID.sub('/:id', url)
+
+
+def ler_pontos_k6(caminho: str):
+    """
+    Gera (nome_da_metrica, data) para cada ponto do NDJSON do K6, lendo linha a linha.
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            if '"Point"' not in linha:
+                continue
+            try:
+                obj = json.loads(linha)
+            except ValueError:
+                continue
+            if obj.get('type') == 'Point':
+                yield obj.get('metric'), obj['data']
+
+
+class AgregadorK6:
+    """
+    Consome pontos do K6 um a um e mantém:
+    - resumo por métrica (histograma para trends, soma/contagem para counters, rates e gauges);
+    - série por segundo de requisições, erros, latência (p50/p95/p99), VUs, iterações e iterações descartadas
+      (dropped_iterations, executores de taxa de chegada), só da carga (sem setup/teardown);
+    - requisições de setup() e teardown() em separado, com o primeiro e o último instante de cada;
+    - quebra de http_req_duration por (method, url normalizada, status).
+    """
+    def __init__(self):
+        self.linhas = 0
+        self.tipos = {}
+        self.trends = {}
+        self.valores = {}
+        self.segundos = {}
+        self.por_tag = {}
+        self.ciclo = {}
+        self.carga_inicio = None
+        self.carga_fim = None
+
+    def _segundo(self, t: int) -> dict:
+        s = self.segundos.get(t)
+        if s is None:
+            s = {'requisicoes': 0, 'erros': 0, 'latencia': HistogramaLog(), 'vus': None, 'iteracoes': 0, 'descartadas': 0}
+            self.segundos[t] = s
+        return s
+
+    def _ciclo(self, fase: str, t: float) -> dict:
+        c = self.ciclo.get(fase)
+        if c is None:
+            c = self.ciclo[fase] = {'inicio': t, 'fim': t, 'requisicoes': 0, 'erros': 0, 'latencia': HistogramaLog()}
+        c['inicio'] = min(c['inicio'], t)
+        c['fim'] = max(c['fim'], t)
+        return c
+
+    def processar(self, obj: dict):
+        tipo = obj.get('type')
+        nome = obj.get('metric')
+        if tipo == 'Metric':
+            self.tipos[nome] = obj.get('data', {}).get('type')
+            return
+        if tipo != 'Point':
+            return
+        data = obj['data']
+        valor = data.get('value', 0)
+        tipo_metrica = self.tipos.get(nome)
+        if tipo_metrica == 'trend':
+            h = self.trends.get(nome)
+            if h is None:
+                h = self.trends[nome] = HistogramaLog()
+            h.adicionar(valor)
+        else:
+            v = self.valores.get(nome)
+            if v is None:
+                v = self.valores[nome] = {'contagem': 0, 'soma': 0.0, 'ultimo': None, 'max': None}
+            v['contagem'] += 1
+            v['soma'] += valor
+            v['ultimo'] = valor
+            if v['max'] is None or valor > v['max']:
+                v['max'] = valor
+        if nome not in ('http_reqs', 'http_req_duration', 'http_req_failed', 'vus', 'iterations', 'dropped_iterations'):
+            return
+        tags = data.get('tags') or {}
+        fase_ciclo = GRUPOS_CICLO.get(tags.get('group'))
+        if fase_ciclo is not None:
+            c = self._ciclo(fase_ciclo, instante_epoch(data['time']))
+            if nome == 'http_reqs':
+                c['requisicoes'] += 1
+            elif nome == 'http_req_failed' and valor:
+                c['erros'] += 1
+            elif nome == 'http_req_duration':
+                c['latencia'].adicionar(valor)
+            return
+        if nome in ('http_reqs', 'iterations'):
+            t = instante_epoch(data['time'])
+            self.carga_inicio = t if self.carga_inicio is None else min(self.carga_inicio, t)
+            self.carga_fim = t if self.carga_fim is None else max(self.carga_fim, t)
+        seg = self._segundo(segundo_epoch(data['time']))
+        if nome == 'iterations':
+            seg['iteracoes'] += 1
+        elif nome == 'dropped_iterations':
+            seg['descartadas'] += valor
+        elif nome == 'http_reqs':
+            seg['requisicoes'] += 1
+        elif nome == 'http_req_failed':
+            if valor:
+                seg['erros'] += 1
+        elif nome == 'vus':
+            seg['vus'] = valor if seg['vus'] is None else max(seg['vus'], valor)
+        else:
+            seg['latencia'].adicionar(valor)
+            chave = (tags.get('method'), normalizar_url(tags.get('name') or tags.get('url') or ''), tags.get('status'))
+            h = self.por_tag.get(chave)
+            if h is None:
+                h = self.por_tag[chave] = HistogramaLog()
+            h.adicionar(valor)
+
+    def processar_arquivo(self, caminho: str):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                self.linhas += 1
+                # Só decodifica linhas de definição de métrica e de ponto
+                if '"Point"' not in linha and '"Metric"' not in linha:
+                    continue
+                try:
+                    obj = json.loads(linha)
+                except ValueError:
+                    continue
+                self.processar(obj)
+        return self
+
+    def serie_temporal(self) -> list:
+        serie = []
+        for t in sorted(self.segundos):
+            s = self.segundos[t]
+            lat = s['latencia']
+            serie.append({
+                't': t,
+                'rps': s['requisicoes'],
+                'erros': s['erros'],
+                'vus': s['vus'],
+                'iteracoes': s['iteracoes'],
+                'descartadas': s['descartadas'],
+                'p50': lat.percentil(50),
+                'p95': lat.percentil(95),
+                'p99': lat.percentil(99),
+            })
+        return serie
+
+    def _agregar_segundos(self, inicio: float, fim: float) -> dict:
+        # Segundos t com inicio <= t < fim (o primeiro segundo entra mesmo que a fase comece no meio dele)
+        latencia = HistogramaLog()
+        requisicoes = erros = iteracoes = descartadas = 0
+        vus_max = None
+        for t in range(int(inicio), max(int(math.ceil(fim)), int(inicio) + 1)):
+            s = self.segundos.get(t)
+            if s is None:
+                continue
+            requisicoes += s['requisicoes']
+            erros += s['erros']
+            iteracoes += s['iteracoes']
+            descartadas += s['descartadas']
+            latencia.mesclar(s['latencia'])
+            if s['vus'] is not None and (vus_max is None or s['vus'] > vus_max):
+                vus_max = s['vus']
+        return dict(_resumo_fase(inicio, fim, requisicoes, erros, latencia, vus_max), iteracoes=iteracoes,
+                    iteracoes_descartadas=descartadas,
+                    taxa_descarte=descartadas / (iteracoes + descartadas) if iteracoes + descartadas else None)
+
+    def fases_k6(self) -> dict:
+        """
+        Delimita as fases da execução pelos próprios instantes do K6 e agrega latência, RPS e erros de cada uma:
+        setup_k6 e teardown_k6 (requisições dos grupos ::setup e ::teardown), aquecimento (do início da carga até
+        o platô de VUs), estavel (platô) e desaceleracao (do fim do platô até a última iteração).
+        Retorna {fase: {'inicio', 'fim' (epoch), 'duracao_segundos', 'requisicoes', 'rps', 'erros', 'taxa_erros',
+        'vus_max', 'latencia'}} e, em 'criterio_estavel', 'plato' ou 'fracao' (rampa sem platô). As fases da carga
+        trazem também 'iteracoes', 'iteracoes_descartadas' e 'taxa_descarte' (descartadas / oferecidas).
+        """
+        fases = {}
+        for fase, c in self.ciclo.items():
+            fases[fase] = _resumo_fase(c['inicio'], c['fim'], c['requisicoes'], c['erros'], c['latencia'], None)
+        if self.carga_inicio is None:
+            return fases
+        inicio, fim = self.carga_inicio, self.carga_fim
+        vus = {t: s['vus'] for t, s in self.segundos.items() if s['vus'] and inicio - 1 <= t <= fim}
+        plato = [t for t, v in vus.items() if v >= max(vus.values()) * (1 - TOLERANCIA_VUS)] if vus else []
+        inicio_estavel = max(min(plato), math.ceil(inicio + AQUECIMENTO_MIN_SEGUNDOS)) if plato else inicio
+        fim_estavel = min(max(plato) + 1, fim) if plato else fim
+        criterio = 'plato'
+        if fim_estavel - inicio_estavel < MIN_ESTAVEL_SEGUNDOS:
+            # Em segundo inteiro, para que nenhum segundo da série entre em duas fases
+            inicio_estavel = math.ceil(inicio + FRACAO_AQUECIMENTO * (fim - inicio))
+            fim_estavel = fim if fim_estavel - inicio_estavel < MIN_ESTAVEL_SEGUNDOS else fim_estavel
+            criterio = 'fracao'
+        fases['carga'] = self._agregar_segundos(inicio, fim)
+        if inicio_estavel > inicio:
+            fases['aquecimento'] = self._agregar_segundos(inicio, inicio_estavel)
+        fases['estavel'] = self._agregar_segundos(inicio_estavel, fim_estavel)
+        if fim > fim_estavel:
+            fases['desaceleracao'] = self._agregar_segundos(fim_estavel, fim)
+        fases['criterio_estavel'] = criterio
+        return fases
+
+    def resumo(self) -> dict:
+        metricas = {}
+        for nome, h in self.trends.items():
+            metricas[nome] = dict(tipo='trend', **h.resumo())
+        for nome, v in self.valores.items():
+            tipo = self.tipos.get(nome)
+            item = {'tipo': tipo, 'contagem': v['contagem']}
+            if tipo == 'rate':
+                item['taxa'] = v['soma'] / v['contagem'] if v['contagem'] else None
+            elif tipo == 'gauge':
+                item['ultimo'] = v['ultimo']
+                item['max'] = v['max']
+            else:
+                item['soma'] = v['soma']
+            metricas[nome] = item
+        por_tag = []
+        for (method, url, status), h in sorted(self.por_tag.items(), key=lambda kv: -kv[1].contagem):
+            r = h.resumo()
+            por_tag.append({
+                'method': method, 'url': url, 'status': status,
+                'contagem': r['contagem'], 'media': r['media'], 'p95': r['p95'], 'p99': r['p99'],
+            })
+        return {
+            'linhas': self.linhas,
+            'metricas': metricas,
+            'serie_temporal': self.serie_temporal(),
+            'por_tag': por_tag,
+            'fases': self.fases_k6(),
+        }
+
+
+def _resumo_fase(inicio, fim, requisicoes, erros, latencia, vus_max) -> dict:
+    duracao = fim - inicio
+    return {
+        'inicio': inicio, 'fim': fim, 'duracao_segundos': duracao,
+        'requisicoes': requisicoes, 'rps': requisicoes / duracao if duracao > 0 else None,
+        'erros': erros, 'taxa_erros': erros / requisicoes if requisicoes else None,
+        'vus_max': vus_max, 'latencia': latencia.resumo(),
+    }
+
+
+def agregar_serie_por_fases(serie, fases: dict, atraso: float = 0) -> dict:
+    """
+    Média, máximo e p95 de uma série [[epoch, valor], ...] (Prometheus, SSH) dentro de cada fase de fases_k6.
+    atraso: amostras com t - atraso < inicio da fase ficam de fora (ex.: a janela do rate() da CPU, que no
+    começo da fase ainda cobre a anterior). Fases sem amostras ficam de fora.
+    """
+    agregados = {}
+    for fase, limites in fases.items():
+        if not isinstance(limites, dict) or limites.get('inicio') is None:
+            continue
+        valores = sorted(v for t, v in serie if v is not None and limites['inicio'] <= t - atraso and t <= limites['fim'])
+        if not valores:
+            continue
+        agregados[fase] = {
+            'media': sum(valores) / len(valores), 'max': valores[-1],
+            'p95': valores[max(0, math.ceil(0.95 * len(valores)) - 1)], 'amostras': len(valores),
+        }
+    return agregados
+
+
+class MonitorK6:
+    """
+    Acompanha ao vivo a saída NDJSON de um K6 em execução (lendo o arquivo à medida que ele cresce)
+    e mantém, numa janela móvel de `janela` segundos, p50/p95/p99 da latência, RPS, taxa de erros e iterações
+    descartadas por segundo (executores de taxa de chegada sem VUs livres).
+    A cada `intervalo` segundos chama criterio_aborto(estado); se ele retornar um motivo (texto),
+    o K6 é interrompido como num Ctrl+C (o summary ainda é exportado) e o motivo fica em motivo_aborto.
+    """
+    def __init__(self, janela=30, criterio_aborto=None, intervalo=1.0):
+        self.janela = janela
+        self.criterio_aborto = criterio_aborto
+        self.intervalo = intervalo
+        self.abortado = False
+        self.motivo_aborto = None
+        self.requisicoes = 0
+        self.erros = 0
+        self.descartadas = 0
+        self._primeiro = None
+        self._ultimo = None
+        self._duracoes = deque()
+        self._reqs = deque()
+        self._falhas = deque()
+        self._descartes = deque()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _processar_linha(self, linha: str):
+        if '"Point"' not in linha:
+            return
+        if ('"http_req_duration"' not in linha and '"http_req_failed"' not in linha and '"http_reqs"' not in linha
+                and '"dropped_iterations"' not in linha):
+            return
+        try:
+            obj = json.loads(linha)
+        except ValueError:
+            return
+        nome = obj.get('metric')
+        data = obj.get('data') or {}
+        t = instante_epoch(data['time'])
+        valor = data.get('value', 0)
+        with self._lock:
+            if self._primeiro is None:
+                self._primeiro = t
+            self._ultimo = t if self._ultimo is None else max(self._ultimo, t)
+            if nome == 'http_req_duration':
+                self._duracoes.append((t, valor))
+            elif nome == 'http_reqs':
+                self.requisicoes += 1
+                self._reqs.append(t)
+            elif nome == 'http_req_failed':
+                if valor:
+                    self.erros += 1
+                self._falhas.append((t, 1 if valor else 0))
+            elif nome == 'dropped_iterations':
+                self.descartadas += valor
+                self._descartes.append((t, valor))
+            corte = self._ultimo - self.janela
+            while self._duracoes and self._duracoes[0][0] < corte:
+                self._duracoes.popleft()
+            while self._reqs and self._reqs[0] < corte:
+                self._reqs.popleft()
+            while self._falhas and self._falhas[0][0] < corte:
+                self._falhas.popleft()
+            while self._descartes and self._descartes[0][0] < corte:
+                self._descartes.popleft()
+
+    def estado(self) -> dict:
+        """
+        Retorna os indicadores da janela móvel atual (e os totais desde o início).
+        """
+        with self._lock:
+            duracoes = sorted(d for _, d in self._duracoes)
+            n_reqs = len(self._reqs)
+            falhas = [f for _, f in self._falhas]
+            descartes_janela = sum(v for _, v in self._descartes)
+            decorrido = (self._ultimo - self._primeiro) if self._primeiro is not None else 0.0
+            requisicoes, erros, descartadas = self.requisicoes, self.erros, self.descartadas
+
+        def pct(p):
+            if not duracoes:
+                return None
+            return duracoes[min(len(duracoes) - 1, max(0, math.ceil(len(duracoes) * p / 100.0) - 1))]
+        janela_efetiva = min(self.janela, decorrido) or 1.0
+        return {
+            'decorrido_segundos': decorrido,
+            'requisicoes_total': requisicoes,
+            'erros_total': erros,
+            'p50': pct(50),
+            'p95': pct(95),
+            'p99': pct(99),
+            'rps': n_reqs / janela_efetiva,
+            'taxa_erros': (sum(falhas) / len(falhas)) if falhas else None,
+            'descartadas_total': descartadas,
+            'descartadas_por_segundo': descartes_janela / janela_efetiva,
+        }
+
+    def _interromper(self, proc, motivo):
+        self.abortado = True
+        self.motivo_aborto = motivo
+        print(f"[K6] Abortando execução: {motivo}")
+        try:
+            if os.name == 'nt':
+                proc.terminate()
+            else:
+                proc.send_signal(signal.SIGINT)
+        except Exception:
+            pass
+
+    def _seguir(self, caminho, proc):
+        while not os.path.exists(caminho):
+            if proc.poll() is not None:
+                return
+            time.sleep(0.2)
+        proxima_avaliacao = time.monotonic() + self.intervalo
+        with open(caminho, 'r', encoding='utf-8') as f:
+            resto = ''
+            while True:
+                bloco = f.read(1 << 20)
+                if bloco:
+                    linhas = (resto + bloco).split('\n')
+                    resto = linhas.pop()
+                    for linha in linhas:
+                        self._processar_linha(linha)
+                elif proc.poll() is not None:
+                    break
+                else:
+                    time.sleep(0.2)
+                if time.monotonic() >= proxima_avaliacao:
+                    proxima_avaliacao = time.monotonic() + self.intervalo
+                    if self.criterio_aborto and not self.abortado and proc.poll() is None:
+                        motivo = self.criterio_aborto(self.estado())
+                        if motivo:
+                            self._interromper(proc, motivo)
+            if resto:
+                self._processar_linha(resto)
+
+    def acompanhar(self, caminho: str, proc):
+        """
+        Começa a seguir o arquivo `caminho` escrito pelo processo K6 `proc` (subprocess.Popen).
+        """
+        self._thread = threading.Thread(target=self._seguir, args=(caminho, proc), daemon=True)
+        self._thread.start()
+
+    def aguardar(self):
+        if self._thread is not None:
+            self._thread.join()
+
+
+def criterio_limites_estourados(limite_falha=None, limite_p95=None, fator=3.0, minimo_segundos=20, minimo_requisicoes=200):
+    """
+    Cria um criterio_aborto para o MonitorK6 que só aborta quando os limites estão claramente estourados:
+    taxa de erros ou p95 da janela acima de `fator` vezes o limite, depois de um mínimo de tempo e de requisições.
+    """
+    def criterio(estado):
+        if estado['decorrido_segundos'] < minimo_segundos or estado['requisicoes_total'] < minimo_requisicoes:
+            return None
+        taxa = estado.get('taxa_erros')
+        if limite_falha is not None and taxa is not None and taxa > limite_falha * fator:
+            return f"taxa de erros {taxa:.3f} > {fator}x limite {limite_falha}"
+        p95 = estado.get('p95')
+        if limite_p95 is not None and p95 is not None and p95 > limite_p95 * fator:
+            return f"p95 {p95:.1f}ms > {fator}x limite {limite_p95}ms"
+        return None
+    return criterio
+
+
+def caminho_resumo(output_path: str) -> str:
+    """
+    resultados/<nome>.json -> resultados/<nome>_resumo.json (ao lado do <nome>_metrics.json).
+    """
+    base, _ = os.path.splitext(output_path)
+    return f"{base}_resumo.json"
+
+
+def resumir_resultado_k6(output_path: str, resumo_path: str = None) -> dict:
+    """
+    Lê o NDJSON do K6 em streaming, grava o resumo compacto e o retorna.
+    """
+    resumo = AgregadorK6().processar_arquivo(output_path).resumo()
+    resumo['arquivo'] = output_path
+    with open(resumo_path or caminho_resumo(output_path), 'w') as f:
+        json.dump(resumo, f, indent=4, ensure_ascii=False)
+    return resumo
+
+
+def eh_saida_k6(caminho: str) -> bool:
+    """
+    Indica se o arquivo é a saída NDJSON do K6 (e não um _metrics.json ou outro derivado).
+    """
+    nome = os.path.basename(caminho)
+    return nome.endswith('.json') and not nome.endswith(('_metrics.json', '_resumo.json'))
+
+
+if __name__ == "__main__":
+    # Como executar no terminal:
+    # python k6_stream.py resultados/1.get_users_50vus-node-postgres-1_1024.json
+    for caminho in sys.argv[1:]:
+        if not eh_saida_k6(caminho):
+            continue
+        r = resumir_resultado_k6(caminho)
+        dur = r['metricas'].get('http_req_duration', {})
+        print(f"[K6] {caminho}: {r['linhas']} linhas | p95={dur.get('p95')} | resumo em {caminho_resumo(caminho)}")
@@ -1,12 +1,22 @@
-from playwright.sync_api import sync_playwright
 import subprocess
 import json
 import time
 import os
 import argparse
-from datetime import datetime, timezone, timedelta
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timezone, timedelta
 import requests
 
+from k6_stream import resumir_resultado_k6
+from cenarios_k6 import eh_cenario, carregar_cenario, ambiente_cenario, SCRIPT_CENARIO, LIMITE_DESCARTE
+from teste_sequencial import extrair_valores_k6
+from prometheus import obter_cliente
+from registro_execucao import RegistroExecucao
+from provisionadores import criar_provisionador
+
 TZ = timezone(timedelta(hours=-3))  # UTC-3
 
 def carregar_cenarios(path: str) -> list:
@@ -16,95 +26,85 @@ def carregar_cenarios(path: str) -> list:
     with open(path, 'r') as f:
         return json.load(f)
 
-def iniciar_navegador(playwright):
-    """
-    Inicia o navegador com Playwright e retorna o browser.
-    """
-    browser = playwright.chromium.launch(headless=True)
-    return browser
-
-def acessar_aplicacao(page, url: str):
-    """
-    Abre a aplicação React na URL fornecida.
-    """
-    page.goto(url)
-
-def criar_container(page, config: dict):
-    """
-    Preenche os campos de criação de container com base na configuração.
-    Aguarda o botão aparecer antes de clicar.
-    Seletores ajustados conforme o HTML do modal fornecido.
-    """
-    # Botão para abrir modal de criação
-    BOTAO_CRIAR = 'button.btn.btn-primary[data-bs-target="#staticBackdrop"]'  # Botão "Add Container"
-    page.wait_for_selector(BOTAO_CRIAR, timeout=60000)
-    page.click(BOTAO_CRIAR)
-    # Aguarda o modal abrir
-    page.wait_for_selector('#staticBackdrop.show', timeout=10000)
-    # Seleciona a stack (Options)
-    page.select_option('#config-selection', config["backend"])  # Ex: node-postgres
-    # Backend CPU e RAM
-    page.fill('input.value-viewer[data-for="backend-cpu"]', str(float(config.get("backend_cpu", 0.5))))
-    page.fill('input.value-viewer[data-for="backend-ram"]', str(int(config.get("backend_ram", 512))))
-    # Abrir o accordion do Database antes de preencher
-    db_accordion_btn = 'button.accordion-button[aria-controls="collapseTwo"]'
-    page.click(db_accordion_btn)
-    page.wait_for_selector('input.value-viewer[data-for="database-cpu"]', state='visible', timeout=5000)
-    # Database CPU e RAM
-    page.fill('input.value-viewer[data-for="database-cpu"]', str(float(config.get("db_cpu", 0.5))))
-    page.fill('input.value-viewer[data-for="database-ram"]', str(int(config.get("db_ram", 512))))
-    # Clica no botão Build
-    page.click('#request-btn')
-
-def aguardar_container_ativo(page) -> None:
+def aguardar_backend_pronto(base_url: str, caminho: str = '/users', timeout: float = 120, intervalo: float = 0.25):
     """
-    Aguarda até que a interface indique que o container está pronto para testes.
-    Agora espera pelo texto 'Container build successfully!' e clica em 'Ok'.
+    Sonda ativamente o backend em base_url até ele responder (qualquer status < 500).
+    Retorna o tempo de espera em segundos ou lança TimeoutError.
     """
-    for _ in range(120):  # até 4 minutos
-        try:
-            if page.query_selector('text=Container build successfully!'):
-                page.click('text=Ok')
-                return
-        except Exception:
-            pass
-        page.wait_for_timeout(2000)
-    raise TimeoutError('Mensagem de sucesso do container não detectada. Ajuste o seletor se necessário.')
+    url = base_url.rstrip('/') + caminho
+    t0 = time.monotonic()
+    ultimo_erro = None
+    with requests.Session() as session:
+        while time.monotonic() - t0 < timeout:
+            try:
+                resp = session.get(url, timeout=2)
+                if resp.status_code < 500:
+                    return time.monotonic() - t0
+                ultimo_erro = f"status {resp.status_code}"
+            except requests.RequestException as e:
+                ultimo_erro = str(e)
+            time.sleep(intervalo)
+    raise TimeoutError(f'Backend em {url} não respondeu em {timeout}s ({ultimo_erro}).')
 
-def executar_k6(script_path: str, output_path: str, base_url: str = None, metrics_path: str = None):
+def executar_k6(script_path: str, output_path: str, base_url: str = None, registro=None, gerar_resumo: bool = True,
+                monitor=None, env: dict = None, carga: dict = None):
     """
     Executa o teste de carga com K6 e salva o resultado em output_path.
-    Se base_url for fornecido, passa como variável de ambiente para o K6.
-    Também salva as métricas finais em metrics_path, se fornecido.
-    Sempre salva o summary do K6, o exit code e se os thresholds foram atingidos.
+    Se base_url for fornecido, passa como variável de ambiente para o K6, assim como cada item de env.
+    Se script_path for um cenário JSON (cenarios_k6.py), roda o script genérico com o cenário em --env CENARIO
+    e guarda o cenário completo em 'cenario_k6' no registro; carga substitui campos do cenário
+    (ex.: {'executor': 'taxa_constante', 'taxa': 200, 'pre_vus': 100}).
+    O summary do K6 (--summary-export) é lido de um arquivo temporário e devolvido em 'summary', junto com
+    o exit code e se os thresholds foram atingidos; se registro (RegistroExecucao) for fornecido, é guardado nele.
+    Se gerar_resumo, lê a saída do K6 em streaming e grava <nome>_resumo.json (histogramas, série por segundo e por tag);
+    as fases da carga (setup, aquecimento, estável, desaceleração, teardown) delimitadas por ela vão em 'fases'.
+    Se monitor (k6_stream.MonitorK6) for fornecido, acompanha a saída ao vivo enquanto o K6 roda e pode abortá-lo cedo.
+    Retorna um dicionário com summary, exit code, thresholds e, com monitor, o estado final e o motivo do aborto.
     """
     import tempfile
-    import json as pyjson
-    import shutil
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if carga and not eh_cenario(script_path):
+        raise ValueError(f"'carga' só se aplica a cenários JSON, não a {script_path}")
+    if eh_cenario(script_path):
+        cenario_k6 = carregar_cenario(script_path, **(carga or {}))
+        env = dict(ambiente_cenario(cenario_k6), **(env or {}))
+        script_path = SCRIPT_CENARIO
+        if registro is not None:
+            registro.adicionar('cenario_k6', cenario_k6)
     cmd = [
         "k6", "run", f"--out", f"json={output_path}", script_path
     ]
     if base_url:
         cmd += ["--env", f"BASE_URL={base_url}"]
+    for chave, valor in (env or {}).items():
+        cmd += ["--env", f"{chave}={valor}"]
     summary_data = None
-    exit_code = None
     thresholds_ok = None
-    if metrics_path:
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            cmd += ["--summary-export", tmp.name]
-            proc = subprocess.run(cmd, check=False)
-            exit_code = proc.returncode
-            # Copia o summary para o destino final
-            try:
-                with open(tmp.name, 'r') as f:
-                    summary_data = pyjson.load(f)
-                shutil.copy(tmp.name, metrics_path)
-            except Exception:
-                summary_data = None
-    else:
-        proc = subprocess.run(cmd, check=False)
-        exit_code = proc.returncode
+    def rodar():
+        if monitor is None:
+            return subprocess.run(cmd, check=False).returncode
+        # Evita que o monitor leia a saída de uma execução anterior antes do K6 truncar o arquivo
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        proc = subprocess.Popen(cmd)
+        monitor.acompanhar(output_path, proc)
+        codigo = proc.wait()
+        monitor.aguardar()
+        return codigo
+    fd, summary_tmp = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        cmd += ["--summary-export", summary_tmp]
+        inicio_k6 = time.time()
+        exit_code = rodar()
+        fim_k6 = time.time()
+        try:
+            with open(summary_tmp, 'r') as f:
+                summary_data = json.load(f)
+        except Exception:
+            summary_data = None
+    finally:
+        os.remove(summary_tmp)
     # Analisa thresholds
     if summary_data and 'metrics' in summary_data:
         thresholds_ok = True
@@ -114,120 +114,24 @@ def executar_k6(script_path: str, output_path: str, base_url: str = None, metric
                     if not t.get('ok', True):
                         thresholds_ok = False
                         break
-    # Salva info extra no metrics_path
-    if metrics_path:
+    resultado = {'summary': summary_data, 'exit_code': exit_code, 'thresholds_ok': thresholds_ok}
+    descarte = extrair_valores_k6({'k6_summary': summary_data})
+    if descarte['iteracoes_descartadas']:
+        # Com taxa de chegada, iterações descartadas significam que a carga oferecida não foi mantida
+        print(f"[K6] {int(descarte['iteracoes_descartadas'])} iteração(ões) descartada(s) "
+              f"({descarte['taxa_descarte']:.1%} da carga oferecida)"
+              + (": aumente pre_vus/max_vus ou reduza a taxa" if descarte['taxa_descarte'] > LIMITE_DESCARTE else ""))
+    if gerar_resumo and os.path.exists(output_path):
         try:
-            with open(metrics_path, 'r+') as f:
-                try:
-                    metrics_json = pyjson.load(f)
-                except Exception:
-                    metrics_json = {}
-                metrics_json['k6_exit_code'] = exit_code
-                metrics_json['k6_thresholds_ok'] = thresholds_ok
-                if summary_data:
-                    metrics_json['metrics'] = summary_data.get('metrics', summary_data)
-                f.seek(0)
-                pyjson.dump(metrics_json, f, indent=4, ensure_ascii=False)
-                f.truncate()
-        except Exception:
-            pass
-
-def excluir_container(page):
-    """
-    Realiza a exclusão do container pela interface.
-    Aguarda o botão 'Remove' aparecer, clica nele e espera 3 segundos para garantir remoção.
-    """
-    BOTAO_REMOVE = 'a:has-text("Remove")'
-    try:
-        page.wait_for_selector(BOTAO_REMOVE, timeout=60000)
-        page.click(BOTAO_REMOVE)
-        page.wait_for_timeout(3000)  # Aguarda 3 segundos para o popup sumir e o container ser removido
-    except Exception:
-        print('Botão Remove não encontrado. Ajuste o seletor se necessário.')
-
-def extrair_url_container(page):
-    """
-    Após o container ser criado, extrai o href do botão/link 'Run' correspondente ao container recém-criado.
-    Se o href for '#', aguarda até que seja atualizado para a URL real do container.
-    Retorna a URL encontrada ou lança erro se não encontrar.
-    """
-    page.wait_for_selector('a:has-text("Run"), button:has-text("Run")', timeout=90000)
-    tentativas = 90  # até 2 minutos
-    for _ in range(tentativas):
-        run_links = page.query_selector_all('a:has-text("Run")')
-        if run_links:
-            href = run_links[0].get_attribute('href')
-            if href and href != "#":
-                return href
-        # Caso seja botão, pode ser necessário extrair de outro atributo
-        run_btns = page.query_selector_all('button:has-text("Run")')
-        if run_btns:
-            href = run_btns[0].get_attribute('data-href')
-            if href and href != "#":
-                return href
-        page.wait_for_timeout(5000)
-    raise Exception('Nenhum link ou botão Run válido encontrado para extrair URL do container.')
-
-def extrair_url_container_debug(page):
-    print('[DEBUG] Iniciando extração da URL do container (Run)')
-    tentativas = 60  # até 2 minutos
-    for i in range(tentativas):
-        print(f'[DEBUG] Tentativa {i+1}/{tentativas}')
-        run_links = page.query_selector_all('a:has-text("Run")')
-        if run_links:
-            for idx, link in enumerate(run_links):
-                href = link.get_attribute('href')
-                print(f'[DEBUG] Link {idx}: href={href}')
-                if href and href != "#":
-                    print(f'[DEBUG] Encontrado href válido: {href}')
-                    return href
-        run_btns = page.query_selector_all('button:has-text("Run")')
-        if run_btns:
-            for idx, btn in enumerate(run_btns):
-                href = btn.get_attribute('data-href')
-                print(f'[DEBUG] Botão {idx}: data-href={href}')
-                if href and href != "#":
-                    print(f'[DEBUG] Encontrado data-href válido: {href}')
-                    return href
-        if (i+1) % 5 == 0:
-            print('[DEBUG] Dando reload na página para tentar atualizar o estado do Run')
-            page.reload()
-        page.wait_for_timeout(5000)
-    raise Exception('Nenhum link ou botão Run válido encontrado para extrair URL do container.')
-
-def extrair_info_container(page):
-    """
-    Extrai informações do container criado na interface:
-    - id (h5.card-title)
-    - stack (div.card-header)
-    - backend_cpu, backend_ram, db_cpu, db_ram (parágrafos na card-body)
-    Retorna um dicionário com esses dados.
-    """
-    info = {}
-    # Extrai o id do container
-    id_elem = page.query_selector('h5.card-title')
-    info['id'] = id_elem.inner_text().strip() if id_elem else None
-    # Extrai a stack
-    stack_elem = page.query_selector('div.card-header')
-    info['stack'] = stack_elem.inner_text().strip() if stack_elem else None
-    # Extrai CPU/RAM Backend e Database
-    backend_div = page.query_selector('div.card-body .d-flex .bg-primary-subtle:nth-child(1)')
-    db_div = page.query_selector('div.card-body .d-flex .bg-primary-subtle:nth-child(2)')
-    if backend_div:
-        backend_texts = backend_div.inner_text().split('\n')
-        for t in backend_texts:
-            if 'Cpus:' in t:
-                info['backend_cpu'] = t.split(':',1)[1].strip()
-            if 'Memória Ram:' in t:
-                info['backend_ram'] = t.split(':',1)[1].strip()
-    if db_div:
-        db_texts = db_div.inner_text().split('\n')
-        for t in db_texts:
-            if 'Cpus:' in t:
-                info['db_cpu'] = t.split(':',1)[1].strip()
-            if 'Memória Ram:' in t:
-                info['db_ram'] = t.split(':',1)[1].strip()
-    return info
+            resultado['fases'] = resumir_resultado_k6(output_path)['fases']
+        except Exception as e:
+            print(f"[K6] Falha ao gerar resumo de {output_path}: {e}")
+    if monitor is not None:
+        resultado.update(abortado=monitor.abortado, motivo_aborto=monitor.motivo_aborto, estado_final=monitor.estado())
+    if registro is not None:
+        registro.marcar('k6', inicio_k6, fim_k6)
+        registro.registrar_k6(resultado)
+    return resultado
 
 def comparar_info_container(container_info, cenario):
     """
@@ -253,122 +157,315 @@ def comparar_info_container(container_info, cenario):
     if erros:
         raise Exception('Incompatibilidade entre cenário e container extraído: ' + '; '.join(erros))
 
-def excluir_container_ate_sucesso(page):
+def executar_fluxo_de_teste(cenario: dict, provisionador, app_url=None, pos_processamento=None):
     """
-    Tenta excluir o container até ter certeza que foi removido.
-    Só retorna quando o botão Remove não estiver mais disponível.
+    Executa todas as etapas para um cenário de teste.
+    O container é criado e removido pelo provisionador (interface via Playwright ou API do orquestrador).
+    Usa a URL do container criado como BASE_URL no K6.
+    Valida se as informações extraídas batem com o cenário.
+    Summary do K6, container, início, fim, duração e métricas do Prometheus vão para um RegistroExecucao,
+    gravado uma única vez no metrics.json.
+    Se pos_processamento (PosProcessamento) for fornecido, Prometheus, metrics.json e remoção do container
+    ficam em segundo plano e a função retorna logo após o K6.
+    Se algo falhar depois da criação do container, ele é removido e o metrics.json é gravado com o erro
+    antes de a exceção propagar.
     """
-    BOTAO_REMOVE = 'a:has-text("Remove")'
-    tentativas = 0
-    while True:
+    registro = RegistroExecucao(cenario, tz=TZ)
+    t_provisionamento = time.time()
+    provisionado = provisionador.criar(cenario)
+    registro.marcar('provisionamento', t_provisionamento)
+    registro.registrar_provisionamento(provisionado)
+    tempos_fases = registro.tempos_fases
+    # Daqui em diante o container existe: qualquer falha remove o container e grava o registro com o erro
+    # antes de propagar (no modo paralelo, só então os recursos voltam ao orçamento do host)
+    concluido = False
+    try:
+        if pos_processamento is not None:
+            # O pós-processamento do cenário anterior termina antes da janela de medição deste começar
+            t0 = time.monotonic()
+            pos_processamento.aguardar()
+            tempos_fases['espera_pos_processamento_segundos'] = time.monotonic() - t0
+        # URL do container para usar no teste e informações do container
+        base_url = provisionado['base_url']
+        container_info = provisionado['container_info']
+        # Valida compatibilidade
+        comparar_info_container(container_info, cenario)
+        # Só inicia o K6 quando o backend de fato responde
+        t_health = time.time()
+        tempos_fases['health_segundos'] = aguardar_backend_pronto(base_url)
+        registro.marcar('health', t_health)
+        script_path = cenario['k6_script']
+        output_path = f"resultados/{cenario['nome']}.json"
+        # A janela de medição (inicio/fim) é só a do K6, sem build nem health check
+        registro.iniciar()
+        t0 = time.monotonic()
+        executar_k6(script_path, output_path, base_url=base_url, registro=registro, carga=cenario.get('carga'))
+        tempos_fases['k6_segundos'] = time.monotonic() - t0
+        registro.finalizar()
+        concluido = True
+    except Exception as e:
+        registro.erro = str(e)
+        raise
+    finally:
+        if not concluido:
+            try:
+                finalizar_execucao(registro, provisionador)
+            except Exception as e:
+                # A falha da remoção não esconde o erro original do cenário
+                print(f"[TESTE] Falha ao remover o container do cenário {cenario['nome']}: {e}")
+    if pos_processamento is not None:
+        pos_processamento.enviar(registro)
+    else:
         try:
-            page.wait_for_selector(BOTAO_REMOVE, timeout=5000)
-            page.click(BOTAO_REMOVE)
-            page.wait_for_timeout(3000)
-            tentativas += 1
-        except Exception:
-            # Se não encontrar mais o botão, consideramos removido
-            break
-        # Pequena pausa para garantir atualização da interface
-        page.wait_for_timeout(1000)
-        # Se já tentou muitas vezes, pode ser um erro
-        if tentativas > 20:
-            raise Exception('Não foi possível remover o container após várias tentativas.')
+            coletar_metricas_execucao(registro)
+        finally:
+            finalizar_execucao(registro, provisionador)
 
-def executar_fluxo_de_teste(cenario: dict, page, app_url=None):
+def coletar_metricas_execucao(registro):
     """
-    Executa todas as etapas para um cenário de teste.
-    Agora extrai a URL do container criado e usa como BASE_URL no K6.
-    Também salva informações do container no metrics.json.
-    Valida se as informações extraídas batem com o cenário.
-    Salva início, fim e duração do teste no metrics.json.
+    Consulta o Prometheus e acrescenta as métricas do container ao registro.
+    O container ainda precisa existir (o último scrape precisa cobrir o fim do teste).
     """
-    criar_container(page, cenario)
-    aguardar_container_ativo(page)
-    inicio = datetime.now(TZ)
-    # Extrai a URL do container para usar no teste
-    base_url = extrair_url_container(page)
-    # Extrai informações do container
-    container_info = extrair_info_container(page)
-    # Valida compatibilidade
-    comparar_info_container(container_info, cenario)
-    script_path = cenario['k6_script']
-    output_path = f"resultados/{cenario['nome']}.json"
-    metrics_path = f"resultados/{cenario['nome']}_metrics.json"
-    executar_k6(script_path, output_path, base_url=base_url, metrics_path=metrics_path)
-    fim = datetime.now(TZ)
-    duracao = (fim - inicio).total_seconds()
-    # Adiciona as informações do container e do teste ao metrics.json
-    try:
-        with open(metrics_path, 'r') as f:
-            metrics_data = json.load(f)
-    except Exception:
-        metrics_data = {}
-    metrics_data['container_info'] = container_info
-    metrics_data['inicio_teste'] = inicio.isoformat()
-    metrics_data['fim_teste'] = fim.isoformat()
-    metrics_data['duracao_segundos'] = duracao
-    metrics_data['cenario'] = cenario
     # --- INTEGRAÇÃO PROMETHEUS ANTES DE EXCLUIR O CONTAINER ---
-    time.sleep(5)  # Aguarda para garantir que o Prometheus colete as métricas
+    t0 = time.monotonic()
     config = carregar_config()
     prom_url = config.get('prometheus_url')
-    container_id = container_info.get('id')
+    container_id = (registro.container_info or {}).get('id')
     if prom_url and container_id:
-        prom_metrics = consultar_media_prometheus(prom_url, container_id, inicio, fim)
-        metrics_data['prometheus_metrics'] = prom_metrics
+        prom_metrics = consultar_media_prometheus(prom_url, container_id, registro.inicio, registro.fim,
+                                                  espera_max=config.get('prometheus_espera_max', 60),
+                                                  fases=registro.fases)
+        registro.adicionar('prometheus_metrics', prom_metrics)
+    registro.tempos_fases['prometheus_segundos'] = time.monotonic() - t0
     # --- FIM INTEGRAÇÃO PROMETHEUS ---
-    with open(metrics_path, 'w') as f:
-        json.dump(metrics_data, f, indent=4, ensure_ascii=False)
-    excluir_container_ate_sucesso(page)
+
+def finalizar_execucao(registro, provisionador):
+    """
+    Remove o container e grava o metrics.json (com tempos_fases), mesmo se a remoção falhar.
+    """
+    t0 = time.monotonic()
+    t_remocao = time.time()
+    try:
+        provisionador.excluir(registro.container_info)
+    finally:
+        registro.tempos_fases['teardown_segundos'] = time.monotonic() - t0
+        registro.marcar('remocao', t_remocao)
+        registro.gravar()
+
+class PosProcessamento:
+    """
+    Pipeline do modo sequencial: o pós-processamento de um cenário (Prometheus, metrics.json e remoção do container)
+    roda numa thread em segundo plano enquanto o próximo cenário é provisionado.
+    aguardar() é chamado antes da janela de medição do próximo cenário, então a carga da remoção
+    nunca se sobrepõe a um K6. Com provisionadores que não são thread_safe (Playwright), só a coleta de
+    métricas vai para segundo plano; a remoção é feita por aguardar(), na thread de quem chamou.
+    Falhas do pós-processamento não interrompem os próximos cenários e ficam em falhas, como (nome, erro).
+    """
+    def __init__(self, provisionador):
+        self.provisionador = provisionador
+        self.falhas = []
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pendente = None
+
+    def _em_segundo_plano(self, registro):
+        try:
+            coletar_metricas_execucao(registro)
+        finally:
+            # Mesmo sem as métricas, remove o container e grava o que o K6 deixou
+            if self.provisionador.thread_safe:
+                finalizar_execucao(registro, self.provisionador)
+
+    def enviar(self, registro):
+        self.aguardar()
+        self._pendente = (registro, self._executor.submit(self._em_segundo_plano, registro))
+
+    def aguardar(self):
+        if self._pendente is None:
+            return
+        registro, futuro = self._pendente
+        self._pendente = None
+        nome = registro.cenario['nome']
+        try:
+            futuro.result()
+        except Exception as e:
+            print(f"[PIPELINE] Falha no pós-processamento do cenário {nome}: {e}")
+            self.falhas.append((nome, str(e)))
+        if self.provisionador.thread_safe:
+            return
+        try:
+            finalizar_execucao(registro, self.provisionador)
+        except Exception as e:
+            print(f"[PIPELINE] Falha ao remover o container do cenário {nome}: {e}")
+            self.falhas.append((nome, str(e)))
+
+    def fechar(self):
+        try:
+            self.aguardar()
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+
+class OrcamentoHost:
+    """
+    Orçamento de CPU/RAM do host Docker compartilhado entre os workers.
+    Um worker só cria seu container quando a soma dos recursos reservados
+    (backend + banco de todos os containers ativos) cabe na capacidade do host.
+    """
+    def __init__(self, cpus: float, ram: int):
+        self.cpus = cpus
+        self.ram = ram
+        self._cpu_em_uso = 0.0
+        self._ram_em_uso = 0
+        self._cond = threading.Condition()
+
+    def cabe(self, cpu: float, ram: int) -> bool:
+        return cpu <= self.cpus + 1e-6 and ram <= self.ram
+
+    @contextmanager
+    def reservar(self, cpu: float, ram: int):
+        if not self.cabe(cpu, ram):
+            raise ValueError(f'Cenário pede CPU={cpu}, RAM={ram} e o host só tem CPU={self.cpus}, RAM={self.ram}.')
+        with self._cond:
+            while (self._cpu_em_uso + cpu > self.cpus + 1e-6) or (self._ram_em_uso + ram > self.ram):
+                self._cond.wait()
+            self._cpu_em_uso += cpu
+            self._ram_em_uso += ram
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._cpu_em_uso -= cpu
+                self._ram_em_uso -= ram
+                self._cond.notify_all()
+
+def recursos_cenario(cenario: dict):
+    """
+    Retorna (cpu, ram) totais que o container do cenário reserva no host (backend + banco).
+    """
+    cpu = float(cenario.get("backend_cpu", 0.5)) + float(cenario.get("db_cpu", 0.5))
+    ram = int(cenario.get("backend_ram", 512)) + int(cenario.get("db_ram", 512))
+    return cpu, ram
+
+def executar_worker(fila, app_url, orcamento, trava_build, falhas, tipo_provisionador='playwright', orquestrador_url=None):
+    """
+    Worker do modo paralelo: abre seu próprio provisionador (navegador/página ou cliente da API)
+    e consome cenários da fila até esvaziá-la, reservando no orçamento do host os recursos de cada container.
+    """
+    nome_worker = threading.current_thread().name
+    with criar_provisionador(tipo_provisionador, app_url, orquestrador_url, trava_build=trava_build) as provisionador:
+        while True:
+            try:
+                cenario = fila.get_nowait()
+            except queue.Empty:
+                break
+            cpu, ram = recursos_cenario(cenario)
+            try:
+                with orcamento.reservar(cpu, ram):
+                    print(f"[{nome_worker}] Iniciando cenário {cenario['nome']} (CPU={cpu}, RAM={ram})")
+                    executar_fluxo_de_teste(cenario, provisionador, app_url=app_url)
+                    print(f"[{nome_worker}] Fim do cenário {cenario['nome']}")
+            except Exception as e:
+                print(f"[{nome_worker}] Falha no cenário {cenario['nome']}: {e}")
+                falhas.append((cenario['nome'], str(e)))
+
+def executar_cenarios_em_paralelo(cenarios, app_url, workers, host_cpus, host_ram,
+                                  tipo_provisionador='playwright', orquestrador_url=None):
+    """
+    Executa os cenários com um pool de workers, cada um com seu próprio provisionador.
+    O número de containers simultâneos é limitado pela capacidade de CPU/RAM do host.
+    Retorna a lista de (nome, erro) dos cenários que falharam.
+    """
+    orcamento = OrcamentoHost(host_cpus, host_ram)
+    for cenario in cenarios:
+        cpu, ram = recursos_cenario(cenario)
+        if not orcamento.cabe(cpu, ram):
+            raise ValueError(f"Cenário {cenario['nome']} pede CPU={cpu}, RAM={ram}, acima da capacidade do host (CPU={host_cpus}, RAM={host_ram}).")
+    fila = queue.Queue()
+    for cenario in cenarios:
+        fila.put(cenario)
+    trava_build = threading.Lock()
+    falhas = []
+    threads = [
+        threading.Thread(target=executar_worker, args=(fila, app_url, orcamento, trava_build, falhas, tipo_provisionador, orquestrador_url),
+                         name=f"worker-{i+1}")
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return falhas
 
 def carregar_config():
     with open('config.json', 'r') as f:
         return json.load(f)
 
-def consultar_media_prometheus(prom_url, container_id, inicio, fim):
-    from datetime import timezone
-    inicio_utc = inicio.astimezone(timezone.utc)
-    fim_utc = fim.astimezone(timezone.utc)
-    intervalo = int((fim_utc - inicio_utc).total_seconds())
-    if intervalo < 1:
-        intervalo = 1
+def consultar_media_prometheus(prom_url, container_id, inicio, fim, espera_max=60, fases=None):
     # Remove traços do ID, se houver
     clean_id = container_id.replace('-', '')
     prom_id = f"/system.slice/docker-{clean_id}.scope"
-    query_mem = f'avg_over_time(container_memory_usage_bytes{{id="{prom_id}"}}[{intervalo}s])'
-    query_cpu = f'avg_over_time(rate(container_cpu_usage_seconds_total{{id="{prom_id}"}}[1m])[{intervalo}s:1m])'
-    params = {
-        'query': query_mem,
-        'time': fim_utc.isoformat().replace('+00:00', 'Z')
-    }
-    mem_resp = requests.get(f"{prom_url}/api/v1/query", params=params).json()
-    params['query'] = query_cpu
-    cpu_resp = requests.get(f"{prom_url}/api/v1/query", params=params).json()
-    mem_val = float(mem_resp['data']['result'][0]['value'][1]) if mem_resp['data']['result'] else None
-    cpu_val = float(cpu_resp['data']['result'][0]['value'][1]) if cpu_resp['data']['result'] else None
-    print(f"[Prometheus] Query id: {prom_id} | Mem: {mem_val} | CPU: {cpu_val}")
-    return {'mem_avg_bytes': mem_val, 'cpu_avg_cores': cpu_val, 'id_used': prom_id}
+    cliente = obter_cliente(prom_url)
+    # Em vez de um sleep fixo, espera só até o Prometheus ter amostras cobrindo o fim do teste
+    espera = cliente.aguardar_dados([prom_id], fim, rotulo='id', teto=espera_max)
+    prom_metrics = cliente.consultar_containers([prom_id], inicio, fim, rotulo='id', fases=fases)[prom_id]
+    return dict(prom_metrics, id_used=prom_id, espera_segundos=espera)
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--cenarios", default="cenarios.json", help="Arquivo JSON de cenários")
     parser.add_argument("--app_url", required=True, help="URL pública da aplicação React")
+    parser.add_argument("--provisionador", choices=["playwright", "api"], default="playwright",
+                        help="Como criar/remover containers: pela interface (playwright) ou direto na API do orquestrador (api)")
+    parser.add_argument("--orquestrador_url", default=None, help="URL da API do orquestrador (provisionador api)")
+    parser.add_argument("--workers", type=int, default=1, help="Quantidade de cenários executados em paralelo")
+    parser.add_argument("--host_cpus", type=float, default=None, help="CPUs do host Docker disponíveis para os containers (modo paralelo)")
+    parser.add_argument("--host_ram", type=int, default=None, help="RAM do host Docker disponível para os containers, em MB (modo paralelo)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Consulta o Prometheus, grava o metrics.json e remove o container em segundo plano enquanto o próximo cenário é provisionado")
     args = parser.parse_args()
 
     cenarios = carregar_cenarios(args.cenarios)
-    from playwright.sync_api import sync_playwright
-    with sync_playwright() as playwright:
-        browser = iniciar_navegador(playwright)
-        context = browser.new_context()
-        page = context.new_page()
-        acessar_aplicacao(page, args.app_url)
+    config = carregar_config()
+    orquestrador_url = args.orquestrador_url or config.get('orquestrador_url')
+    if args.workers > 1:
+        if args.pipeline:
+            parser.error("--pipeline vale só para o modo sequencial (--workers 1)")
+        host_cpus = args.host_cpus if args.host_cpus is not None else config.get('host_cpus')
+        host_ram = args.host_ram if args.host_ram is not None else config.get('host_ram')
+        if host_cpus is None or host_ram is None:
+            parser.error("--workers > 1 exige --host_cpus e --host_ram (ou host_cpus/host_ram no config.json)")
+        falhas = executar_cenarios_em_paralelo(cenarios, args.app_url, args.workers, float(host_cpus), int(host_ram),
+                                               args.provisionador, orquestrador_url)
+        for nome, erro in falhas:
+            print(f"[FALHA] {nome}: {erro}")
+        return
+    if args.pipeline:
+        # Dois containers coexistem (o anterior ainda em pós-processamento): com trava_build o provisionador
+        # Playwright identifica o card novo e remove só o card do próprio container, como no modo paralelo
+        with criar_provisionador(args.provisionador, args.app_url, orquestrador_url, trava_build=threading.Lock()) as provisionador, \
+                PosProcessamento(provisionador) as pos_processamento:
+            for cenario in cenarios:
+                executar_fluxo_de_teste(cenario, provisionador, app_url=args.app_url, pos_processamento=pos_processamento)
+        for nome, erro in pos_processamento.falhas:
+            print(f"[FALHA] {nome}: {erro}")
+        return
+    with criar_provisionador(args.provisionador, args.app_url, orquestrador_url) as provisionador:
         for cenario in cenarios:
-            executar_fluxo_de_teste(cenario, page, app_url=args.app_url)
+            executar_fluxo_de_teste(cenario, provisionador, app_url=args.app_url)
             # time.sleep(5)  # Espera 5 segundos entre os testes
-        browser.close()
 
 if __name__ == "__main__":
     # Como executar no terminal:
     # python main.py --cenarios cenarios.json --app_url http://localhost:3000
+    # Em paralelo (até 3 containers, respeitando a capacidade do host):
+    # python main.py --cenarios cenarios.json --app_url http://localhost:3000 --workers 3 --host_cpus 8 --host_ram 16384
+    # Sem navegador, direto na API do orquestrador:
+    # python main.py --cenarios cenarios.json --app_url http://localhost:3000 --provisionador api --orquestrador_url http://localhost:8080
+    # Remoção e métricas em segundo plano enquanto o próximo cenário é provisionado:
+    # python main.py --cenarios cenarios.json --app_url http://localhost:3000 --provisionador api --pipeline
     main()
@@ -0,0 +1,337 @@
+# Modelo de capacidade a partir das execuções em resultados/: para cada stack, operação (script sem o sufixo de VUs)
+# e configuração do banco, ajusta
+#   - a Universal Scalability Law (Gunther) da vazão em função dos VUs, X(N) = λN / (1 + σ(N-1) + κN(N-1)),
+#     por mínimos quadrados não lineares, em cada CPU/RAM de backend medida com pelo menos 3 níveis de VUs; daí saem
+#     a vazão máxima sustentável X(N*) e o número de VUs N* = sqrt((1-σ)/κ) em que ela ocorre;
+#   - uma superfície de resposta (polinômio em log CPU, log RAM e log VUs) para log p95 e outra para log da vazão
+#     máxima da USL em função de log CPU e log RAM,
+# e prevê p95 e vazão máxima em configurações que não foram executadas. Cada modelo vem com o relatório de resíduos
+# (R², RMSE, erro relativo, erro de validação cruzada leave-one-out e pontos com resíduo alto) para julgar se ele
+# serve para dimensionamento. As repetições de uma mesma configuração entram pela mediana.
+# Uso: python modelo_capacidade.py --resultados resultados --stack node-postgres --operacao get_users \
+#          --prever 0.75:1536:300 --prever 1.5:1024:500 [--limite_p95 500] [--saida modelo.json]
+
+import re
+import json
+import argparse
+import numpy as np
+
+from analise_repeticoes import carregar_execucoes
+
+_VUS = re.compile(r'_?(\d+)vus$')
+
+MIN_NIVEIS_USL = 3
+LIMITE_RESIDUO = 2.0
+Z_INTERVALO = 1.96
+
+
+def operacao_vus(script: str):
+    """
+    Separa o nome do script K6 em (operação, VUs): 'post_users_500vus' -> ('post_users', 500).
+    """
+    achado = _VUS.search(script or '')
+    if not achado:
+        return script, None
+    return script[:achado.start()], int(achado.group(1))
+
+
+def pontos_medidos(execucoes) -> dict:
+    """
+    Agrupa [(chave_configuracao, metricas_execucao)] por (stack, operação, db_cpu, db_ram) e resume as repetições
+    de cada (cpu, ram, vus) pela mediana. Retorna {grupo: array [cpu, ram, vus, p95, vazão, repetições]}.
+    """
+    repeticoes = {}
+    for (stack, script, cpu, ram, db_cpu, db_ram), valores in execucoes:
+        operacao, vus = operacao_vus(script)
+        if vus is None:
+            continue
+        p95 = valores.get('http_req_duration_p95')
+        vazao = valores.get('http_reqs_rate')
+        repeticoes.setdefault((stack, operacao, db_cpu, db_ram), {}).setdefault((cpu, ram, vus), []).append(
+            (np.nan if p95 is None else p95, np.nan if vazao is None else vazao))
+    grupos = {}
+    for grupo, configuracoes in repeticoes.items():
+        linhas = []
+        for (cpu, ram, vus), medidas in sorted(configuracoes.items()):
+            medidas = np.asarray(medidas, dtype=float)
+            with np.errstate(all='ignore'):
+                p95 = np.nanmedian(medidas[:, 0]) if (~np.isnan(medidas[:, 0])).any() else np.nan
+                vazao = np.nanmedian(medidas[:, 1]) if (~np.isnan(medidas[:, 1])).any() else np.nan
+            linhas.append([cpu, ram, vus, p95, vazao, len(medidas)])
+        grupos[grupo] = np.asarray(linhas, dtype=float)
+    return grupos
+
+
+def relatorio_residuos(observado, previsto, loo=None, pontos=None) -> dict:
+    """
+    Resíduos na escala em que o modelo foi ajustado (observado - previsto); loo são os resíduos leave-one-out.
+    pontos: rótulos de cada observação, usados para listar as que têm resíduo padronizado acima de LIMITE_RESIDUO.
+    """
+    observado = np.asarray(observado, dtype=float)
+    previsto = np.asarray(previsto, dtype=float)
+    residuos = observado - previsto
+    soma_total = ((observado - observado.mean()) ** 2).sum()
+    rmse = float(np.sqrt((residuos ** 2).mean()))
+    relatorio = {
+        'n': int(len(observado)),
+        'r2': float(1 - (residuos ** 2).sum() / soma_total) if soma_total > 0 else None,
+        'rmse': rmse,
+        'residuos': [float(r) for r in residuos],
+    }
+    if loo is not None:
+        relatorio['rmse_loo'] = float(np.sqrt((np.asarray(loo) ** 2).mean()))
+    escala = residuos.std(ddof=1) if len(residuos) > 1 else 0.0
+    if pontos is not None and escala > 0:
+        relatorio['pontos_atipicos'] = [pontos[i] for i in np.flatnonzero(np.abs(residuos / escala) > LIMITE_RESIDUO)]
+    return relatorio
+
+
+def _grade_usl(vus, vazao, sigmas, kappas):
+    # Para σ e κ fixos a USL é linear em λ: λ ótimo = Σ X·f / Σ f², com f = N / (1 + σ(N-1) + κN(N-1))
+    f = vus[None, None, :] / (1 + sigmas[:, None, None] * (vus - 1) + kappas[None, :, None] * vus * (vus - 1))
+    lam = np.maximum((f * vazao).sum(axis=2) / (f ** 2).sum(axis=2), 0)
+    erro = ((lam[:, :, None] * f - vazao) ** 2).sum(axis=2)
+    i, j = np.unravel_index(np.argmin(erro), erro.shape)
+    return lam[i, j], sigmas[i], kappas[j]
+
+
+def ajustar_usl(vus, vazao) -> dict:
+    """
+    Ajusta a USL por mínimos quadrados não lineares na vazão: busca em grade logarítmica de σ e κ (incluindo zero),
+    com λ em forma fechada para cada par, refinada em torno do melhor ponto.
+    Retorna λ, σ, κ, vus_pico (N*), vazao_max e o relatório de resíduos da vazão, ou None com poucos níveis de VUs.
+    """
+    vus = np.asarray(vus, dtype=float)
+    vazao = np.asarray(vazao, dtype=float)
+    validos = ~np.isnan(vazao) & (vazao > 0)
+    vus, vazao = vus[validos], vazao[validos]
+    if len(np.unique(vus)) < MIN_NIVEIS_USL:
+        return None
+    lam, sigma, kappa = _grade_usl(vus, vazao, np.concatenate([[0], np.logspace(-5, 0, 101)]),
+                                   np.concatenate([[0], np.logspace(-9, -1, 161)]))
+    fino = np.logspace(-0.1, 0.1, 41)
+    lam, sigma, kappa = _grade_usl(vus, vazao, np.concatenate([[0], sigma * fino]) if sigma else np.array([0.0]),
+                                   np.concatenate([[0], kappa * fino]) if kappa else np.array([0.0]))
+    if kappa > 0 and sigma < 1:
+        vus_pico = float(np.sqrt((1 - sigma) / kappa))
+        vazao_max = float(prever_usl(lam, sigma, kappa, vus_pico))
+    elif sigma > 0:
+        # Sem retrocoerência a vazão só se aproxima de λ/σ
+        vus_pico, vazao_max = None, float(lam / sigma)
+    else:
+        # Ainda linear nos VUs medidos: não há saturação visível
+        vus_pico, vazao_max = None, None
+    previsto = prever_usl(lam, sigma, kappa, vus)
+    return {
+        'lambda': float(lam), 'sigma': float(sigma), 'kappa': float(kappa),
+        'vus_pico': vus_pico, 'vazao_max': vazao_max,
+        'residuos': dict(relatorio_residuos(vazao, previsto, pontos=[int(n) for n in vus]),
+                         erro_relativo_medio=float(np.mean(np.abs(vazao - previsto) / vazao))),
+    }
+
+
+def prever_usl(lam, sigma, kappa, vus):
+    vus = np.asarray(vus, dtype=float)
+    return lam * vus / (1 + sigma * (vus - 1) + kappa * vus * (vus - 1))
+
+
+class Superficie:
+    """
+    Regressão polinomial de y em log das variáveis de entrada. Os termos candidatos entram em ordem (lineares,
+    interações, quadrados) e fica o prefixo com menor erro leave-one-out (PRESS), deixando ao menos 2 graus de
+    liberdade para o resíduo. Variáveis constantes em todos os pontos ficam de fora (o modelo não sabe nada sobre elas)
+    e só variáveis com 3 níveis ou mais ganham termo quadrático.
+    """
+    def __init__(self, nomes):
+        self.nomes = list(nomes)
+
+    def _candidatos(self, X):
+        ativas = self.ativas
+        termos = [()] + [(i,) for i in ativas]
+        termos += [(i, j) for k, i in enumerate(ativas) for j in ativas[k + 1:]]
+        termos += [(i, i) for i in ativas if len(np.unique(X[:, i])) >= 3]
+        return termos
+
+    def _matriz(self, X, termos=None):
+        Z = (np.log(np.asarray(X, dtype=float)) - self.centro) / self.escala
+        return np.column_stack([np.prod(Z[:, list(t)], axis=1) if t else np.ones(len(Z))
+                                for t in (self.termos if termos is None else termos)])
+
+    @staticmethod
+    def _minimos_quadrados(A, y):
+        coef = np.linalg.lstsq(A, y, rcond=None)[0]
+        residuos = y - A @ coef
+        # Diagonal da matriz chapéu: resíduo leave-one-out sem reajustar (e_i / (1 - h_ii))
+        pinv = np.linalg.pinv(A.T @ A)
+        alavanca = np.einsum('ij,jk,ik->i', A, pinv, A)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            loo = np.where(alavanca < 1 - 1e-9, residuos / (1 - alavanca), np.nan)
+        return coef, pinv, loo
+
+    def ajustar(self, X, y, pontos=None):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        logX = np.log(X)
+        self.minimo = X.min(axis=0)
+        self.maximo = X.max(axis=0)
+        self.centro = logX.mean(axis=0)
+        self.escala = logX.std(axis=0)
+        self.ativas = [i for i in range(X.shape[1]) if self.escala[i] > 0]
+        self.escala[self.escala == 0] = 1.0
+        candidatos = self._candidatos(X)
+        melhor = None
+        for k in range(1, max(1, min(len(candidatos), len(y) - 2)) + 1):
+            coef, pinv, loo = self._minimos_quadrados(self._matriz(X, candidatos[:k]), y)
+            press = np.nansum(loo ** 2) if not np.isnan(loo).all() else np.inf
+            if melhor is None or press < melhor[0]:
+                melhor = (press, k, coef, pinv, loo)
+        _, k, self.coef, self._pinv, loo = melhor
+        self.termos = candidatos[:k]
+        previsto = self._matriz(X) @ self.coef
+        graus = len(y) - len(self.termos)
+        self.variancia = float(((y - previsto) ** 2).sum() / graus) if graus > 0 else np.nan
+        self.residuos = relatorio_residuos(y, previsto, loo=loo[~np.isnan(loo)] if (~np.isnan(loo)).any() else None,
+                                           pontos=pontos)
+        self.residuos['termos'] = [' * '.join(f'log {self.nomes[i]}' for i in t) or 'constante' for t in self.termos]
+        return self
+
+    def prever(self, X):
+        """
+        Retorna (previsto, desvio da previsão, extrapolação) para cada linha de X, na escala de y.
+        extrapolação indica se alguma variável está fora da faixa medida.
+        """
+        X = np.asarray(X, dtype=float)
+        A = self._matriz(X)
+        desvio = np.sqrt(self.variancia * (1 + np.einsum('ij,jk,ik->i', A, self._pinv, A)))
+        fora = ((X < self.minimo) | (X > self.maximo))[:, self.ativas].any(axis=1) if self.ativas \
+            else np.zeros(len(X), dtype=bool)
+        return A @ self.coef, desvio, fora
+
+
+def ajustar_modelo(pontos: np.ndarray) -> dict:
+    """
+    Ajusta os modelos de um grupo a partir de pontos_medidos: USL por (cpu, ram), superfície de log p95 em
+    (cpu, ram, vus) e superfície de log vazão máxima em (cpu, ram).
+    """
+    modelo = {'usl': {}, 'p95': None, 'vazao_max': None}
+    for cpu, ram in sorted({(c, r) for c, r in pontos[:, :2]}):
+        linhas = pontos[(pontos[:, 0] == cpu) & (pontos[:, 1] == ram)]
+        usl = ajustar_usl(linhas[:, 2], linhas[:, 4])
+        if usl is not None:
+            modelo['usl'][(float(cpu), int(ram))] = usl
+    com_p95 = pontos[~np.isnan(pontos[:, 3]) & (pontos[:, 3] > 0)]
+    if len(com_p95) >= 3:
+        rotulos = [f'{c:g}:{int(r)}:{int(v)}' for c, r, v in com_p95[:, :3]]
+        modelo['p95'] = Superficie(('cpu', 'ram', 'vus')).ajustar(com_p95[:, :3], np.log(com_p95[:, 3]), rotulos)
+    maximos = [(c, r, u['vazao_max']) for (c, r), u in modelo['usl'].items() if u['vazao_max']]
+    if len(maximos) >= 3:
+        maximos = np.asarray(maximos, dtype=float)
+        rotulos = [f'{c:g}:{int(r)}' for c, r in maximos[:, :2]]
+        modelo['vazao_max'] = Superficie(('cpu', 'ram')).ajustar(maximos[:, :2], np.log(maximos[:, 2]), rotulos)
+    return modelo
+
+
+def _intervalo(log_previsto, log_desvio):
+    return [float(np.exp(log_previsto - Z_INTERVALO * log_desvio)), float(np.exp(log_previsto + Z_INTERVALO * log_desvio))]
+
+
+def vus_limite(superficie: Superficie, cpu, ram, limite_p95, vus_max):
+    """
+    Maior número de VUs (até vus_max) com p95 previsto abaixo de limite_p95 em (cpu, ram), ou None se nenhum.
+    """
+    vus = np.arange(1, int(vus_max) + 1)
+    previsto = superficie.prever(np.column_stack([np.full(len(vus), cpu), np.full(len(vus), ram), vus]))[0]
+    abaixo = np.flatnonzero(np.exp(previsto) <= limite_p95)
+    return int(vus[abaixo[-1]]) if len(abaixo) else None
+
+
+def prever(modelo: dict, cpu, ram, vus, limite_p95=None, vus_max=None) -> dict:
+    """
+    p95 e vazão máxima previstos em (cpu, ram, vus), com intervalo aproximado de 95% e a marca de extrapolação.
+    Se (cpu, ram) tem USL ajustada, a vazão prevista nesses VUs e a vazão máxima vêm dela.
+    """
+    previsao = {'cpu': cpu, 'ram': ram, 'vus': vus}
+    ponto = np.array([[cpu, ram, vus]], dtype=float)
+    if modelo['p95'] is not None:
+        log_p95, desvio, fora = modelo['p95'].prever(ponto)
+        previsao['p95'] = float(np.exp(log_p95[0]))
+        previsao['p95_intervalo'] = _intervalo(log_p95[0], desvio[0])
+        previsao['p95_extrapolacao'] = bool(fora[0])
+        if limite_p95 is not None:
+            previsao['vus_limite_p95'] = vus_limite(modelo['p95'], cpu, ram, limite_p95, vus_max or vus)
+    usl = modelo['usl'].get((float(cpu), int(ram)))
+    if usl is not None:
+        previsao['vazao'] = float(prever_usl(usl['lambda'], usl['sigma'], usl['kappa'], vus))
+        previsao['vazao_max'] = usl['vazao_max']
+        previsao['vazao_max_origem'] = 'usl'
+    elif modelo['vazao_max'] is not None:
+        log_max, desvio, fora = modelo['vazao_max'].prever(ponto[:, :2])
+        previsao['vazao_max'] = float(np.exp(log_max[0]))
+        previsao['vazao_max_intervalo'] = _intervalo(log_max[0], desvio[0])
+        previsao['vazao_max_extrapolacao'] = bool(fora[0])
+        previsao['vazao_max_origem'] = 'superficie'
+    return previsao
+
+
+def _ponto(texto):
+    cpu, ram, vus = texto.split(':')
+    return float(cpu), int(ram), int(vus)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resultados', default='resultados', help='Pasta com os _metrics.json')
+    parser.add_argument('--stack', default=None)
+    parser.add_argument('--operacao', default=None, help='Script K6 sem o sufixo de VUs, ex.: get_users')
+    parser.add_argument('--prever', action='append', type=_ponto, default=[],
+                        help='Configuração a prever no formato cpu:ram_mb:vus (pode repetir)')
+    parser.add_argument('--limite_p95', type=float, default=None,
+                        help='Threshold de p95 (ms): informa também quantos VUs cabem abaixo dele')
+    parser.add_argument('--saida', default=None, help='Grava modelos e previsões em JSON')
+    args = parser.parse_args()
+
+    saida = []
+    for grupo, pontos in sorted(pontos_medidos(carregar_execucoes(args.resultados, args.stack)).items(),
+                                key=lambda g: tuple(str(c) for c in g[0])):
+        stack, operacao, db_cpu, db_ram = grupo
+        if args.operacao and operacao != args.operacao:
+            continue
+        modelo = ajustar_modelo(pontos)
+        print(f"\n=== {stack} | {operacao} | banco {db_cpu} CPU / {db_ram} MB | {len(pontos)} configurações medidas ===")
+        for (cpu, ram), usl in modelo['usl'].items():
+            print(f"USL {cpu:g} CPU / {ram} MB: λ={usl['lambda']:.2f} σ={usl['sigma']:.4f} κ={usl['kappa']:.6f} "
+                  f"vazão máx={usl['vazao_max']} em {usl['vus_pico']} VUs | R²={usl['residuos']['r2']} "
+                  f"erro relativo={usl['residuos']['erro_relativo_medio']:.1%}")
+        for nome in ('p95', 'vazao_max'):
+            superficie = modelo[nome]
+            if superficie is None:
+                print(f"Superfície {nome}: pontos insuficientes")
+                continue
+            r = superficie.residuos
+            print(f"Superfície log {nome}: n={r['n']} termos={len(r['termos'])} R²={r['r2']} RMSE={r['rmse']:.3f} "
+                  f"RMSE LOO={r.get('rmse_loo')} atípicos={r.get('pontos_atipicos', [])}")
+        vus_max = int(pontos[:, 2].max()) * 2
+        previsoes = [prever(modelo, cpu, ram, vus, args.limite_p95, vus_max) for cpu, ram, vus in args.prever]
+        for p in previsoes:
+            print(f"Previsão {p['cpu']:g} CPU / {p['ram']} MB / {p['vus']} VUs: p95={p.get('p95')} "
+                  f"IC={p.get('p95_intervalo')}{' (extrapolação)' if p.get('p95_extrapolacao') else ''} | "
+                  f"vazão máx={p.get('vazao_max')} ({p.get('vazao_max_origem')})"
+                  f"{' | VUs abaixo do limite: ' + str(p.get('vus_limite_p95')) if args.limite_p95 else ''}")
+        saida.append({
+            'stack': stack, 'operacao': operacao, 'db_cpu': db_cpu, 'db_ram': db_ram,
+            'pontos': [dict(zip(('cpu', 'ram', 'vus', 'p95', 'vazao', 'repeticoes'), map(float, linha)))
+                       for linha in pontos],
+            'usl': [dict(u, cpu=cpu, ram=ram) for (cpu, ram), u in modelo['usl'].items()],
+            'superficie_p95': modelo['p95'].residuos if modelo['p95'] else None,
+            'superficie_vazao_max': modelo['vazao_max'].residuos if modelo['vazao_max'] else None,
+            'previsoes': previsoes,
+        })
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(saida, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    # Como executar no terminal:
+    # python modelo_capacidade.py --resultados resultados --stack node-postgres --operacao get_users --prever 0.75:1536:300 --limite_p95 500
+    main()
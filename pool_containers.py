@@ -0,0 +1,117 @@
+# Pool de containers aquecidos: mantém um container por configuração (stack + CPU/RAM de backend e banco)
+# vivo entre as repetições, resetando o banco entre uma execução e outra, e opcionalmente
+# constrói em segundo plano o container da próxima configuração enquanto o K6 da atual roda.
+
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+
+def chave_configuracao(cenario: dict) -> tuple:
+    """
+    Identifica a configuração do container de um cenário (independe do nome/repetição e do script K6).
+    """
+    return (
+        cenario['backend'],
+        float(cenario.get('backend_cpu', 0.5)),
+        int(cenario.get('backend_ram', 512)),
+        float(cenario.get('db_cpu', 0.5)),
+        int(cenario.get('db_ram', 512)),
+    )
+
+
+def executar_reset_hook(comando: str, provisionado: dict):
+    """
+    Executa o comando de reset do banco (truncate/reseed) no shell local.
+    O comando pode usar os campos {id}, {base_url}, {backend} e {database}, ex.:
+    "ssh root@host docker exec {database} psql -U postgres -c 'TRUNCATE users'"
+    """
+    container_id = provisionado['container_info']['id']
+    cmd = comando.format(
+        id=container_id,
+        base_url=provisionado['base_url'],
+        backend=f"{container_id}-backend-1",
+        database=f"{container_id}-database-1",
+    )
+    subprocess.run(cmd, shell=True, check=True)
+
+
+class PoolContainers:
+    """
+    Reaproveita o container de uma configuração entre repetições.
+    Mantém no máximo um container ativo (mais o pré-construído, se houver): ao pedir uma configuração
+    diferente, o container anterior é removido.
+    O pré-build em segundo plano só é feito com provisionadores thread_safe (ex.: API do orquestrador);
+    com o Playwright a página não pode ser usada por outra thread e o pré-build é ignorado.
+    """
+    def __init__(self, provisionador, reset_hook=None):
+        self.provisionador = provisionador
+        self.reset_hook = reset_hook
+        self._ativos = {}
+        self._preconstruidos = {}
+        self._executor = ThreadPoolExecutor(max_workers=1) if provisionador.thread_safe else None
+        if not reset_hook:
+            print('[POOL] Reutilizando containers sem --reset_hook: o estado do banco será acumulado entre repetições.')
+
+    def obter(self, cenario: dict) -> dict:
+        """
+        Retorna o container pronto para o cenário no mesmo formato de Provisionador.criar,
+        com a chave extra 'reutilizado'. Se o container já existia, o banco é resetado antes.
+        """
+        chave = chave_configuracao(cenario)
+        if chave in self._ativos:
+            provisionado = self._ativos[chave]
+            tempos = {}
+            if self.reset_hook:
+                t0 = time.monotonic()
+                executar_reset_hook(self.reset_hook, provisionado)
+                tempos['reset_segundos'] = time.monotonic() - t0
+            return dict(provisionado, tempos=tempos, reutilizado=True)
+        self._liberar_ativos()
+        futuro = self._preconstruidos.pop(chave, None)
+        if futuro is not None:
+            t0 = time.monotonic()
+            provisionado = futuro.result()
+            provisionado = dict(provisionado, tempos=dict(provisionado.get('tempos', {}),
+                                                          espera_prebuild_segundos=time.monotonic() - t0))
+        else:
+            provisionado = self.provisionador.criar(cenario)
+        self._ativos[chave] = provisionado
+        return dict(provisionado, reutilizado=False)
+
+    def preconstruir(self, cenario: dict):
+        """
+        Começa a construir em segundo plano o container da configuração do cenário.
+        """
+        chave = chave_configuracao(cenario)
+        if self._executor is None or chave in self._ativos or chave in self._preconstruidos:
+            return
+        print(f'[POOL] Pré-construindo container para {chave}')
+        self._preconstruidos[chave] = self._executor.submit(self.provisionador.criar, cenario)
+
+    def descartar(self, cenario: dict):
+        """
+        Remove o container da configuração (ex.: após erro), para que a próxima repetição use um novo.
+        """
+        provisionado = self._ativos.pop(chave_configuracao(cenario), None)
+        if provisionado is not None:
+            self.provisionador.excluir(provisionado['container_info'])
+
+    def _liberar_ativos(self):
+        while self._ativos:
+            _, provisionado = self._ativos.popitem()
+            self.provisionador.excluir(provisionado['container_info'])
+
+    def fechar(self):
+        """
+        Remove todos os containers do pool, inclusive os pré-construídos.
+        """
+        self._liberar_ativos()
+        for futuro in self._preconstruidos.values():
+            try:
+                self.provisionador.excluir(futuro.result()['container_info'])
+            except Exception as e:
+                print(f'[POOL] Falha ao remover container pré-construído: {e}')
+        self._preconstruidos.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
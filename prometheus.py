@@ -0,0 +1,183 @@
+# Cliente do Prometheus usado pelos scripts: consultas query_range com um matcher por regex sobre todos os
+# containers da execução (uma chamada por métrica, feitas em paralelo), reaproveitando a mesma sessão HTTP.
+# Retorna as séries completas e, por container, média/máximo/p95 de memória e CPU, na janela inteira e em cada
+# fase do K6 (aquecimento, estável, ...), recortando as mesmas séries.
+
+import re
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+from k6_stream import agregar_serie_por_fases
+
+_clientes = {}
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    # Posto mais próximo
+    indice = max(0, min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def _resumo(serie):
+    valores = [v for _, v in serie]
+    if not valores:
+        return None, None, None
+    return sum(valores) / len(valores), max(valores), _percentil(valores, 95)
+
+
+def _regex_promql(nome):
+    # Escapa os metacaracteres de regex já no formato de string do PromQL (barra invertida dobrada)
+    return re.sub(r'([.*+?^$(){}\[\]|\\])', r'\\\\\1', nome)
+
+
+def _epoch_rfc3339(texto):
+    # Prometheus usa nanossegundos; datetime aceita até microssegundos
+    m = re.match(r'(.*T\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)$', texto)
+    fracao = ((m.group(2) or '') + '000000')[:6]
+    fuso = '+00:00' if m.group(3) == 'Z' else m.group(3)
+    return datetime.fromisoformat(f"{m.group(1)}.{fracao}{fuso}").timestamp()
+
+
+def _epoch(instante):
+    return instante.astimezone(timezone.utc).timestamp()
+
+
+def _resumo_fases(serie_mem, serie_cpu, fases, janela_rate):
+    por_fase = {}
+    for chave, serie, atraso in (('mem', serie_mem, 0), ('cpu', serie_cpu, janela_rate)):
+        unidade = 'bytes' if chave == 'mem' else 'cores'
+        for fase, r in agregar_serie_por_fases(serie, fases, atraso).items():
+            por_fase.setdefault(fase, {}).update({f'{chave}_avg_{unidade}': r['media'], f'{chave}_max_{unidade}': r['max'],
+                                                  f'{chave}_p95_{unidade}': r['p95']})
+    return por_fase
+
+
+def metricas_fase(metricas: dict, fase: str = 'estavel') -> dict:
+    """
+    Médias/máximos/p95 do container restritos à fase (ex.: só o estado estável), com os da janela inteira
+    para o que a fase não tiver.
+    """
+    metricas = metricas or {}
+    return dict(metricas, **((metricas.get('fases') or {}).get(fase) or {}))
+
+
+class ClientePrometheus:
+    """
+    passo: resolução (s) das séries retornadas pelo query_range.
+    janela_rate: janela (s) do rate() da CPU; precisa cobrir pelo menos dois scrapes.
+    """
+    def __init__(self, url, passo=5, janela_rate=30, timeout=10):
+        self.url = url.rstrip('/')
+        self.passo = passo
+        self.janela_rate = janela_rate
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=4)
+
+    def query_range(self, query, inicio, fim, passo=None) -> list:
+        """
+        Executa /api/v1/query_range e retorna a lista 'result' (cada item com 'metric' e 'values').
+        """
+        params = {'query': query, 'start': _epoch(inicio), 'end': _epoch(fim), 'step': passo or self.passo}
+        resp = self.session.get(f"{self.url}/api/v1/query_range", params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()['data']['result']
+
+    def query(self, query, instante=None) -> list:
+        """
+        Executa /api/v1/query (consulta instantânea) e retorna a lista 'result'.
+        """
+        params = {'query': query}
+        if instante is not None:
+            params['time'] = _epoch(instante)
+        resp = self.session.get(f"{self.url}/api/v1/query", params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()['data']['result']
+
+    def _seletor(self, nomes, rotulo):
+        return f'{{{rotulo}=~"{"|".join(_regex_promql(n) for n in nomes)}"}}'
+
+    def _ultimo_scrape_alvos(self):
+        resp = self.session.get(f"{self.url}/api/v1/targets", params={'state': 'active'}, timeout=self.timeout)
+        resp.raise_for_status()
+        alvos = resp.json()['data']['activeTargets']
+        instantes = [_epoch_rfc3339(a['lastScrape'])
+                     for a in alvos if a.get('health') == 'up' and a.get('lastScrape')]
+        return min(instantes) if instantes else None
+
+    def aguardar_dados(self, nomes, fim, rotulo='name', teto=60, intervalo=1.0) -> float:
+        """
+        Espera até o Prometheus ter amostras de todos os containers com timestamp >= fim (consulta
+        timestamp() da série de memória) e retorna os segundos esperados. Se essa consulta falhar, usa o
+        lastScrape dos alvos ativos (/api/v1/targets). Desiste após 'teto' segundos e segue com o que houver.
+        """
+        alvo = _epoch(fim)
+        query = f'timestamp(container_memory_usage_bytes{self._seletor(nomes, rotulo)})'
+        t0 = time.monotonic()
+        while True:
+            try:
+                resultado = self.query(query)
+                instantes = {item['metric'].get(rotulo): float(item['value'][1]) for item in resultado}
+                ultimo = min(instantes.get(n, 0) for n in nomes)
+            except Exception:
+                try:
+                    ultimo = self._ultimo_scrape_alvos() or 0
+                except Exception:
+                    ultimo = 0
+            esperado = time.monotonic() - t0
+            if ultimo >= alvo:
+                return esperado
+            if esperado >= teto:
+                print(f"[Prometheus] Sem amostras cobrindo o fim do teste após {teto}s; consultando assim mesmo.")
+                return esperado
+            time.sleep(intervalo)
+
+    def consultar_containers(self, nomes, inicio, fim, rotulo='name', fases=None) -> dict:
+        """
+        Memória (container_memory_usage_bytes) e CPU (rate de container_cpu_usage_seconds_total, em núcleos)
+        de todos os containers de uma vez, filtrando o rótulo (name ou id) por regex.
+        Retorna {nome: {'mem_avg_bytes', 'mem_max_bytes', 'mem_p95_bytes', 'cpu_avg_cores', 'cpu_max_cores',
+        'cpu_p95_cores', 'serie_mem', 'serie_cpu'}}, com as séries como [[epoch, valor], ...].
+        Com fases (epoch de início/fim por fase, como em RegistroExecucao.fases), acrescenta 'fases': {fase: {as
+        mesmas médias/máximos/p95}}; na CPU só entram amostras cujo rate() começa dentro da fase.
+        """
+        seletor = self._seletor(nomes, rotulo)
+        query_mem = f'sum by ({rotulo}) (container_memory_usage_bytes{seletor})'
+        query_cpu = f'sum by ({rotulo}) (rate(container_cpu_usage_seconds_total{seletor}[{self.janela_rate}s]))'
+        futuro_mem = self._executor.submit(self.query_range, query_mem, inicio, fim)
+        futuro_cpu = self._executor.submit(self.query_range, query_cpu, inicio, fim)
+        series = {nome: {'serie_mem': [], 'serie_cpu': []} for nome in nomes}
+        for chave, futuro in (('serie_mem', futuro_mem), ('serie_cpu', futuro_cpu)):
+            for item in futuro.result():
+                nome = item['metric'].get(rotulo)
+                if nome in series:
+                    series[nome][chave] = [[float(t), float(v)] for t, v in item['values']]
+        resultado = {}
+        for nome, s in series.items():
+            mem_avg, mem_max, mem_p95 = _resumo(s['serie_mem'])
+            cpu_avg, cpu_max, cpu_p95 = _resumo(s['serie_cpu'])
+            resultado[nome] = {
+                'mem_avg_bytes': mem_avg, 'mem_max_bytes': mem_max, 'mem_p95_bytes': mem_p95,
+                'cpu_avg_cores': cpu_avg, 'cpu_max_cores': cpu_max, 'cpu_p95_cores': cpu_p95,
+                'serie_mem': s['serie_mem'], 'serie_cpu': s['serie_cpu'],
+            }
+            if fases:
+                resultado[nome]['fases'] = _resumo_fases(s['serie_mem'], s['serie_cpu'], fases, self.janela_rate)
+            print(f"[Prometheus] {rotulo}: {nome} | Mem: {mem_avg} | CPU: {cpu_avg}")
+        return resultado
+
+
+def obter_cliente(url, **kwargs) -> ClientePrometheus:
+    """
+    Retorna um cliente por URL, reaproveitado entre execuções (mantém a sessão HTTP aberta).
+    """
+    if url not in _clientes:
+        _clientes[url] = ClientePrometheus(url, **kwargs)
+    return _clientes[url]
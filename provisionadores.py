@@ -0,0 +1,262 @@
+# Provisionadores de containers: criam, aguardam e removem o container de cada cenário.
+# - ProvisionadorPlaywright: dirige a interface React (modal de criação, botões Run/Remove).
+# - ProvisionadorAPI: fala HTTP direto com o orquestrador que está por trás da interface,
+#   sem abrir o Chromium.
+
+import os
+import json
+import time
+from abc import ABC, abstractmethod
+import requests
+
+from interface_playwright import (
+    iniciar_navegador, acessar_aplicacao, criar_container, aguardar_container_ativo,
+    extrair_url_container, excluir_container_ate_sucesso, extrair_info_container,
+    listar_ids_estaveis, identificar_novo_container
+)
+
+
+class Provisionador(ABC):
+    """
+    Interface comum dos provisionadores.
+    criar(cenario) retorna {'base_url': ..., 'container_info': {...}, 'tempos': {...}} com o container pronto
+    para o K6; 'tempos' traz a duração, em segundos, de cada fase de espera do provisionamento.
+    excluir(container_info) remove o container e só retorna quando ele não existir mais.
+    thread_safe indica se a mesma instância pode ser usada por várias threads ao mesmo tempo.
+    """
+    thread_safe = False
+
+    def abrir(self):
+        return self
+
+    def fechar(self):
+        pass
+
+    @abstractmethod
+    def criar(self, cenario: dict) -> dict:
+        ...
+
+    @abstractmethod
+    def excluir(self, container_info):
+        ...
+
+    def __enter__(self):
+        return self.abrir()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+
+
+class ProvisionadorPlaywright(Provisionador):
+    """
+    Provisiona containers pela interface React usando Playwright.
+    Se trava_build for fornecida (modo paralelo), o build é serializado entre os workers
+    e URL, informações e remoção atuam apenas no card do container criado.
+    Se rota_build for fornecida (trecho da URL da chamada de build feita pela interface),
+    a resposta dessa chamada é capturada e um erro HTTP no build falha na hora, sem esperar o timeout da mensagem;
+    o id do container criado também é lido dessa resposta, quando ela o traz. Sem ele, o modo paralelo compara os
+    ids da interface antes e depois do build.
+    """
+    def __init__(self, app_url, trava_build=None, rota_build=None):
+        self.app_url = app_url
+        self.trava_build = trava_build
+        self.rota_build = rota_build
+        self.page = None
+        self._playwright = None
+        self._browser = None
+
+    def abrir(self):
+        from playwright.sync_api import sync_playwright
+        self._playwright = sync_playwright().start()
+        self._browser = iniciar_navegador(self._playwright)
+        context = self._browser.new_context()
+        self.page = context.new_page()
+        acessar_aplicacao(self.page, self.app_url)
+        return self
+
+    def fechar(self):
+        if self._browser:
+            self._browser.close()
+        if self._playwright:
+            self._playwright.stop()
+
+    def _build(self, cenario):
+        # Retorna o id do container se a resposta da chamada de build o informar, senão None
+        page = self.page
+        container_id = None
+        if not self.rota_build:
+            criar_container(page, cenario)
+        else:
+            with page.expect_response(lambda r: self.rota_build in r.url and r.request.method == 'POST',
+                                      timeout=240000) as resposta:
+                criar_container(page, cenario)
+            if not resposta.value.ok:
+                raise Exception(f'Chamada de build retornou HTTP {resposta.value.status}.')
+            try:
+                corpo = resposta.value.json()
+                container_id = str(corpo['id']) if isinstance(corpo, dict) and corpo.get('id') else None
+            except Exception:
+                pass
+        aguardar_container_ativo(page)
+        return container_id
+
+    def criar(self, cenario: dict) -> dict:
+        page = self.page
+        tempos = {}
+        t0 = time.monotonic()
+        container_id = None
+        if self.trava_build is not None:
+            with self.trava_build:
+                # Os builds são serializados pela trava: depois de recarregar, a lista já tem todos os containers
+                # dos outros workers e o único id novo após o build é o deste
+                ids_antes = set(listar_ids_estaveis(page))
+                container_id = self._build(cenario) or identificar_novo_container(page, ids_antes)
+        else:
+            self._build(cenario)
+        tempos['build_segundos'] = time.monotonic() - t0
+        try:
+            t0 = time.monotonic()
+            base_url = extrair_url_container(page, container_id)
+            tempos['url_segundos'] = time.monotonic() - t0
+            t0 = time.monotonic()
+            container_info = None
+            for _ in range(10):
+                try:
+                    container_info = extrair_info_container(page, container_id)
+                    if container_info and container_info.get('id'):
+                        break
+                except Exception:
+                    pass
+                page.wait_for_timeout(2000)  # espera entre tentativas de extrair info do container
+            if not container_info or not container_info.get('id'):
+                raise Exception('ID do container não encontrado após múltiplas tentativas.')
+            tempos['info_segundos'] = time.monotonic() - t0
+        except Exception:
+            # Como no ProvisionadorAPI: o build já terminou, então não deixa o container órfão no host
+            try:
+                excluir_container_ate_sucesso(page, container_id)
+            except Exception as e:
+                print(f'[PROVISIONADOR] Falha ao remover o container após erro no provisionamento: {e}')
+            raise
+        return {'base_url': base_url, 'container_info': container_info, 'tempos': tempos}
+
+    def excluir(self, container_info):
+        # Fora do modo paralelo mantém o comportamento original: remove tudo até não sobrar botão Remove
+        container_id = None
+        if self.trava_build is not None and container_info:
+            container_id = container_info.get('id')
+        excluir_container_ate_sucesso(self.page, container_id)
+
+
+class ProvisionadorAPI(Provisionador):
+    """
+    Provisiona containers chamando diretamente a API HTTP do orquestrador:
+    - POST   {api_url}{rota}        corpo: stack, backend_cpu, backend_ram, db_cpu, db_ram
+                                    resposta: {"id": ..., "status": ..., "url": ...}
+    - GET    {api_url}{rota}/{id}   resposta: {"id": ..., "status": ..., "url": ..., recursos...}
+    - DELETE {api_url}{rota}/{id}
+    O container é considerado pronto quando o status é um dos STATUS_PRONTO e a URL já foi atribuída.
+    """
+    thread_safe = True
+    STATUS_PRONTO = ('running', 'ready', 'up')
+    STATUS_ERRO = ('error', 'failed', 'exited')
+
+    def __init__(self, api_url, rota='/containers', intervalo=1.0, timeout_build=240, timeout_http=10):
+        self.api_url = api_url.rstrip('/')
+        self.rota = rota
+        self.intervalo = intervalo
+        self.timeout_build = timeout_build
+        self.timeout_http = timeout_http
+        self.session = requests.Session()
+
+    def fechar(self):
+        self.session.close()
+
+    def _url(self, container_id=None):
+        url = f"{self.api_url}{self.rota}"
+        return f"{url}/{container_id}" if container_id is not None else url
+
+    def _consultar(self, container_id):
+        resp = self.session.get(self._url(container_id), timeout=self.timeout_http)
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.json()
+
+    def _aguardar_pronto(self, container_id):
+        limite = time.monotonic() + self.timeout_build
+        while time.monotonic() < limite:
+            dados = self._consultar(container_id)
+            if dados is None:
+                raise Exception(f'Container {container_id} desapareceu durante o build.')
+            status = str(dados.get('status', '')).lower()
+            if status in self.STATUS_ERRO:
+                raise Exception(f'Build do container {container_id} falhou com status {status}.')
+            if status in self.STATUS_PRONTO and dados.get('url'):
+                return dados
+            time.sleep(self.intervalo)
+        raise TimeoutError(f'Container {container_id} não ficou pronto em {self.timeout_build}s.')
+
+    def criar(self, cenario: dict) -> dict:
+        payload = {
+            'stack': cenario['backend'],
+            'backend_cpu': float(cenario.get('backend_cpu', 0.5)),
+            'backend_ram': int(cenario.get('backend_ram', 512)),
+            'db_cpu': float(cenario.get('db_cpu', 0.5)),
+            'db_ram': int(cenario.get('db_ram', 512)),
+        }
+        t0 = time.monotonic()
+        resp = self.session.post(self._url(), json=payload, timeout=self.timeout_http)
+        resp.raise_for_status()
+        container_id = str(resp.json()['id'])
+        try:
+            dados = self._aguardar_pronto(container_id)
+        except Exception:
+            # Não deixa container órfão ocupando recursos do host
+            self.excluir({'id': container_id})
+            raise
+        container_info = {
+            'id': container_id,
+            'stack': str(dados.get('stack', payload['stack'])),
+            'backend_cpu': str(dados.get('backend_cpu', payload['backend_cpu'])),
+            'backend_ram': str(dados.get('backend_ram', payload['backend_ram'])),
+            'db_cpu': str(dados.get('db_cpu', payload['db_cpu'])),
+            'db_ram': str(dados.get('db_ram', payload['db_ram'])),
+        }
+        return {'base_url': dados['url'], 'container_info': container_info,
+                'tempos': {'build_segundos': time.monotonic() - t0}}
+
+    def excluir(self, container_info):
+        if not container_info or not container_info.get('id'):
+            return
+        container_id = container_info['id']
+        resp = self.session.delete(self._url(container_id), timeout=self.timeout_http)
+        if resp.status_code not in (200, 202, 204, 404):
+            resp.raise_for_status()
+        limite = time.monotonic() + self.timeout_build
+        while time.monotonic() < limite:
+            if self._consultar(container_id) is None:
+                return
+            time.sleep(self.intervalo)
+        raise Exception(f'Não foi possível confirmar a remoção do container {container_id}.')
+
+
+def criar_provisionador(tipo, app_url=None, orquestrador_url=None, trava_build=None):
+    """
+    Cria o provisionador pelo nome ('playwright' ou 'api').
+    Se orquestrador_url não for informado, usa a chave orquestrador_url do config.json.
+    A chave opcional rota_build do config.json ativa a captura da chamada de build no provisionador playwright.
+    """
+    config = {}
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+    if os.path.exists(config_path):
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+    if tipo == 'api':
+        orquestrador_url = orquestrador_url or config.get('orquestrador_url')
+        if not orquestrador_url:
+            raise ValueError("Provisionador 'api' exige orquestrador_url (argumento ou config.json).")
+        return ProvisionadorAPI(orquestrador_url)
+    if tipo == 'playwright':
+        return ProvisionadorPlaywright(app_url, trava_build=trava_build, rota_build=config.get('rota_build'))
+    raise ValueError(f"Provisionador desconhecido: {tipo}")
@@ -0,0 +1,147 @@
+# Registro de uma execução (um cenário/repetição): acumula em memória o summary do K6, as informações do container,
+# os tempos das fases e as métricas do Prometheus/SSH, e grava o <nome>_metrics.json uma única vez, de forma atômica
+# (arquivo temporário + os.replace). main.py e todos os scripts gravam o mesmo esquema:
+#   versao_esquema, cenario, container_info, container_reutilizado, inicio_teste, fim_teste, duracao_segundos,
+#   k6_summary (summary exportado pelo K6, sem alterações), k6_exit_code, k6_thresholds_ok, k6_abortado,
+#   k6_motivo_aborto, tempos_fases, fases, erro, chave_cache (cache_execucoes.py) e as seções extras de cada coleta
+#   (prometheus_metrics*, host, backend, ...).
+# inicio_teste/fim_teste delimitam o processo do K6; 'fases' tem o início e o fim de cada fase (provisionamento,
+# health, k6, remocao e, a partir da saída do K6, setup_k6, aquecimento, estavel, desaceleracao e teardown_k6).
+# Depois de gravado, o registro entra no catálogo SQLite da pasta (catalogo.py).
+
+import os
+import json
+import tempfile
+import time
+from datetime import datetime
+
+from catalogo import registrar_execucao
+
+VERSAO_ESQUEMA = 1
+
+
+class RegistroExecucao:
+    """
+    Acumula os dados de uma execução e os serializa em metrics_path com gravar().
+    inicio/fim são datetimes do processo do K6 (iniciar() logo antes dele, finalizar() logo depois);
+    tempos_fases é preenchido diretamente por quem executa as fases e 'fases' por marcar() e registrar_k6().
+    """
+    def __init__(self, cenario: dict, metrics_path: str = None, tz=None):
+        self.cenario = cenario
+        self.metrics_path = metrics_path or f"resultados/{cenario['nome']}_metrics.json"
+        self.tz = tz
+        self.inicio = None
+        self.fim = None
+        self.container_info = None
+        self.container_reutilizado = False
+        self.tempos_fases = {}
+        self.fases = {}
+        self.k6 = {}
+        self.secoes = {}
+        self.erro = None
+        self.chave_cache = None
+        self.gravado = False
+
+    def iniciar(self):
+        self.inicio = datetime.now(self.tz)
+
+    def finalizar(self):
+        self.fim = datetime.now(self.tz)
+
+    def _epoch(self, instante):
+        if instante is None:
+            return time.time()
+        return instante.timestamp() if isinstance(instante, datetime) else float(instante)
+
+    def marcar(self, fase: str, inicio, fim=None):
+        """
+        Registra o início e o fim (epoch ou datetime; fim padrão: agora) de uma fase da execução.
+        """
+        inicio, fim = self._epoch(inicio), self._epoch(fim)
+        self.fases[fase] = dict(self.fases.get(fase) or {}, inicio=inicio, fim=fim, duracao_segundos=fim - inicio)
+
+    def registrar_provisionamento(self, provisionado: dict):
+        """
+        Guarda container_info, tempos do provisionamento e se o container foi reaproveitado (Provisionador.criar/PoolContainers.obter).
+        """
+        self.container_info = provisionado['container_info']
+        self.container_reutilizado = provisionado.get('reutilizado', False)
+        self.tempos_fases.update(provisionado.get('tempos', {}))
+
+    def registrar_k6(self, resultado: dict):
+        """
+        Guarda o retorno de executar_k6: summary exportado, exit code, thresholds e, com monitor, o aborto.
+        """
+        self.k6 = {'k6_summary': resultado.get('summary'), 'k6_exit_code': resultado.get('exit_code'),
+                   'k6_thresholds_ok': resultado.get('thresholds_ok')}
+        if 'abortado' in resultado:
+            self.k6['k6_abortado'] = resultado['abortado']
+            self.k6['k6_motivo_aborto'] = resultado['motivo_aborto']
+        # Fases delimitadas pela saída do K6 (k6_stream.AgregadorK6.fases_k6)
+        self.fases.update(resultado.get('fases') or {})
+
+    def adicionar(self, chave: str, valor):
+        """
+        Acrescenta uma seção de primeiro nível (ex.: 'prometheus_metrics_backend', 'host').
+        """
+        self.secoes[chave] = valor
+
+    @property
+    def duracao_segundos(self):
+        if self.inicio is None or self.fim is None:
+            return None
+        return (self.fim - self.inicio).total_seconds()
+
+    def _fase_para_dict(self, fase):
+        if not isinstance(fase, dict):
+            return fase
+        return dict(fase, inicio=datetime.fromtimestamp(fase['inicio'], self.tz).isoformat(),
+                    fim=datetime.fromtimestamp(fase['fim'], self.tz).isoformat())
+
+    def para_dict(self) -> dict:
+        dados = {
+            'versao_esquema': VERSAO_ESQUEMA,
+            'cenario': self.cenario,
+            'container_info': self.container_info,
+            'container_reutilizado': self.container_reutilizado,
+            'inicio_teste': self.inicio.isoformat() if self.inicio else None,
+            'fim_teste': self.fim.isoformat() if self.fim else None,
+            'duracao_segundos': self.duracao_segundos,
+            'k6_summary': None,
+        }
+        dados.update(self.k6)
+        dados['tempos_fases'] = self.tempos_fases
+        dados['fases'] = {fase: self._fase_para_dict(v) for fase, v in self.fases.items()}
+        dados.update(self.secoes)
+        if self.erro:
+            dados['erro'] = self.erro
+        if self.chave_cache:
+            dados['chave_cache'] = self.chave_cache
+        return dados
+
+    def gravar(self) -> str:
+        """
+        Serializa o registro em metrics_path (uma única vez; chamadas seguintes não regravam), atualiza o catálogo
+        e retorna o caminho.
+        """
+        if self.gravado:
+            return self.metrics_path
+        if self.fim is None:
+            self.finalizar()
+        pasta = os.path.dirname(self.metrics_path) or '.'
+        os.makedirs(pasta, exist_ok=True)
+        dados = self.para_dict()
+        fd, tmp = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dados, f, indent=4, ensure_ascii=False)
+            os.replace(tmp, self.metrics_path)
+        except Exception:
+            os.remove(tmp)
+            raise
+        self.gravado = True
+        try:
+            registrar_execucao(self.metrics_path, dados)
+        except Exception as e:
+            print(f"[CATALOGO] Falha ao catalogar {self.metrics_path}: {e}")
+        return self.metrics_path
@@ -7,15 +7,19 @@ import time
 import json
 import argparse
 from statistics import mean
-from datetime import datetime, timezone, timedelta
-import requests
+from datetime import timezone, timedelta
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from main import (
-    iniciar_navegador, acessar_aplicacao, criar_container, aguardar_container_ativo,
-    extrair_url_container, executar_k6, excluir_container_ate_sucesso, extrair_info_container
-)
+from main import executar_k6, aguardar_backend_pronto
+from provisionadores import criar_provisionador
+from pool_containers import PoolContainers
+from prometheus import obter_cliente
+from registro_execucao import RegistroExecucao
+from cache_execucoes import CacheExecucoes
+from teste_sequencial import extrair_valores_k6
+from varredura_adaptativa import executar_adaptativo
+from config_minima import limite_p95_k6
 
 CPU_MIN = 0.5
 RAM_MIN = 1024
@@ -29,153 +33,124 @@ def carregar_config():
     with open(os.path.join(os.path.dirname(__file__), '../config.json'), 'r') as f:
         return json.load(f)
 
-def consultar_media_prometheus_nome(prom_url, container_name, inicio, fim):
-    from datetime import timezone
-    inicio_utc = inicio.astimezone(timezone.utc)
-    fim_utc = fim.astimezone(timezone.utc)
-    intervalo = int((fim_utc - inicio_utc).total_seconds())
-    if intervalo < 1:
-        intervalo = 1
-    intervalo = max(intervalo, 30)
-    query_mem = f'avg_over_time(container_memory_usage_bytes{{name="{container_name}"}}[{intervalo}s])'
-    query_cpu_avg = f'avg_over_time(rate(container_cpu_usage_seconds_total{{name="{container_name}"}}[10s])[{intervalo}s:10s])'
-    query_cpu_inst = f'container_cpu_usage_seconds_total{{name="{container_name}"}}'
-    params = {
-        'query': query_mem,
-        'time': fim_utc.isoformat().replace('+00:00', 'Z')
+def montar_cenario(nome, stack, cpu, ram, k6_script):
+    return {
+        "nome": nome,
+        "backend": stack,
+        "backend_cpu": cpu,
+        "backend_ram": ram,
+        "db_cpu": CPU_MIN,  # Mantém fixo
+        "db_ram": RAM_MIN,  # Mantém fixo
+        "k6_script": k6_script
     }
-    mem_resp = requests.get(f"{prom_url}/api/v1/query", params=params).json()
-    params['query'] = query_cpu_avg
-    cpu_resp = requests.get(f"{prom_url}/api/v1/query", params=params).json()
-    cpu_val = float(cpu_resp['data']['result'][0]['value'][1]) if cpu_resp['data']['result'] else None
-    if cpu_val is None:
-        params['query'] = query_cpu_inst
-        cpu_inst_resp = requests.get(f"{prom_url}/api/v1/query", params=params).json()
-        cpu_val = float(cpu_inst_resp['data']['result'][0]['value'][1]) if cpu_inst_resp['data']['result'] else None
-    mem_val = float(mem_resp['data']['result'][0]['value'][1]) if mem_resp['data']['result'] else None
-    print(f"[Prometheus] Query name: {container_name} | Mem: {mem_val} | CPU: {cpu_val}")
-    return {'mem_avg_bytes': mem_val, 'cpu_avg_cores': cpu_val, 'name_used': container_name}
 
-def testar_configuracao(stack, cpu, ram, k6_script, page, app_url, repeticoes):
+
+def testar_configuracao(stack, cpu, ram, k6_script, provisionador, app_url, repeticoes, pool=None, cache=None):
     resultados = []
     nome_teste = os.path.splitext(os.path.basename(k6_script))[0]
     for i in range(repeticoes):
         nome = f"{i+1}.{nome_teste}-{stack}-{cpu}_{ram}"
-        cenario = {
-            "nome": nome,
-            "backend": stack,
-            "backend_cpu": cpu,
-            "backend_ram": ram,
-            "db_cpu": CPU_MIN,  # Mantém fixo
-            "db_ram": RAM_MIN,  # Mantém fixo
-            "k6_script": k6_script
-        }
-        inicio = datetime.now(TZ)
+        cenario = montar_cenario(nome, stack, cpu, ram, k6_script)
+        chave = cache.chave(cenario, i + 1) if cache is not None else None
+        anterior = cache.obter(chave) if cache is not None else None
+        if anterior is not None:
+            print(f"[CACHE] {nome}: execução já medida, reaproveitando o resultado")
+            resultados.append(extrair_valores_k6(anterior)['http_req_duration_p95'])
+            continue
+        registro = RegistroExecucao(cenario, tz=TZ)
+        registro.chave_cache = chave
         container_info = None
-        tentativas_id = 10
         try:
-            criar_container(page, cenario)
-            aguardar_container_ativo(page)
-            base_url = extrair_url_container(page)
-            for tentativa in range(tentativas_id):
-                try:
-                    container_info = extrair_info_container(page)
-                    if container_info and container_info.get('id'):
-                        break
-                except Exception:
-                    pass
-                time.sleep(2)
-            if not container_info or not container_info.get('id'):
-                fim = datetime.now(TZ)
-                duracao = (fim - inicio).total_seconds()
-                metrics_path = f"resultados/{nome}_metrics.json"
-                metrics_data = {
-                    'container_info': container_info,
-                    'inicio_teste': inicio.isoformat(sep=' '),
-                    'fim_teste': fim.isoformat(sep=' '),
-                    'duracao_segundos': duracao,
-                    'cenario': cenario,
-                    'erro': 'ID do container não encontrado após múltiplas tentativas.'
-                }
-                with open(metrics_path, 'w') as f:
-                    json.dump(metrics_data, f, indent=4, ensure_ascii=False)
-                resultados.append(None)
-                try:
-                    excluir_container_ate_sucesso(page)
-                except Exception:
-                    pass
-                continue
+            t_provisionamento = time.time()
+            if pool is not None:
+                provisionado = pool.obter(cenario)
+            else:
+                provisionado = provisionador.criar(cenario)
+            registro.marcar('provisionamento', t_provisionamento)
+            registro.registrar_provisionamento(provisionado)
+            base_url = provisionado['base_url']
+            container_info = provisionado['container_info']
+            tempos_fases = registro.tempos_fases
+            # Só inicia o K6 quando o backend de fato responde
+            t_health = time.time()
+            tempos_fases['health_segundos'] = aguardar_backend_pronto(base_url)
+            registro.marcar('health', t_health)
             prefix = container_info.get('id')
             backend_name = f"{prefix}-backend-1"
             database_name = f"{prefix}-database-1"
             output_path = f"resultados/{nome}.json"
-            metrics_path = f"resultados/{nome}_metrics.json"
-            erro_k6 = None
-            k6_metrics_summary = None
+            # A janela de medição (inicio/fim) é só a do K6, sem build nem health check
+            registro.iniciar()
+            t0 = time.monotonic()
             try:
-                executar_k6(k6_script, output_path, base_url=base_url, metrics_path=metrics_path)
+                executar_k6(k6_script, output_path, base_url=base_url, registro=registro)
             except Exception as e:
-                erro_k6 = str(e)
-            fim = datetime.now(TZ)
-            duracao = (fim - inicio).total_seconds()
+                registro.erro = str(e)
+            tempos_fases['k6_segundos'] = time.monotonic() - t0
+            registro.finalizar()
             config = carregar_config()
             prom_url = config.get('prometheus_url')
             prom_metrics_backend = None
             prom_metrics_database = None
             if prom_url and container_info and container_info.get('id'):
-                time.sleep(35)
-                prom_metrics_backend = consultar_media_prometheus_nome(prom_url, backend_name, inicio, fim)
-                prom_metrics_database = consultar_media_prometheus_nome(prom_url, database_name, inicio, fim)
-            try:
-                with open(metrics_path) as f:
-                    k6_metrics_summary = json.load(f)
-            except Exception:
-                k6_metrics_summary = None
-            metrics = {
-                "k6_summary": k6_metrics_summary,
-                "container_info": container_info,
-                "inicio_teste": inicio.isoformat(sep=' '),
-                "fim_teste": fim.isoformat(sep=' '),
-                "duracao_segundos": duracao,
-                "cenario": cenario,
-                "prometheus_metrics_backend": prom_metrics_backend,
-                "prometheus_metrics_database": prom_metrics_database
-            }
-            if erro_k6:
-                metrics["erro"] = erro_k6
-            with open(metrics_path, 'w') as f:
-                json.dump(metrics, f, indent=4, ensure_ascii=False)
-            resultados.append(None)
+                cliente = obter_cliente(prom_url)
+                # Espera só até o Prometheus ter amostras cobrindo o fim do teste (teto configurável)
+                tempos_fases['espera_prometheus_segundos'] = cliente.aguardar_dados(
+                    [backend_name, database_name], registro.fim, teto=config.get('prometheus_espera_max', 60))
+                # Backend e banco na mesma consulta (query_range com regex no nome)
+                prom = cliente.consultar_containers([backend_name, database_name], registro.inicio, registro.fim,
+                                                    fases=registro.fases)
+                prom_metrics_backend = dict(prom[backend_name], name_used=backend_name)
+                prom_metrics_database = dict(prom[database_name], name_used=database_name)
+            registro.adicionar('prometheus_metrics_backend', prom_metrics_backend)
+            registro.adicionar('prometheus_metrics_database', prom_metrics_database)
+            # p95 da repetição (None se o K6 não gerou summary)
+            resultados.append(extrair_valores_k6(registro.para_dict())['http_req_duration_p95'])
         except Exception as e:
-            fim = datetime.now(TZ)
-            duracao = (fim - inicio).total_seconds()
-            metrics_path = f"resultados/{nome}_metrics.json"
-            metrics_data = {
-                'container_info': container_info,
-                'inicio_teste': inicio.isoformat(sep=' '),
-                'fim_teste': fim.isoformat(sep=' '),
-                'duracao_segundos': duracao,
-                'cenario': cenario,
-                'erro': str(e)
-            }
-            with open(metrics_path, 'w') as f:
-                json.dump(metrics_data, f, indent=4, ensure_ascii=False)
+            registro.erro = str(e)
             resultados.append(None)
+            # Container com erro não é reaproveitado na próxima repetição
+            if pool is not None:
+                try:
+                    pool.descartar(cenario)
+                except Exception:
+                    pass
         finally:
-            try:
-                excluir_container_ate_sucesso(page)
-            except Exception:
-                pass
+            if pool is None:
+                t_remocao = time.time()
+                try:
+                    provisionador.excluir(container_info)
+                    registro.marcar('remocao', t_remocao)
+                except Exception:
+                    pass
+            registro.gravar()
     return resultados
 
-def testar_todas_combinacoes(stack, k6_script, page, app_url, repeticoes):
+def testar_todas_combinacoes(stack, k6_script, provisionador, app_url, repeticoes, pool=None, preconstruir=False, modo='grade',
+                             orcamento=None, cache=None):
+    configuracoes = []
     cpu = CPU_MIN
     while cpu <= CPU_MAX + 1e-6:
         ram = RAM_MIN
         while ram <= RAM_MAX + 1e-6:
-            testar_configuracao(stack, cpu, ram, k6_script, page, app_url, repeticoes)
+            configuracoes.append((cpu, ram))
             ram += RAM_INC
         cpu = round(cpu + CPU_INC, 2)
+    nome_teste = os.path.splitext(os.path.basename(k6_script))[0]
+    if modo == 'adaptativo':
+        # A próxima configuração depende do resultado da atual, então não há pré-build
+        executar_adaptativo(configuracoes,
+                            lambda cpu, ram: testar_configuracao(stack, cpu, ram, k6_script, provisionador, app_url, repeticoes,
+                                                                 pool=pool, cache=cache),
+                            k6_script, stack, orcamento,
+                            limite_p95=limite_p95_k6(k6_script))
+        return
+    for idx, (cpu, ram) in enumerate(configuracoes):
+        # Constrói o container da próxima configuração enquanto o K6 da atual roda
+        if pool is not None and preconstruir and idx + 1 < len(configuracoes):
+            prox_cpu, prox_ram = configuracoes[idx + 1]
+            pool.preconstruir(montar_cenario(f"{nome_teste}-{stack}-{prox_cpu}_{prox_ram}", stack, prox_cpu, prox_ram, k6_script))
+        testar_configuracao(stack, cpu, ram, k6_script, provisionador, app_url, repeticoes, pool=pool, cache=cache)
 
 def main():
     parser = argparse.ArgumentParser()
@@ -183,18 +158,30 @@ def main():
     parser.add_argument('--stacks', required=True, help='Lista de stacks separadas por vírgula')
     parser.add_argument('--k6_script', required=True, help='Caminho do script K6')
     parser.add_argument('--repeticoes', type=int, default=5, help='Quantidade de repetições por configuração')
+    parser.add_argument('--provisionador', choices=['playwright', 'api'], default='playwright', help='Como criar/remover containers: interface (playwright) ou API do orquestrador (api)')
+    parser.add_argument('--orquestrador_url', default=None, help='URL da API do orquestrador (provisionador api)')
+    parser.add_argument('--reutilizar', action='store_true', help='Mantém o container de cada configuração entre as repetições')
+    parser.add_argument('--reset_hook', default=None, help='Comando de reset do banco entre repetições (campos: {id}, {base_url}, {backend}, {database})')
+    parser.add_argument('--preconstruir', action='store_true', help='Com --reutilizar, constrói o container da próxima configuração durante o teste atual (somente provisionador api)')
+    parser.add_argument('--modo', choices=['grade', 'adaptativo'], default='grade', help='grade: todas as combinações; adaptativo: escolhe as configurações por um modelo do p95')
+    parser.add_argument('--orcamento', type=int, default=12, help='Quantidade de configurações testadas no modo adaptativo')
+    parser.add_argument('--retomar', action='store_true', help='Reaproveita as repetições já medidas com o mesmo script K6, configuração e ambiente (ex.: após uma queda)')
     args = parser.parse_args()
     stacks = [s.strip() for s in args.stacks.split(',')]
 
-    from playwright.sync_api import sync_playwright
-    with sync_playwright() as playwright:
-        browser = iniciar_navegador(playwright)
-        context = browser.new_context()
-        page = context.new_page()
-        acessar_aplicacao(page, args.app_url)
-        for stack in stacks:
-            testar_todas_combinacoes(stack, args.k6_script, page, args.app_url, args.repeticoes)
-        browser.close()
+    with criar_provisionador(args.provisionador, args.app_url, args.orquestrador_url) as provisionador:
+        pool = PoolContainers(provisionador, args.reset_hook) if args.reutilizar else None
+        # O coletor e o script entram na chave: um _metrics.json de outra varredura não tem as mesmas seções
+        cache = CacheExecucoes(args.app_url, retomar=args.retomar,
+                               extras={'coletor': 'prometheus', 'script': os.path.basename(__file__),
+                                       'abortar_cedo': False})
+        try:
+            for stack in stacks:
+                testar_todas_combinacoes(stack, args.k6_script, provisionador, args.app_url, args.repeticoes, pool=pool, preconstruir=args.preconstruir,
+                                         modo=args.modo, orcamento=args.orcamento, cache=cache)
+        finally:
+            if pool is not None:
+                pool.fechar()
 
 if __name__ == "__main__":
     main()
@@ -5,20 +5,24 @@
 import os
 import sys
 import time
-import json
 import argparse
 from statistics import mean
-from datetime import datetime, timezone, timedelta
+from datetime import timezone, timedelta
 import paramiko
 import threading
 import re
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from main import (
-    iniciar_navegador, acessar_aplicacao, criar_container, aguardar_container_ativo,
-    extrair_url_container, executar_k6, excluir_container_ate_sucesso, extrair_info_container
-)
+from main import executar_k6, aguardar_backend_pronto
+from provisionadores import criar_provisionador
+from pool_containers import PoolContainers
+from registro_execucao import RegistroExecucao
+from cache_execucoes import CacheExecucoes
+from coleta_ssh import ColetorStreamSSH, series_cgroup, memoria_docker_mib, medias_por_fase
+from teste_sequencial import extrair_valores_k6
+from varredura_adaptativa import executar_adaptativo
+from config_minima import limite_p95_k6
 
 CPU_MIN = 1
 RAM_MIN = 1024
@@ -29,11 +33,14 @@ RAM_MAX = 2048
 TZ = timezone(timedelta(hours=-3))  # UTC-3
 
 class SSHMetrics:
-    def __init__(self, host, user, key_path=None, password=None):
+    def __init__(self, host, user, key_path=None, password=None, modo='comandos', intervalo_stream=0.5):
+        # modo 'comandos': top/free/docker stats a cada intervalo; 'stream': agente remoto único (coleta_ssh)
         self.host = host
         self.user = user
         self.key_path = key_path
         self.password = password
+        self.modo = modo
+        self.intervalo_stream = intervalo_stream
         self.ssh = None
 
     def connect(self):
@@ -51,9 +58,15 @@ class SSHMetrics:
     def start_parallel_collection(self, backend_name, db_name, interval=2):
         self._collecting = True
         self._samples = []
+        if self.modo == 'stream':
+            self._coletor = ColetorStreamSSH(self.ssh, intervalo=self.intervalo_stream)
+            self._coletor.iniciar(backend_name, db_name)
+            return
         import re
         def collect():
             while self._collecting:
+                # A amostra vale para o intervalo entre o top e o fim do docker stats (que bloqueia ~1-2 s)
+                t_inicio = time.time()
                 # Coleta CPU do host (robusto, uso real = 100 - idle)
                 stdin, stdout, stderr = self.ssh.exec_command("LANG=C top -bn1 | grep 'Cpu(s)'")
                 cpu_info = stdout.read().decode()
@@ -100,11 +113,8 @@ class SSHMetrics:
                     if len(parts) >= 3:
                         name = parts[0]
                         cpu = parts[1].replace('%','').replace(',','.')
-                        # Extrai apenas o valor numérico em MiB da string "35.33MiB / 1GiB"
-                        mem_match = re.match(r'([0-9.]+)MiB', parts[2])
-                        mem = None
-                        if mem_match:
-                            mem = float(mem_match.group(1))
+                        # Converte o uso da string "35.33MiB / 1GiB" para MiB, respeitando a unidade (KiB/MiB/GiB)
+                        mem = memoria_docker_mib(parts[2])
                         try:
                             cpu = float(cpu)
                         except Exception:
@@ -116,6 +126,7 @@ class SSHMetrics:
                             db_cpu = cpu
                             db_mem = mem
                 self._samples.append({
+                    'instante': (t_inicio + time.time()) / 2,
                     'host_cpu': cpu_val,
                     'host_mem': mem_val,
                     'backend_cpu': backend_cpu,
@@ -129,7 +140,10 @@ class SSHMetrics:
 
     def stop_parallel_collection(self):
         self._collecting = False
-        self._thread.join()
+        if self.modo == 'stream':
+            self._samples = self._coletor.parar()
+        else:
+            self._thread.join()
         def avg(lst):
             vals = [v for v in lst if v is not None]
             return sum(vals)/len(vals) if vals else None
@@ -141,6 +155,7 @@ class SSHMetrics:
         db_cpu = [s['db_cpu'] for s in samples]
         db_mem = [s['db_mem'] for s in samples]
         return {
+            "instantes": [s.get('instante') for s in samples],
             "host": {
                 "cpu": host_cpu,
                 "memoria": host_mem,
@@ -152,6 +167,8 @@ class SSHMetrics:
             "backend": {
                 "cpu": backend_cpu,
                 "memoria": backend_mem,
+                # Métricas de cgroup v2 (coleta stream): CPU consumida/throttling, memória em bytes, I/O e PSI
+                "cgroup": series_cgroup(samples, 'backend'),
                 "media": {
                     "cpu": avg(backend_cpu),
                     "memoria": avg(backend_mem)
@@ -160,6 +177,7 @@ class SSHMetrics:
             "banco_de_dados": {
                 "cpu": db_cpu,
                 "memoria": db_mem,
+                "cgroup": series_cgroup(samples, 'db'),
                 "media": {
                     "cpu": avg(db_cpu),
                     "memoria": avg(db_mem)
@@ -167,126 +185,121 @@ class SSHMetrics:
             }
         }
 
-def testar_configuracao(stack, cpu, ram, k6_script, page, app_url, repeticoes, ssh_metrics):
+def montar_cenario(nome, stack, cpu, ram, k6_script):
+    return {
+        "nome": nome,
+        "backend": stack,
+        "backend_cpu": cpu,
+        "backend_ram": ram,
+        "db_cpu": CPU_MIN,  # Mantém fixo
+        "db_ram": RAM_MIN,  # Mantém fixo
+        "k6_script": k6_script
+    }
+
+
+def testar_configuracao(stack, cpu, ram, k6_script, provisionador, app_url, repeticoes, ssh_metrics, pool=None, cache=None):
     resultados = []
     nome_teste = os.path.splitext(os.path.basename(k6_script))[0]
     for i in range(repeticoes):
         nome = f"{i+1}.{nome_teste}-{stack}-{cpu}_{ram}"
-        cenario = {
-            "nome": nome,
-            "backend": stack,
-            "backend_cpu": cpu,
-            "backend_ram": ram,
-            "db_cpu": CPU_MIN,  # Mantém fixo
-            "db_ram": RAM_MIN,  # Mantém fixo
-            "k6_script": k6_script
-        }
-        inicio = datetime.now(TZ)
+        cenario = montar_cenario(nome, stack, cpu, ram, k6_script)
+        chave = cache.chave(cenario, i + 1) if cache is not None else None
+        anterior = cache.obter(chave) if cache is not None else None
+        if anterior is not None:
+            print(f"[CACHE] {nome}: execução já medida, reaproveitando o resultado")
+            resultados.append(extrair_valores_k6(anterior)['http_req_duration_p95'])
+            continue
+        registro = RegistroExecucao(cenario, tz=TZ)
+        registro.chave_cache = chave
         container_info = None
-        tentativas_id = 10
         try:
-            criar_container(page, cenario)
-            aguardar_container_ativo(page)
-            base_url = extrair_url_container(page)
-            for tentativa in range(tentativas_id):
-                try:
-                    container_info = extrair_info_container(page)
-                    if container_info and container_info.get('id'):
-                        break
-                except Exception:
-                    pass
-                time.sleep(2)
-            if not container_info or not container_info.get('id'):
-                fim = datetime.now(TZ)
-                duracao = (fim - inicio).total_seconds()
-                metrics_path = f"resultados/{nome}_metrics.json"
-                metrics_data = {
-                    'container_info': container_info,
-                    'inicio_teste': inicio.isoformat(sep=' '),
-                    'fim_teste': fim.isoformat(sep=' '),
-                    'duracao_segundos': duracao,
-                    'cenario': cenario,
-                    'erro': 'ID do container não encontrado após múltiplas tentativas.'
-                }
-                with open(metrics_path, 'w') as f:
-                    json.dump(metrics_data, f, indent=4, ensure_ascii=False)
-                resultados.append(None)
-                try:
-                    excluir_container_ate_sucesso(page)
-                except Exception:
-                    pass
-                continue
+            t_provisionamento = time.time()
+            if pool is not None:
+                provisionado = pool.obter(cenario)
+            else:
+                provisionado = provisionador.criar(cenario)
+            registro.marcar('provisionamento', t_provisionamento)
+            registro.registrar_provisionamento(provisionado)
+            base_url = provisionado['base_url']
+            container_info = provisionado['container_info']
+            tempos_fases = registro.tempos_fases
+            # Só inicia o K6 quando o backend de fato responde
+            t_health = time.time()
+            tempos_fases['health_segundos'] = aguardar_backend_pronto(base_url)
+            registro.marcar('health', t_health)
             prefix = container_info.get('id')
             backend_name = f"{prefix}-backend-1"
             database_name = f"{prefix}-database-1"
             ssh_metrics.start_parallel_collection(backend_name, database_name, interval=2)
             output_path = f"resultados/{nome}.json"
-            metrics_path = f"resultados/{nome}_metrics.json"
-            erro_k6 = None
-            k6_metrics_summary = None
+            # A janela de medição (inicio/fim) é só a do K6, sem build nem health check
+            registro.iniciar()
+            t0 = time.monotonic()
             try:
-                executar_k6(k6_script, output_path, base_url=base_url, metrics_path=metrics_path)
+                executar_k6(k6_script, output_path, base_url=base_url, registro=registro)
             except Exception as e:
-                erro_k6 = str(e)
+                registro.erro = str(e)
+            tempos_fases['k6_segundos'] = time.monotonic() - t0
             metrics_json = ssh_metrics.stop_parallel_collection()
-            fim = datetime.now(TZ)
-            duracao = (fim - inicio).total_seconds()
-            try:
-                with open(metrics_path) as f:
-                    k6_metrics_summary = json.load(f)
-            except Exception:
-                k6_metrics_summary = None
-            metrics = {
-                "host": metrics_json.get("host", {}),
-                "backend": metrics_json.get("backend", {}),
-                "banco_de_dados": metrics_json.get("banco_de_dados", {}),
-                "media": {
-                    "host": metrics_json.get("host", {}).get("media", {}),
-                    "backend": metrics_json.get("backend", {}).get("media", {}),
-                    "banco_de_dados": metrics_json.get("banco_de_dados", {}).get("media", {})
-                },
-                "k6_summary": k6_metrics_summary,
-                "container_info": container_info,
-                "inicio_teste": inicio.isoformat(sep=' '),
-                "fim_teste": fim.isoformat(sep=' '),
-                "duracao_segundos": duracao,
-                "cenario": cenario
-            }
-            if erro_k6:
-                metrics["erro"] = erro_k6
-            with open(metrics_path, 'w') as f:
-                json.dump(metrics, f, indent=4, ensure_ascii=False)
-            resultados.append(None)
+            registro.finalizar()
+            registro.adicionar("host", metrics_json.get("host", {}))
+            registro.adicionar("backend", metrics_json.get("backend", {}))
+            registro.adicionar("banco_de_dados", metrics_json.get("banco_de_dados", {}))
+            registro.adicionar("instantes_ssh", metrics_json.get("instantes"))
+            registro.adicionar("media", {
+                "host": metrics_json.get("host", {}).get("media", {}),
+                "backend": metrics_json.get("backend", {}).get("media", {}),
+                "banco_de_dados": metrics_json.get("banco_de_dados", {}).get("media", {})
+            })
+            # Médias só dentro de cada fase do K6 (ex.: 'estavel', sem setup nem rampa)
+            registro.adicionar("media_fases", medias_por_fase(metrics_json, registro.fases))
+            # p95 da repetição (None se o K6 não gerou summary)
+            resultados.append(extrair_valores_k6(registro.para_dict())['http_req_duration_p95'])
         except Exception as e:
-            fim = datetime.now(TZ)
-            duracao = (fim - inicio).total_seconds()
-            metrics_path = f"resultados/{nome}_metrics.json"
-            metrics_data = {
-                'container_info': container_info,
-                'inicio_teste': inicio.isoformat(sep=' '),
-                'fim_teste': fim.isoformat(sep=' '),
-                'duracao_segundos': duracao,
-                'cenario': cenario,
-                'erro': str(e)
-            }
-            with open(metrics_path, 'w') as f:
-                json.dump(metrics_data, f, indent=4, ensure_ascii=False)
+            registro.erro = str(e)
             resultados.append(None)
+            # Container com erro não é reaproveitado na próxima repetição
+            if pool is not None:
+                try:
+                    pool.descartar(cenario)
+                except Exception:
+                    pass
         finally:
-            try:
-                excluir_container_ate_sucesso(page)
-            except Exception:
-                pass
+            if pool is None:
+                t_remocao = time.time()
+                try:
+                    provisionador.excluir(container_info)
+                    registro.marcar('remocao', t_remocao)
+                except Exception:
+                    pass
+            registro.gravar()
     return resultados
 
-def testar_todas_combinacoes(stack, k6_script, page, app_url, repeticoes, ssh_metrics):
+def testar_todas_combinacoes(stack, k6_script, provisionador, app_url, repeticoes, ssh_metrics, pool=None, preconstruir=False, modo='grade',
+                             orcamento=None, cache=None):
+    configuracoes = []
     cpu = CPU_MIN
     while cpu <= CPU_MAX + 1e-6:
         ram = RAM_MIN
         while ram <= RAM_MAX + 1e-6:
-            testar_configuracao(stack, cpu, ram, k6_script, page, app_url, repeticoes, ssh_metrics)
+            configuracoes.append((cpu, ram))
             ram += RAM_INC
         cpu = round(cpu + CPU_INC, 2)
+    nome_teste = os.path.splitext(os.path.basename(k6_script))[0]
+    if modo == 'adaptativo':
+        # A próxima configuração depende do resultado da atual, então não há pré-build
+        executar_adaptativo(configuracoes,
+                            lambda cpu, ram: testar_configuracao(stack, cpu, ram, k6_script, provisionador, app_url, repeticoes, ssh_metrics,
+                                                                 pool=pool, cache=cache),
+                            k6_script, stack, orcamento,
+                            limite_p95=limite_p95_k6(k6_script))
+        return
+    for idx, (cpu, ram) in enumerate(configuracoes):
+        # Constrói o container da próxima configuração enquanto o K6 da atual roda
+        if pool is not None and preconstruir and idx + 1 < len(configuracoes):
+            prox_cpu, prox_ram = configuracoes[idx + 1]
+            pool.preconstruir(montar_cenario(f"{nome_teste}-{stack}-{prox_cpu}_{prox_ram}", stack, prox_cpu, prox_ram, k6_script))
+        testar_configuracao(stack, cpu, ram, k6_script, provisionador, app_url, repeticoes, ssh_metrics, pool=pool, cache=cache)
 
 def main():
     import json as jsonlib
@@ -295,6 +308,16 @@ def main():
     parser.add_argument('--stacks', required=True, help='Lista de stacks separadas por vírgula')
     parser.add_argument('--k6_script', required=True, help='Caminho do script K6')
     parser.add_argument('--repeticoes', type=int, default=5, help='Quantidade de repetições por configuração')
+    parser.add_argument('--provisionador', choices=['playwright', 'api'], default='playwright', help='Como criar/remover containers: interface (playwright) ou API do orquestrador (api)')
+    parser.add_argument('--orquestrador_url', default=None, help='URL da API do orquestrador (provisionador api)')
+    parser.add_argument('--reutilizar', action='store_true', help='Mantém o container de cada configuração entre as repetições')
+    parser.add_argument('--reset_hook', default=None, help='Comando de reset do banco entre repetições (campos: {id}, {base_url}, {backend}, {database})')
+    parser.add_argument('--preconstruir', action='store_true', help='Com --reutilizar, constrói o container da próxima configuração durante o teste atual (somente provisionador api)')
+    parser.add_argument('--coleta', choices=['comandos', 'stream'], default='comandos', help='comandos: top/free/docker stats a cada 2 s; stream: agente remoto único lendo /proc e cgroups')
+    parser.add_argument('--intervalo_coleta', type=float, default=0.5, help='Intervalo de amostragem (s) da coleta stream')
+    parser.add_argument('--modo', choices=['grade', 'adaptativo'], default='grade', help='grade: todas as combinações; adaptativo: escolhe as configurações por um modelo do p95')
+    parser.add_argument('--orcamento', type=int, default=12, help='Quantidade de configurações testadas no modo adaptativo')
+    parser.add_argument('--retomar', action='store_true', help='Reaproveita as repetições já medidas com o mesmo script K6, configuração e ambiente (ex.: após uma queda)')
     parser.add_argument('--ssh_config', default='ssh_config.json', help='Arquivo JSON com dados de conexão SSH')
     args = parser.parse_args()
     stacks = [s.strip() for s in args.stacks.split(',')]
@@ -307,17 +330,22 @@ def main():
     ssh_key = ssh_conf.get('ssh_key')
     ssh_password = ssh_conf.get('ssh_password')
 
-    from playwright.sync_api import sync_playwright
-    ssh_metrics = SSHMetrics(ssh_host, ssh_user, key_path=ssh_key, password=ssh_password)
+    ssh_metrics = SSHMetrics(ssh_host, ssh_user, key_path=ssh_key, password=ssh_password,
+                             modo=args.coleta, intervalo_stream=args.intervalo_coleta)
     ssh_metrics.connect()
-    with sync_playwright() as playwright:
-        browser = iniciar_navegador(playwright)
-        context = browser.new_context()
-        page = context.new_page()
-        acessar_aplicacao(page, args.app_url)
-        for stack in stacks:
-            testar_todas_combinacoes(stack, args.k6_script, page, args.app_url, args.repeticoes, ssh_metrics)
-        browser.close()
+    with criar_provisionador(args.provisionador, args.app_url, args.orquestrador_url) as provisionador:
+        pool = PoolContainers(provisionador, args.reset_hook) if args.reutilizar else None
+        # O coletor e o script entram na chave: um _metrics.json de outra varredura não tem as mesmas seções
+        cache = CacheExecucoes(args.app_url, retomar=args.retomar,
+                               extras={'coletor': f'ssh_{args.coleta}', 'script': os.path.basename(__file__),
+                                       'abortar_cedo': False})
+        try:
+            for stack in stacks:
+                testar_todas_combinacoes(stack, args.k6_script, provisionador, args.app_url, args.repeticoes, ssh_metrics, pool=pool, preconstruir=args.preconstruir,
+                                         modo=args.modo, orcamento=args.orcamento, cache=cache)
+        finally:
+            if pool is not None:
+                pool.fechar()
     ssh_metrics.close()
 
 if __name__ == "__main__":
@@ -9,16 +9,22 @@ import time
 import json
 import argparse
 from statistics import mean
-from datetime import datetime, timezone, timedelta
-import requests
+from datetime import timezone, timedelta
 import re
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from main import (
-    iniciar_navegador, acessar_aplicacao, criar_container, aguardar_container_ativo,
-    extrair_url_container, executar_k6, excluir_container_ate_sucesso, extrair_info_container
-)
+from main import executar_k6, aguardar_backend_pronto
+from k6_stream import MonitorK6, criterio_limites_estourados
+from cenarios_k6 import (eh_cenario, carregar_cenario, limites_planos, thresholds_cenario, valor_medido, atende,
+                         LIMITE_DESCARTE)
+from provisionadores import criar_provisionador
+from pool_containers import PoolContainers
+from prometheus import obter_cliente, metricas_fase
+from registro_execucao import RegistroExecucao
+from cache_execucoes import CacheExecucoes
+from teste_sequencial import DecisorSequencial, extrair_valores_k6
+from analise_repeticoes import analisar_execucoes, metricas_execucao
 
 # Parâmetros globais de limites e incrementos
 
@@ -34,6 +40,9 @@ CPU_MAX = 1
 RAM_MAX = 1024
 
 LIMITE_HTTP_REQ_FAILED = 0.01  # 1%
+# Gargalo: uso médio acima desta fração do limite configurado (CPU em cores, como cpu_avg_cores; memória em bytes)
+LIMITE_GARGALO_CPU = 0.85
+LIMITE_GARGALO_MEM = 0.8
 
 TZ = timezone(timedelta(hours=-3))  # UTC-3
 
@@ -43,62 +52,10 @@ def carregar_config():
         return json.load(f)
 
 
-def consultar_media_prometheus(prom_url, container_id, inicio, fim):
-    from datetime import timezone
-    inicio_utc = inicio.astimezone(timezone.utc)
-    fim_utc = fim.astimezone(timezone.utc)
-    intervalo = int((fim_utc - inicio_utc).total_seconds())
-    if intervalo < 1:
-        intervalo = 1
-    clean_id = container_id.replace('-', '')
-    prom_id = f"/system.slice/docker-{clean_id}.scope"
-    query_mem = f'avg_over_time(container_memory_usage_bytes{{id="{prom_id}"}}[{intervalo}s])'
-    query_cpu = f'avg_over_time(rate(container_cpu_usage_seconds_total{{id="{prom_id}"}}[1m])[{intervalo}s:1m])'
-    params = {
-        'query': query_mem,
-        'time': fim_utc.isoformat().replace('+00:00', 'Z')
-    }
-    mem_resp = requests.get(f"{prom_url}/api/v1/query", params=params).json()
-    params['query'] = query_cpu
-    cpu_resp = requests.get(f"{prom_url}/api/v1/query", params=params).json()
-    mem_val = float(mem_resp['data']['result'][0]['value'][1]) if mem_resp['data']['result'] else None
-    cpu_val = float(cpu_resp['data']['result'][0]['value'][1]) if cpu_resp['data']['result'] else None
-    print(f"[Prometheus] Query id: {prom_id} | Mem: {mem_val} | CPU: {cpu_val}")
-    return {'mem_avg_bytes': mem_val, 'cpu_avg_cores': cpu_val, 'id_used': prom_id}
-
-
-def consultar_media_prometheus_nome(prom_url, container_name, inicio, fim):
-    from datetime import timezone
-    inicio_utc = inicio.astimezone(timezone.utc)
-    fim_utc = fim.astimezone(timezone.utc)
-    intervalo = int((fim_utc - inicio_utc).total_seconds())
-    if intervalo < 1:
-        intervalo = 1
-    # Garante um intervalo mínimo de 30s para a média
-    intervalo = max(intervalo, 30)
-    query_mem = f'avg_over_time(container_memory_usage_bytes{{name="{container_name}"}}[{intervalo}s])'
-    # Para CPU, tenta média e valor instantâneo
-    query_cpu_avg = f'avg_over_time(rate(container_cpu_usage_seconds_total{{name="{container_name}"}}[10s])[{intervalo}s:10s])'
-    query_cpu_inst = f'container_cpu_usage_seconds_total{{name="{container_name}"}}'
-    params = {
-        'query': query_mem,
-        'time': fim_utc.isoformat().replace('+00:00', 'Z')
-    }
-    mem_resp = requests.get(f"{prom_url}/api/v1/query", params=params).json()
-    params['query'] = query_cpu_avg
-    cpu_resp = requests.get(f"{prom_url}/api/v1/query", params=params).json()
-    cpu_val = float(cpu_resp['data']['result'][0]['value'][1]) if cpu_resp['data']['result'] else None
-    # Se não conseguir média, tenta valor instantâneo
-    if cpu_val is None:
-        params['query'] = query_cpu_inst
-        cpu_inst_resp = requests.get(f"{prom_url}/api/v1/query", params=params).json()
-        cpu_val = float(cpu_inst_resp['data']['result'][0]['value'][1]) if cpu_inst_resp['data']['result'] else None
-    mem_val = float(mem_resp['data']['result'][0]['value'][1]) if mem_resp['data']['result'] else None
-    print(f"[Prometheus] Query name: {container_name} | Mem: {mem_val} | CPU: {cpu_val}")
-    return {'mem_avg_bytes': mem_val, 'cpu_avg_cores': cpu_val, 'name_used': container_name}
-
-
 def extrair_thresholds_k6(k6_script_path):
+    # Cenário JSON: thresholds exatos, sem regex
+    if eh_cenario(k6_script_path):
+        return limites_planos(carregar_cenario(k6_script_path))
     with open(k6_script_path, 'r') as f:
         content = f.read()
     thresholds = {}
@@ -107,238 +64,337 @@ def extrair_thresholds_k6(k6_script_path):
     if m:
         thresholds['http_req_failed'] = float(m.group(1))
     # Extrai http_req_duration: ['p(95)<VALOR']
-    m = re.search(r"http_req_duration\s*:\s*\[\s*'p\\(95\\)<([0-9.]+)'", content)
+    m = re.search(r"http_req_duration\s*:\s*\[\s*'p\(95\)<([0-9.]+)'", content)
     if m:
         thresholds['http_req_duration_p95'] = float(m.group(1))
     return thresholds
 
 
-def testar_configuracao(stack, cpu, ram, k6_script, page, app_url, repeticoes):
+def limites_k6(k6_script_path):
+    """
+    Thresholds do script como dados (cenarios_k6.thresholds_cenario). Cenário JSON: exatamente os do cenário, com
+    operador; script .js: os extraídos por regex, com os padrões de sempre (http_req_failed < 0.01, p95 < 500 ms).
+    """
+    if eh_cenario(k6_script_path):
+        return thresholds_cenario(carregar_cenario(k6_script_path))
+    planos = extrair_thresholds_k6(k6_script_path)
+    return thresholds_cenario({'thresholds': {
+        'http_req_failed': [f"rate<{planos.get('http_req_failed', 0.01)}"],
+        'http_req_duration': [f"p(95)<{planos.get('http_req_duration_p95', 500)}"],
+    }})
+
+
+def limite_p95_k6(k6_script_path):
+    """
+    Limite de p95 (ms) com que o script é julgado (o mesmo de limites_k6), usado como alvo da varredura adaptativa.
+    None se o cenário JSON não tiver threshold de p95.
+    """
+    limite = limites_k6(k6_script_path).get('http_req_duration_p95')
+    return limite['valor'] if limite else None
+
+
+def montar_cenario(nome, stack, cpu, ram, k6_script):
+    return {
+        "nome": nome,
+        "backend": stack,
+        "backend_cpu": cpu,
+        "backend_ram": ram,
+        "db_cpu": cpu,
+        "db_ram": ram,
+        "k6_script": k6_script
+    }
+
+
+def testar_configuracao(stack, cpu, ram, k6_script, provisionador, app_url, repeticoes, pool=None, criterio_aborto=None,
+                        decisor=None, cache=None):
+    # Com decisor (teste sequencial), para de repetir assim que o resultado estiver estatisticamente decidido
     resultados = []
     nome_teste = os.path.splitext(os.path.basename(k6_script))[0]
     for i in range(repeticoes):
         nome = f"{i+1}.{nome_teste}-{stack}-{cpu}_{ram}"
-        cenario = {
-            "nome": nome,
-            "backend": stack,
-            "backend_cpu": cpu,
-            "backend_ram": ram,
-            "db_cpu": cpu,
-            "db_ram": ram,
-            "k6_script": k6_script
-        }
-        inicio = datetime.now(TZ)
-        container_info = None
-        tentativas_id = 10
-        try:
-            criar_container(page, cenario)
-            aguardar_container_ativo(page)
-            base_url = extrair_url_container(page)
-            for tentativa in range(tentativas_id):
+        cenario = montar_cenario(nome, stack, cpu, ram, k6_script)
+        chave = cache.chave(cenario, i + 1) if cache is not None else None
+        metrics = cache.obter(chave) if cache is not None else None
+        if metrics is not None:
+            print(f"[CACHE] {nome}: execução já medida, reaproveitando o resultado")
+            resultados.append(extrair_valores_k6(metrics)['http_req_failed'])
+        else:
+            registro = RegistroExecucao(cenario, tz=TZ)
+            registro.chave_cache = chave
+            container_info = None
+            try:
+                t_provisionamento = time.time()
+                if pool is not None:
+                    provisionado = pool.obter(cenario)
+                else:
+                    provisionado = provisionador.criar(cenario)
+                registro.marcar('provisionamento', t_provisionamento)
+                registro.registrar_provisionamento(provisionado)
+                base_url = provisionado['base_url']
+                container_info = provisionado['container_info']
+                tempos_fases = registro.tempos_fases
+                # Só inicia o K6 quando o backend de fato responde
+                t_health = time.time()
+                tempos_fases['health_segundos'] = aguardar_backend_pronto(base_url)
+                registro.marcar('health', t_health)
+                output_path = f"resultados/{nome}.json"
+                # A janela de medição (inicio/fim) é só a do K6, sem build nem health check
+                registro.iniciar()
+                t0 = time.monotonic()
                 try:
-                    container_info = extrair_info_container(page)
-                    if container_info and container_info.get('id'):
-                        break
-                except Exception:
-                    pass
-                time.sleep(2)  # SLEEP: espera entre tentativas de extrair info do container
-            if not container_info or not container_info.get('id'):
-                fim = datetime.now(TZ)
-                duracao = (fim - inicio).total_seconds()
-                metrics_path = f"resultados/{nome}_metrics.json"
-                metrics_data = {
-                    'container_info': container_info,
-                    'inicio_teste': inicio.isoformat(sep=' '),
-                    'fim_teste': fim.isoformat(sep=' '),
-                    'duracao_segundos': duracao,
-                    'cenario': cenario,
-                    'erro': 'ID do container não encontrado após múltiplas tentativas.'
-                }
-                with open(metrics_path, 'w') as f:
-                    json.dump(metrics_data, f, indent=4, ensure_ascii=False)
+                    # Com criterio_aborto, acompanha o K6 ao vivo e interrompe a execução se os limites estourarem
+                    monitor = MonitorK6(criterio_aborto=criterio_aborto) if criterio_aborto else None
+                    executar_k6(k6_script, output_path, base_url=base_url, registro=registro, monitor=monitor)
+                except Exception as e:
+                    registro.erro = str(e)
+                tempos_fases['k6_segundos'] = time.monotonic() - t0
+                registro.finalizar()
+                # Sempre tenta coletar métricas do Prometheus, mesmo se o K6 falhar
+                config = carregar_config()
+                prom_url = config.get('prometheus_url')
+                prom_metrics_backend = None
+                prom_metrics_database = None
+                if prom_url and container_info and container_info.get('id'):
+                    prefix = container_info.get('id')
+                    backend_name = f"{prefix}-backend-1"
+                    database_name = f"{prefix}-database-1"
+                    cliente = obter_cliente(prom_url)
+                    # Espera só até o Prometheus ter amostras cobrindo o fim do teste (teto configurável)
+                    tempos_fases['espera_prometheus_segundos'] = cliente.aguardar_dados(
+                        [backend_name, database_name], registro.fim, teto=config.get('prometheus_espera_max', 60))
+                    # Backend e banco na mesma consulta (query_range com regex no nome)
+                    prom = cliente.consultar_containers([backend_name, database_name], registro.inicio, registro.fim,
+                                                        fases=registro.fases)
+                    prom_metrics_backend = dict(prom[backend_name], name_used=backend_name)
+                    prom_metrics_database = dict(prom[database_name], name_used=database_name)
+                registro.adicionar('prometheus_metrics_backend', prom_metrics_backend)
+                registro.adicionar('prometheus_metrics_database', prom_metrics_database)
+                # Se o K6 rodou, pega a métrica de falha, senão None
+                m = registro.k6.get('k6_summary') or {}
+                http_req_failed = None
+                if "metrics" in m and isinstance(m["metrics"], dict):
+                    http_req_failed = m["metrics"].get("http_req_failed", {}).get("value", None)
+                resultados.append(http_req_failed)
+            except Exception as e:
+                registro.erro = str(e)
                 resultados.append(None)
+                # Container com erro não é reaproveitado na próxima repetição
+                if pool is not None:
+                    try:
+                        pool.descartar(cenario)
+                    except Exception:
+                        pass
+            finally:
+                if pool is None:
+                    t_remocao = time.time()
+                    try:
+                        provisionador.excluir(container_info)
+                        registro.marcar('remocao', t_remocao)
+                    except Exception:
+                        pass
+                registro.gravar()
+            metrics = registro.para_dict()
+        if decisor is not None and decisor.registrar(metrics) and i + 1 < repeticoes:
+            avaliacao = decisor.avaliar()
+            print(f"[SEQUENCIAL] {stack} CPU={cpu} RAM={ram}: {avaliacao['decisao']} após {i+1} repetição(ões) "
+                  f"(confiança={avaliacao['confianca']}). Pulando as demais.")
+            break
+    return resultados
+
+
+def avaliar_configuracao(stack, cpu, ram, k6_script, provisionador, app_url, repeticoes, pool=None, criterio_aborto=None,
+                         sequencial=False, confianca=0.95, estrategia='linear', cache=None):
+    """
+    Executa as repetições de uma configuração, resume os resultados (K6 e Prometheus), grava a linha
+    no log resultados/minimo_<teste>_<stack>.log e retorna o resumo com 'passou' e os gargalos encontrados.
+    """
+    limites = limites_k6(k6_script)
+    thresholds = {nome: limite['valor'] for nome, limite in limites.items()}
+    # Teste sequencial e análise das repetições só tratam limites superiores (valor < limite)
+    limites_superiores = {nome: limite['valor'] for nome, limite in limites.items()
+                          if nome in ('http_req_failed', 'http_req_duration_p95') and limite['operador'] in ('<', '<=')}
+    nome_teste = os.path.splitext(os.path.basename(k6_script))[0]
+    decisor = None
+    if sequencial:
+        decisor = DecisorSequencial(limites_superiores, confianca=confianca)
+    resultados = testar_configuracao(stack, cpu, ram, k6_script, provisionador, app_url, repeticoes, pool=pool,
+                                     criterio_aborto=criterio_aborto, decisor=decisor, cache=cache)
+    validos = [r for r in resultados if r is not None]
+    media_falha = mean(validos) if validos else 1.0
+    # Coletar médias separadas para backend e database
+    prom_cpu_backend_vals = []
+    prom_mem_backend_vals = []
+    prom_cpu_database_vals = []
+    prom_mem_database_vals = []
+    k6_p95_vals = []
+    k6_p95_estavel_vals = []
+    valores_thresholds = {nome: [] for nome in limites}
+    execucoes = []
+    # Só as repetições executadas agora (no modo sequencial podem ser menos que 'repeticoes')
+    for i in range(len(resultados)):
+        nome = f"{i+1}.{nome_teste}-{stack}-{cpu}_{ram}"
+        metrics_path = f"resultados/{nome}_metrics.json"
+        if os.path.exists(metrics_path):
+            with open(metrics_path) as f:
+                metrics = json.load(f)
+            execucoes.append(((cpu, ram), metricas_execucao(metrics)))
+            # Uso de recursos só no estado estável do K6 (sem setup, rampa e ociosidade)
+            prom_backend = metricas_fase(metrics.get('prometheus_metrics_backend'))
+            prom_database = metricas_fase(metrics.get('prometheus_metrics_database'))
+            if prom_backend.get('cpu_avg_cores') is not None:
+                prom_cpu_backend_vals.append(prom_backend['cpu_avg_cores'])
+            if prom_backend.get('mem_avg_bytes') is not None:
+                prom_mem_backend_vals.append(prom_backend['mem_avg_bytes'])
+            if prom_database.get('cpu_avg_cores') is not None:
+                prom_cpu_database_vals.append(prom_database['cpu_avg_cores'])
+            if prom_database.get('mem_avg_bytes') is not None:
+                prom_mem_database_vals.append(prom_database['mem_avg_bytes'])
+            # Valor medido de cada threshold, com a mesma agregação do K6
+            for nome, limite in limites.items():
+                valor = valor_medido(metrics.get('k6_summary'), limite)
+                if valor is not None:
+                    valores_thresholds[nome].append(valor)
+            # Extrai p(95) do tempo de resposta do K6
+            k6_summary = metrics.get('k6_summary', {})
+            k6_metrics = k6_summary.get('metrics', {}) if isinstance(k6_summary, dict) else {}
+            http_req_duration = k6_metrics.get('http_req_duration', {})
+            p95 = None
+            if 'values' in http_req_duration:
+                # K6 v0.43+ salva percentis em 'values'
+                p95 = http_req_duration['values'].get('p(95)')
+            elif 'p(95)' in http_req_duration:
+                # K6 versões antigas
+                p95 = http_req_duration.get('p(95)')
+            if p95 is not None:
                 try:
-                    excluir_container_ate_sucesso(page)
+                    k6_p95_vals.append(float(p95))
                 except Exception:
                     pass
-                continue
-            output_path = f"resultados/{nome}.json"
-            metrics_path = f"resultados/{nome}_metrics.json"
-            erro_k6 = None
-            k6_metrics_summary = None
-            try:
-                executar_k6(k6_script, output_path, base_url=base_url, metrics_path=metrics_path)
-            except Exception as e:
-                erro_k6 = str(e)
-            # Sempre tenta carregar o summary do K6 (summary-export)
-            try:
-                with open(metrics_path) as f:
-                    k6_metrics_summary = json.load(f)
-            except Exception:
-                k6_metrics_summary = None
-            fim = datetime.now(TZ)
-            duracao = (fim - inicio).total_seconds()
-            # Sempre tenta coletar métricas do Prometheus, mesmo se o K6 falhar
-            config = carregar_config()
-            prom_url = config.get('prometheus_url')
-            prom_metrics_backend = None
-            prom_metrics_database = None
-            if prom_url and container_info and container_info.get('id'):
-                prefix = container_info.get('id')
-                backend_name = f"{prefix}-backend-1"
-                database_name = f"{prefix}-database-1"
-                time.sleep(35)  # SLEEP: espera para garantir coleta de métricas do Prometheus
-                prom_metrics_backend = consultar_media_prometheus_nome(prom_url, backend_name, inicio, fim)
-                prom_metrics_database = consultar_media_prometheus_nome(prom_url, database_name, inicio, fim)
-            # Carrega métricas do K6 se existirem
-            try:
-                with open(metrics_path) as f:
-                    metrics = json.load(f)
-            except Exception:
-                metrics = {}
-            # Monta o dicionário final de métricas, sem duplicidade de campos do summary do K6
-            metrics = {
-                "k6_summary": k6_metrics_summary,  # summary do K6 exatamente como exportado
-                "container_info": container_info,
-                "inicio_teste": inicio.isoformat(sep=' '),
-                "fim_teste": fim.isoformat(sep=' '),
-                "duracao_segundos": duracao,
-                "cenario": cenario,
-                "prometheus_metrics_backend": prom_metrics_backend,
-                "prometheus_metrics_database": prom_metrics_database
-            }
-            if erro_k6:
-                metrics["erro"] = erro_k6
-            with open(metrics_path, 'w') as f:
-                json.dump(metrics, f, indent=4, ensure_ascii=False)
-            # Se o K6 rodou, pega a métrica de falha, senão None
-            m = k6_metrics_summary if isinstance(k6_metrics_summary, dict) else {}
-            http_req_failed = None
-            if "metrics" in m and isinstance(m["metrics"], dict):
-                http_req_failed = m["metrics"].get("http_req_failed", {}).get("value", None)
-            resultados.append(http_req_failed)
-        except Exception as e:
-            fim = datetime.now(TZ)
-            duracao = (fim - inicio).total_seconds()
-            metrics_path = f"resultados/{nome}_metrics.json"
-            metrics_data = {
-                'container_info': container_info,
-                'inicio_teste': inicio.isoformat(sep=' '),
-                'fim_teste': fim.isoformat(sep=' '),
-                'duracao_segundos': duracao,
-                'cenario': cenario,
-                'erro': str(e)
-            }
-            with open(metrics_path, 'w') as f:
-                json.dump(metrics_data, f, indent=4, ensure_ascii=False)
-            resultados.append(None)
-        finally:
-            try:
-                excluir_container_ate_sucesso(page)
-            except Exception:
-                pass
-    return resultados
+            # p95 só do estado estável (fases delimitadas pela saída do K6)
+            estavel = (metrics.get('fases') or {}).get('estavel') or {}
+            if (estavel.get('latencia') or {}).get('p95') is not None:
+                k6_p95_estavel_vals.append(estavel['latencia']['p95'])
+    avg_cpu_backend = mean(prom_cpu_backend_vals) if prom_cpu_backend_vals else 0
+    avg_mem_backend = mean(prom_mem_backend_vals) if prom_mem_backend_vals else 0
+    avg_cpu_database = mean(prom_cpu_database_vals) if prom_cpu_database_vals else 0
+    avg_mem_database = mean(prom_mem_database_vals) if prom_mem_database_vals else 0
+    avg_p95 = mean(k6_p95_vals) if k6_p95_vals else None
+    avg_p95_estavel = mean(k6_p95_estavel_vals) if k6_p95_estavel_vals else None
+    # Com taxa de chegada (cenário taxa_constante), fração das iterações oferecidas que o K6 descartou
+    descartes = [v['taxa_descarte'] for _, v in execucoes if v.get('taxa_descarte') is not None]
+    avg_descarte = mean(descartes) if descartes else None
+    # Mediana, IC bootstrap, CV e outliers das repetições; indica se a decisão pede mais repetições
+    analise = analisar_execucoes(execucoes, limites=limites_superiores)
+    analise = analise[0] if analise else None
+    # --- Lógica dinâmica para thresholds do K6 ---
+    # Dicionários para médias e avaliação
+    medias_thresholds = {}
+    atingiu_thresholds = {}
+    # Para cada threshold definido, calcula a média das repetições e aplica o operador do threshold
+    for nome, limite in limites.items():
+        medias_thresholds[nome] = mean(valores_thresholds[nome]) if valores_thresholds[nome] else None
+        atingiu_thresholds[nome] = atende(limite, medias_thresholds[nome])
+    # Critérios de aprovação automáticos: todos os thresholds atingidos, sem gargalo de CPU no backend.
+    # Acima de LIMITE_DESCARTE a carga oferecida não foi mantida, então o que foi medido não vale para ela
+    passou = (bool(validos) and all(atingiu_thresholds.values())
+              and avg_cpu_backend < LIMITE_GARGALO_CPU * cpu
+              and (avg_descarte is None or avg_descarte <= LIMITE_DESCARTE))
+    # Salvar médias e avaliação dos thresholds no log (apenas bloco dinâmico)
+    with open(f"resultados/minimo_{nome_teste}_{stack}.log", "a") as f:
+        f.write(f"estrategia={estrategia}, CPU={cpu}, RAM={ram}, ")
+        for nome in thresholds:
+            f.write(f"media_{nome}={medias_thresholds.get(nome)}, threshold_{nome}={thresholds[nome]}, atingiu_{nome}={atingiu_thresholds.get(nome)}, ")
+        f.write(f"avg_cpu_backend={avg_cpu_backend}, avg_mem_backend={avg_mem_backend}, "
+                f"avg_cpu_database={avg_cpu_database}, avg_mem_database={avg_mem_database}, "
+                f"avg_p95_estavel={avg_p95_estavel}, taxa_descarte={avg_descarte}, resultados={resultados}, passou={passou}")
+        if analise is not None:
+            p95 = analise['metricas'].get('http_req_duration_p95') or {}
+            f.write(f", mediana_p95={p95.get('mediana')}, ic_p95={p95.get('ic')}, cv_p95={p95.get('cv')}, "
+                    f"outliers_p95={p95.get('outliers')}, mais_repeticoes={analise['mais_repeticoes']}")
+        if decisor is not None:
+            avaliacao = decisor.avaliar()
+            f.write(f", repeticoes_executadas={len(resultados)}, decisao_sequencial={avaliacao['decisao']}, "
+                    f"confianca={avaliacao['confianca']}")
+        f.write("\n")
+    return {
+        'cpu': cpu,
+        'ram': ram,
+        'passou': passou,
+        'media_http_req_failed': media_falha,
+        'avg_p95': avg_p95,
+        'avg_p95_estavel': avg_p95_estavel,
+        'taxa_descarte': avg_descarte,
+        'resultados': resultados,
+        'analise': analise,
+        # Gargalo: uso médio acima de LIMITE_GARGALO_CPU/LIMITE_GARGALO_MEM do limite configurado
+        'cpu_gargalo_backend': avg_cpu_backend > LIMITE_GARGALO_CPU * cpu,
+        'mem_gargalo_backend': avg_mem_backend > LIMITE_GARGALO_MEM * (ram * 1024 * 1024),
+        'cpu_gargalo_database': avg_cpu_database > LIMITE_GARGALO_CPU * cpu,
+        'mem_gargalo_database': avg_mem_database > LIMITE_GARGALO_MEM * (ram * 1024 * 1024),
+    }
 
 
-def encontrar_configuracao_minima(stack, k6_script, page, app_url, repeticoes):
-    thresholds = extrair_thresholds_k6(k6_script)
-    # Defaults caso não encontre
-    limite_falha = thresholds.get('http_req_failed', 0.01)
-    limite_p95 = thresholds.get('http_req_duration_p95', 500)
+def grade_cpu():
+    """
+    Valores de CPU entre CPU_MIN e CPU_MAX com passo CPU_INC.
+    """
+    n = int(round((CPU_MAX - CPU_MIN) / CPU_INC))
+    return [round(CPU_MIN + i * CPU_INC, 2) for i in range(n + 1)]
+
+
+def grade_ram():
+    """
+    Valores de RAM entre RAM_MIN e RAM_MAX com passo RAM_INC.
+    """
+    return list(range(RAM_MIN, RAM_MAX + 1, RAM_INC)) if RAM_MAX > RAM_MIN else [RAM_MIN]
+
+
+def primeiro_aprovado(grade, passou, inicio=0, galope=False):
+    """
+    Índice do primeiro valor aprovado em uma grade monotônica (se um valor passa, os maiores também passam)
+    usando bissecção; com galope, antes testa os índices inicio, inicio+1, inicio+3, inicio+7... até achar um aprovado.
+    Retorna None se nem o último valor passar.
+    """
+    lo, hi = inicio, len(grade) - 1
+    if galope:
+        passo = 1
+        i = inicio
+        while i < hi and not passou(grade[i]):
+            lo = i + 1
+            i = min(i + passo, hi)
+            passo *= 2
+        hi = i
+    if not passou(grade[hi]):
+        return None
+    while lo < hi:
+        meio = (lo + hi) // 2
+        if passou(grade[meio]):
+            hi = meio
+        else:
+            lo = meio + 1
+    return lo
+
+
+def buscar_linear(avaliar):
+    """
+    Busca original: aumenta CPU em CPU_INC ou dobra a RAM conforme o gargalo observado.
+    """
     cpu = CPU_MIN
     ram = RAM_MIN
-    nome_teste = os.path.splitext(os.path.basename(k6_script))[0]
     while True:
         if cpu > CPU_MAX or ram > RAM_MAX:
-            break
-        cpu_atual = cpu
-        ram_atual = ram
-        resultados = testar_configuracao(stack, cpu_atual, ram_atual, k6_script, page, app_url, repeticoes)
-        validos = [r for r in resultados if r is not None]
-        media_falha = mean(validos) if validos else 1.0
-        # Coletar médias separadas para backend e database
-        prom_cpu_backend_vals = []
-        prom_mem_backend_vals = []
-        prom_cpu_database_vals = []
-        prom_mem_database_vals = []
-        k6_p95_vals = []
-        for i in range(repeticoes):
-            nome = f"{i+1}.{nome_teste}-{stack}-{cpu_atual}_{ram_atual}"
-            metrics_path = f"resultados/{nome}_metrics.json"
-            if os.path.exists(metrics_path):
-                with open(metrics_path) as f:
-                    metrics = json.load(f)
-                prom_backend = metrics.get('prometheus_metrics_backend', {})
-                prom_database = metrics.get('prometheus_metrics_database', {})
-                if prom_backend.get('cpu_avg_cores') is not None:
-                    prom_cpu_backend_vals.append(prom_backend['cpu_avg_cores'])
-                if prom_backend.get('mem_avg_bytes') is not None:
-                    prom_mem_backend_vals.append(prom_backend['mem_avg_bytes'])
-                if prom_database.get('cpu_avg_cores') is not None:
-                    prom_cpu_database_vals.append(prom_database['cpu_avg_cores'])
-                if prom_database.get('mem_avg_bytes') is not None:
-                    prom_mem_database_vals.append(prom_database['mem_avg_bytes'])
-                # Extrai p(95) do tempo de resposta do K6
-                k6_summary = metrics.get('k6_summary', {})
-                k6_metrics = k6_summary.get('metrics', {}) if isinstance(k6_summary, dict) else {}
-                http_req_duration = k6_metrics.get('http_req_duration', {})
-                p95 = None
-                if 'values' in http_req_duration:
-                    # K6 v0.43+ salva percentis em 'values'
-                    p95 = http_req_duration['values'].get('p(95)')
-                elif 'p(95)' in http_req_duration:
-                    # K6 versões antigas
-                    p95 = http_req_duration.get('p(95)')
-                if p95 is not None:
-                    try:
-                        k6_p95_vals.append(float(p95))
-                    except Exception:
-                        pass
-        avg_cpu_backend = mean(prom_cpu_backend_vals) if prom_cpu_backend_vals else 0
-        avg_mem_backend = mean(prom_mem_backend_vals) if prom_mem_backend_vals else 0
-        avg_cpu_database = mean(prom_cpu_database_vals) if prom_cpu_database_vals else 0
-        avg_mem_database = mean(prom_mem_database_vals) if prom_mem_database_vals else 0
-        avg_p95 = mean(k6_p95_vals) if k6_p95_vals else None
-        # Gargalo: uso médio > 85% do limite configurado
-        cpu_gargalo_backend = avg_cpu_backend > 0.85 * (cpu_atual * 100)
-        mem_gargalo_backend = avg_mem_backend > 0.8 * (ram_atual * 1024 * 1024)
-        cpu_gargalo_database = avg_cpu_database > 0.85 * (cpu_atual * 100)
-        mem_gargalo_database = avg_mem_database > 0.8 * (ram_atual * 1024 * 1024)
-        # --- Lógica dinâmica para thresholds do K6 ---
-        # Extrai todos os thresholds definidos no script K6
-        thresholds = extrair_thresholds_k6(k6_script)
-        # Dicionários para médias e avaliação
-        medias_thresholds = {}
-        atingiu_thresholds = {}
-        # Para cada threshold definido, calcula a média e avalia se foi atingido
-        for nome, valor in thresholds.items():
-            if nome == 'http_req_failed':
-                # Já temos a média de http_req_failed
-                medias_thresholds[nome] = media_falha
-                atingiu_thresholds[nome] = media_falha < valor if media_falha is not None else False
-            elif nome == 'http_req_duration_p95':
-                medias_thresholds[nome] = avg_p95
-                atingiu_thresholds[nome] = avg_p95 < valor if avg_p95 is not None else False
-            # Adicione aqui outros thresholds conforme forem extraídos
-        # Salvar médias e avaliação dos thresholds no log (apenas bloco dinâmico)
-        with open(f"resultados/minimo_{nome_teste}_{stack}.log", "a") as f:
-            f.write(f"CPU={cpu_atual}, RAM={ram_atual}, ")
-            for nome in thresholds:
-                f.write(f"media_{nome}={medias_thresholds.get(nome)}, threshold_{nome}={thresholds[nome]}, atingiu_{nome}={atingiu_thresholds.get(nome)}, ")
-            f.write(f"avg_cpu_backend={avg_cpu_backend}, avg_mem_backend={avg_mem_backend}, "
-                    f"avg_cpu_database={avg_cpu_database}, avg_mem_database={avg_mem_database}, "
-                    f"resultados={resultados}\n")
-        # Critérios de parada automáticos:
-        if (media_falha < limite_falha and avg_p95 < limite_p95 and avg_cpu_backend < 0.85 * (cpu_atual * 100)):
-            break
+            return None
+        r = avaliar(cpu, ram)
+        if r['passou']:
+            return cpu, ram
         # Lógica de incremento: prioriza backend, depois database, depois RAM
-        if cpu_gargalo_backend and cpu < CPU_MAX:
+        if r['cpu_gargalo_backend'] and cpu < CPU_MAX:
             cpu = round(min(cpu + CPU_INC, CPU_MAX), 2)
-        elif mem_gargalo_backend and ram < RAM_MAX:
+        elif r['mem_gargalo_backend'] and ram < RAM_MAX:
             ram = min(ram * 2, RAM_MAX)
-        elif cpu_gargalo_database and cpu < CPU_MAX:
+        elif r['cpu_gargalo_database'] and cpu < CPU_MAX:
             cpu = round(min(cpu + CPU_INC, CPU_MAX), 2)
-        elif mem_gargalo_database and ram < RAM_MAX:
+        elif r['mem_gargalo_database'] and ram < RAM_MAX:
             ram = min(ram * 2, RAM_MAX)
         else:
             if ram < RAM_MAX:
@@ -348,7 +404,96 @@ def encontrar_configuracao_minima(stack, k6_script, page, app_url, repeticoes):
         # Garante saída do loop se não for mais possível aumentar CPU ou RAM
         if cpu >= CPU_MAX and ram >= RAM_MAX:
             print(f"[PARADA] CPU e RAM atingiram ou ultrapassaram o limite máximo: CPU={cpu}, RAM={ram}. Encerrando busca.")
-            break
+            return None
+
+
+def buscar_bisseccao(avaliar):
+    """
+    Bissecção na grade de CPU com a RAM no máximo e, com essa CPU, galope seguido de bissecção na grade de RAM.
+    Supõe que o resultado é monotônico: mais CPU ou RAM nunca piora a aprovação.
+    """
+    cpus = grade_cpu()
+    rams = grade_ram()
+    i_cpu = primeiro_aprovado(cpus, lambda c: avaliar(c, rams[-1])['passou'])
+    if i_cpu is None:
+        return None
+    cpu = cpus[i_cpu]
+    i_ram = primeiro_aprovado(rams, lambda r: avaliar(cpu, r)['passou'], galope=True)
+    return cpu, rams[i_ram]
+
+
+def buscar_fronteira(avaliar):
+    """
+    Fronteira 2-D: menor CPU aprovada para cada RAM da grade. Como mais RAM nunca exige mais CPU, essa CPU
+    é uma escada não crescente na RAM: a busca divide a grade de RAM ao meio e só avalia o trecho entre duas RAMs
+    se a CPU mínima delas for diferente (bissecção na CPU restrita ao intervalo entre as duas).
+    Retorna a configuração da fronteira com menor CPU e, no empate, menor RAM.
+    """
+    cpus = grade_cpu()
+    rams = grade_ram()
+    sem_aprovacao = len(cpus)
+    ultima = len(rams) - 1
+
+    def menor_cpu(i_ram, lo, hi):
+        i = primeiro_aprovado(cpus[:hi + 1], lambda c: avaliar(c, rams[i_ram])['passou'], inicio=lo)
+        return sem_aprovacao if i is None else i
+
+    minima = {ultima: menor_cpu(ultima, 0, len(cpus) - 1)}
+    if minima[ultima] == sem_aprovacao:
+        return None
+    if ultima > 0:
+        minima[0] = menor_cpu(0, minima[ultima], len(cpus) - 1)
+
+    def preencher(a, b):
+        if b - a <= 1 or minima[a] == minima[b]:
+            return
+        m = (a + b) // 2
+        minima[m] = menor_cpu(m, minima[b], min(minima[a], len(cpus) - 1))
+        preencher(a, m)
+        preencher(m, b)
+
+    preencher(0, ultima)
+    # Entre duas RAMs com a mesma CPU mínima, todas as intermediárias têm essa CPU; o degrau fica na menor RAM
+    fronteira = {}
+    for i_ram in sorted(minima):
+        if minima[i_ram] != sem_aprovacao and minima[i_ram] not in fronteira:
+            fronteira[minima[i_ram]] = rams[i_ram]
+    fronteira = sorted((cpus[i], ram) for i, ram in fronteira.items())
+    print(f"[FRONTEIRA] Configurações mínimas aprovadas (CPU, RAM): {fronteira}")
+    return fronteira[0]
+
+
+ESTRATEGIAS = {
+    'linear': buscar_linear,
+    'bisseccao': buscar_bisseccao,
+    'fronteira': buscar_fronteira,
+}
+
+
+def encontrar_configuracao_minima(stack, k6_script, provisionador, app_url, repeticoes, pool=None, abortar_cedo=False,
+                                  sequencial=False, confianca=0.95, estrategia='linear', cache=None):
+    thresholds = extrair_thresholds_k6(k6_script)
+    criterio_aborto = None
+    if abortar_cedo:
+        criterio_aborto = criterio_limites_estourados(limite_falha=thresholds.get('http_req_failed'),
+                                                      limite_p95=thresholds.get('http_req_duration_p95'))
+    nome_teste = os.path.splitext(os.path.basename(k6_script))[0]
+    avaliados = {}
+
+    def avaliar(cpu, ram):
+        # Cada ponto é avaliado uma única vez por busca
+        if (cpu, ram) not in avaliados:
+            avaliados[(cpu, ram)] = avaliar_configuracao(stack, cpu, ram, k6_script, provisionador, app_url, repeticoes,
+                                                         pool=pool, criterio_aborto=criterio_aborto, sequencial=sequencial,
+                                                         confianca=confianca, estrategia=estrategia, cache=cache)
+        return avaliados[(cpu, ram)]
+
+    minimo = ESTRATEGIAS[estrategia](avaliar)
+    pontos = ', '.join(f"({c}, {r}, {'passou' if v['passou'] else 'falhou'})" for (c, r), v in avaliados.items())
+    with open(f"resultados/minimo_{nome_teste}_{stack}.log", "a") as f:
+        f.write(f"RESULTADO estrategia={estrategia}, minimo={minimo}, pontos_avaliados={len(avaliados)}, pontos=[{pontos}]\n")
+    print(f"[MINIMO] {stack}: {minimo} ({len(avaliados)} configurações avaliadas, estratégia {estrategia})")
+    return minimo
 
 
 def main():
@@ -357,18 +502,32 @@ def main():
     parser.add_argument('--stacks', required=True, help='Lista de stacks separadas por vírgula')
     parser.add_argument('--k6_script', required=True, help='Caminho do script K6')
     parser.add_argument('--repeticoes', type=int, default=5, help='Quantidade de repetições por configuração')
+    parser.add_argument('--provisionador', choices=['playwright', 'api'], default='playwright', help='Como criar/remover containers: interface (playwright) ou API do orquestrador (api)')
+    parser.add_argument('--orquestrador_url', default=None, help='URL da API do orquestrador (provisionador api)')
+    parser.add_argument('--abortar_cedo', action='store_true', help='Interrompe o K6 assim que taxa de erros ou p95 ficarem muito acima dos thresholds')
+    parser.add_argument('--estrategia', choices=sorted(ESTRATEGIAS), default='linear', help='Busca da configuração mínima: linear (original), bisseccao (CPU, depois RAM) ou fronteira (CPU mínima para cada RAM)')
+    parser.add_argument('--sequencial', action='store_true', help='Para de repetir uma configuração assim que o resultado estiver estatisticamente decidido')
+    parser.add_argument('--confianca', type=float, default=0.95, help='Confiança exigida pelo modo --sequencial')
+    parser.add_argument('--reutilizar', action='store_true', help='Mantém o container de cada configuração entre as repetições')
+    parser.add_argument('--reset_hook', default=None, help='Comando de reset do banco entre repetições (campos: {id}, {base_url}, {backend}, {database})')
+    parser.add_argument('--retomar', action='store_true', help='Reaproveita as repetições já medidas com o mesmo script K6, configuração e ambiente (ex.: após uma queda)')
     args = parser.parse_args()
     stacks = [s.strip() for s in args.stacks.split(',')]
 
-    from playwright.sync_api import sync_playwright
-    with sync_playwright() as playwright:
-        browser = iniciar_navegador(playwright)
-        context = browser.new_context()
-        page = context.new_page()
-        acessar_aplicacao(page, args.app_url)
-        for stack in stacks:
-            encontrar_configuracao_minima(stack, args.k6_script, page, args.app_url, args.repeticoes)
-        browser.close()
+    with criar_provisionador(args.provisionador, args.app_url, args.orquestrador_url) as provisionador:
+        pool = PoolContainers(provisionador, args.reset_hook) if args.reutilizar else None
+        # O coletor e o script entram na chave: um _metrics.json de outra varredura não tem as mesmas seções
+        cache = CacheExecucoes(args.app_url, retomar=args.retomar,
+                               extras={'coletor': 'prometheus', 'script': os.path.basename(__file__),
+                                       'abortar_cedo': args.abortar_cedo})
+        try:
+            for stack in stacks:
+                encontrar_configuracao_minima(stack, args.k6_script, provisionador, args.app_url, args.repeticoes, pool=pool,
+                                              abortar_cedo=args.abortar_cedo, sequencial=args.sequencial,
+                                              confianca=args.confianca, estrategia=args.estrategia, cache=cache)
+        finally:
+            if pool is not None:
+                pool.fechar()
 
 if __name__ == "__main__":
     # Como executar no terminal:
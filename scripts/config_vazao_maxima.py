@@ -0,0 +1,157 @@
+# Script para achar a vazão máxima sustentável de cada stack numa única execução do K6 por configuração:
+# a taxa de chegada sobe em degraus (tests k6/vazao_maxima.js) até o p95 ou a taxa de erros estourarem,
+# e o resultado é a maior taxa em que os limites ainda valem. Coleta métricas dos containers via Prometheus.
+# Uso: python3 scripts/config_vazao_maxima.py --app_url <URL_DA_APP> --stacks node-postgres --cpu 1 --ram 1024 --taxa_inicial 10 --passo 10
+
+import os
+import sys
+import time
+import json
+import argparse
+from datetime import timezone, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import executar_k6, aguardar_backend_pronto
+from provisionadores import criar_provisionador
+from prometheus import obter_cliente
+from registro_execucao import RegistroExecucao
+from k6_stream import MonitorK6
+from vazao_maxima import ambiente_degraus, criterio_degraus, analisar_degraus
+
+CPU_DB = 0.5
+RAM_DB = 1024
+TZ = timezone(timedelta(hours=-3))  # UTC-3
+
+def carregar_config():
+    with open(os.path.join(os.path.dirname(__file__), '../config.json'), 'r') as f:
+        return json.load(f)
+
+def montar_cenario(nome, stack, cpu, ram, k6_script):
+    return {
+        "nome": nome,
+        "backend": stack,
+        "backend_cpu": cpu,
+        "backend_ram": ram,
+        "db_cpu": CPU_DB,  # Mantém fixo
+        "db_ram": RAM_DB,  # Mantém fixo
+        "k6_script": k6_script
+    }
+
+
+def buscar_vazao_maxima(stack, cpu, ram, k6_script, provisionador, args):
+    """
+    Provisiona a configuração, roda o K6 em degraus de taxa de chegada e grava no _metrics.json o resumo por degrau
+    e a vazão máxima sustentável (chave 'vazao_maxima'). Retorna esse resumo (None se o K6 não rodou).
+    """
+    nome = f"vazao_maxima_{args.operacao}-{stack}-{cpu}_{ram}"
+    cenario = montar_cenario(nome, stack, cpu, ram, k6_script)
+    registro = RegistroExecucao(cenario, tz=TZ)
+    container_info = None
+    resultado = None
+    try:
+        t_provisionamento = time.time()
+        provisionado = provisionador.criar(cenario)
+        registro.marcar('provisionamento', t_provisionamento)
+        registro.registrar_provisionamento(provisionado)
+        base_url = provisionado['base_url']
+        container_info = provisionado['container_info']
+        tempos_fases = registro.tempos_fases
+        t_health = time.time()
+        tempos_fases['health_segundos'] = aguardar_backend_pronto(base_url)
+        registro.marcar('health', t_health)
+        prefix = container_info.get('id')
+        backend_name = f"{prefix}-backend-1"
+        database_name = f"{prefix}-database-1"
+        output_path = f"resultados/{nome}.json"
+        env = ambiente_degraus(args.taxa_inicial, args.passo, args.taxa_maxima, args.duracao_degrau,
+                               operacao=args.operacao, limite_p95=args.limite_p95, limite_falha=args.limite_falha,
+                               vus_max=args.vus_max)
+        monitor = None
+        if not args.sem_aborto:
+            # Janela do monitor igual ao degrau: o estado reflete só a taxa atual (e o fim da anterior)
+            monitor = MonitorK6(janela=args.duracao_degrau, criterio_aborto=criterio_degraus(
+                args.taxa_inicial, args.passo, args.duracao_degrau, args.limite_p95, args.limite_falha))
+        registro.iniciar()
+        t0 = time.monotonic()
+        try:
+            executar_k6(k6_script, output_path, base_url=base_url, registro=registro, monitor=monitor, env=env)
+        except Exception as e:
+            registro.erro = str(e)
+        tempos_fases['k6_segundos'] = time.monotonic() - t0
+        registro.finalizar()
+        if os.path.exists(output_path):
+            resultado = analisar_degraus(output_path, args.taxa_inicial, args.passo, args.duracao_degrau,
+                                         args.limite_p95, args.limite_falha)
+            resultado['parametros'] = env
+            registro.adicionar('vazao_maxima', resultado)
+        config = carregar_config()
+        prom_url = config.get('prometheus_url')
+        prom_metrics_backend = None
+        prom_metrics_database = None
+        if prom_url and container_info and container_info.get('id'):
+            cliente = obter_cliente(prom_url)
+            tempos_fases['espera_prometheus_segundos'] = cliente.aguardar_dados(
+                [backend_name, database_name], registro.fim, teto=config.get('prometheus_espera_max', 60))
+            prom = cliente.consultar_containers([backend_name, database_name], registro.inicio, registro.fim,
+                                                fases=registro.fases)
+            prom_metrics_backend = dict(prom[backend_name], name_used=backend_name)
+            prom_metrics_database = dict(prom[database_name], name_used=database_name)
+        registro.adicionar('prometheus_metrics_backend', prom_metrics_backend)
+        registro.adicionar('prometheus_metrics_database', prom_metrics_database)
+    except Exception as e:
+        registro.erro = str(e)
+    finally:
+        t_remocao = time.time()
+        try:
+            provisionador.excluir(container_info)
+            registro.marcar('remocao', t_remocao)
+        except Exception:
+            pass
+        registro.gravar()
+    with open(f"resultados/vazao_maxima_{args.operacao}_{stack}.log", "a") as f:
+        f.write(f"CPU={cpu}, RAM={ram}, taxa_inicial={args.taxa_inicial}, passo={args.passo}, "
+                f"duracao_degrau={args.duracao_degrau}, limite_p95={args.limite_p95}, limite_falha={args.limite_falha}, ")
+        if resultado is None:
+            f.write(f"erro={registro.erro}\n")
+        else:
+            degraus = [(d['taxa'], round(d['vazao'], 1), d['p95'], d['passou']) for d in resultado['degraus']]
+            f.write(f"taxa_maxima_sustentavel={resultado['taxa_maxima_sustentavel']}, "
+                    f"vazao_maxima_obtida={resultado['vazao_maxima_obtida']}, "
+                    f"primeiro_degrau_reprovado={resultado['primeiro_degrau_reprovado']}, "
+                    f"abortado={monitor.abortado if monitor else False}, degraus={degraus}\n")
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--app_url', required=True, help='URL pública da aplicação React')
+    parser.add_argument('--stacks', required=True, help='Lista de stacks separadas por vírgula')
+    parser.add_argument('--cpu', required=True, help='CPUs do backend, separadas por vírgula')
+    parser.add_argument('--ram', required=True, help='RAM do backend em MB, separadas por vírgula')
+    parser.add_argument('--k6_script', default='tests k6/vazao_maxima.js', help='Script K6 com os degraus de taxa de chegada')
+    parser.add_argument('--operacao', choices=['get', 'post', 'mix'], default='get', help='Requisição de cada iteração')
+    parser.add_argument('--taxa_inicial', type=int, default=10, help='Taxa de chegada do primeiro degrau (req/s)')
+    parser.add_argument('--passo', type=int, default=10, help='Acréscimo de taxa a cada degrau (req/s)')
+    parser.add_argument('--taxa_maxima', type=int, default=500, help='Taxa do último degrau (req/s)')
+    parser.add_argument('--duracao_degrau', type=int, default=30, help='Duração de cada degrau em segundos')
+    parser.add_argument('--vus_max', type=int, default=1000, help='Máximo de VUs que o K6 pode alocar para manter a taxa')
+    parser.add_argument('--limite_p95', type=float, default=500, help='Threshold do p95 em ms')
+    parser.add_argument('--limite_falha', type=float, default=0.01, help='Threshold da taxa de erros')
+    parser.add_argument('--sem_aborto', action='store_true', help='Executa todos os degraus, sem interromper o K6 após a saturação')
+    parser.add_argument('--provisionador', choices=['playwright', 'api'], default='playwright', help='Como criar/remover containers: interface (playwright) ou API do orquestrador (api)')
+    parser.add_argument('--orquestrador_url', default=None, help='URL da API do orquestrador (provisionador api)')
+    args = parser.parse_args()
+    stacks = [s.strip() for s in args.stacks.split(',')]
+    cpus = [float(c) for c in args.cpu.split(',')]
+    rams = [int(r) for r in args.ram.split(',')]
+
+    with criar_provisionador(args.provisionador, args.app_url, args.orquestrador_url) as provisionador:
+        for stack in stacks:
+            for cpu in cpus:
+                for ram in rams:
+                    r = buscar_vazao_maxima(stack, cpu, ram, args.k6_script, provisionador, args)
+                    if r is not None:
+                        print(f"[VAZAO] {stack} CPU={cpu} RAM={ram}: {r['taxa_maxima_sustentavel']} req/s sustentáveis")
+
+if __name__ == "__main__":
+    main()
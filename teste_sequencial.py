@@ -0,0 +1,134 @@
+# Teste sequencial para a busca de configuração mínima: depois de cada repetição avalia se já dá para
+# afirmar, com a confiança pedida, que a configuração passa ou falha nos thresholds do K6,
+# permitindo parar de repetir assim que o resultado estiver estatisticamente decidido.
+
+import math
+from statistics import mean, stdev
+
+
+def t_cdf(t: float, gl: int) -> float:
+    """
+    Função de distribuição acumulada da t de Student com gl graus de liberdade (inteiro >= 1).
+    Forma fechada para gl inteiro (Abramowitz & Stegun 26.7.3/26.7.4), sem depender de scipy.
+    """
+    theta = math.atan(t / math.sqrt(gl))
+    c2 = math.cos(theta) ** 2
+    s = math.sin(theta)
+    if gl % 2 == 1:
+        soma, termo = 0.0, 1.0
+        if gl > 1:
+            soma = 1.0
+            for k in range(1, (gl - 3) // 2 + 1):
+                termo *= c2 * (2 * k) / (2 * k + 1)
+                soma += termo
+            a = (2 / math.pi) * (theta + s * math.cos(theta) * soma)
+        else:
+            a = 2 * theta / math.pi
+    else:
+        soma, termo = 1.0, 1.0
+        for k in range(1, (gl - 2) // 2 + 1):
+            termo *= c2 * (2 * k - 1) / (2 * k)
+            soma += termo
+        a = s * soma
+    # a = P(|T| < |t|) com o sinal de t
+    return 0.5 + a / 2
+
+
+def _contagem(metrica) -> float:
+    # Counter do summary: {'count': N} ou, no formato novo, {'values': {'count': N}}
+    if not isinstance(metrica, dict):
+        return None
+    contagem = metrica.get('values', metrica).get('count')
+    return float(contagem) if contagem is not None else None
+
+
+def extrair_valores_k6(metrics: dict) -> dict:
+    """
+    Extrai http_req_failed e p(95) de http_req_duration de um _metrics.json (esquema do RegistroExecucao, com 'k6_summary'),
+    além das iterações descartadas (dropped_iterations) e da fração que elas representam da carga oferecida.
+    Retorna None nos valores ausentes (ex.: repetição que falhou antes do K6).
+    """
+    k6_summary = (metrics or {}).get('k6_summary')
+    k6_metrics = k6_summary.get('metrics', {}) if isinstance(k6_summary, dict) else {}
+    falha = k6_metrics.get('http_req_failed', {}).get('value')
+    duracao = k6_metrics.get('http_req_duration', {})
+    p95 = duracao['values'].get('p(95)') if 'values' in duracao else duracao.get('p(95)')
+    iteracoes = _contagem(k6_metrics.get('iterations'))
+    descartadas = _contagem(k6_metrics.get('dropped_iterations'))
+    # O K6 só exporta dropped_iterations quando descarta alguma; com taxa de chegada, ausência é zero
+    if descartadas is None and iteracoes is not None and ((metrics or {}).get('cenario_k6') or {}).get('executor') == 'taxa_constante':
+        descartadas = 0.0
+    oferecidas = (iteracoes or 0) + (descartadas or 0)
+    return {
+        'http_req_failed': float(falha) if falha is not None else None,
+        'http_req_duration_p95': float(p95) if p95 is not None else None,
+        'iteracoes_descartadas': descartadas,
+        'taxa_descarte': descartadas / oferecidas if descartadas is not None and oferecidas else None,
+    }
+
+
+class DecisorSequencial:
+    """
+    Acumula, a cada repetição, os valores das métricas com threshold e decide se a configuração
+    já está decidida: 'passa' quando, para todos os critérios, P(média real < limite) >= confianca;
+    'falha' quando para algum critério P(média real < limite) <= 1 - confianca.
+    A probabilidade vem de um teste t unilateral sobre as repetições (a partir de 2 repetições).
+    Com uma única repetição só decide 'falha' se o valor já estiver fator_desesperanca vezes acima do limite.
+    """
+    def __init__(self, limites: dict, confianca=0.95, fator_desesperanca=10.0, minimo_repeticoes=2):
+        self.limites = {k: v for k, v in limites.items() if v}
+        self.confianca = confianca
+        self.fator_desesperanca = fator_desesperanca
+        self.minimo_repeticoes = minimo_repeticoes
+        self.valores = {k: [] for k in self.limites}
+
+    def registrar(self, metrics: dict) -> bool:
+        """
+        Registra a repetição (dicionário do _metrics.json) e retorna True se já dá para parar de repetir.
+        """
+        extraidos = extrair_valores_k6(metrics)
+        for criterio in self.limites:
+            if extraidos.get(criterio) is not None:
+                self.valores[criterio].append(extraidos[criterio])
+        return self.avaliar()['decisao'] is not None
+
+    def _avaliar_criterio(self, criterio) -> dict:
+        valores = self.valores[criterio]
+        limite = self.limites[criterio]
+        n = len(valores)
+        r = {'n': n, 'media': mean(valores) if valores else None, 'prob_abaixo_limite': None, 'decisao': None}
+        if n == 0:
+            return r
+        if n == 1:
+            if valores[0] > limite * self.fator_desesperanca:
+                r['decisao'] = 'falha'
+            return r
+        desvio = stdev(valores)
+        if desvio == 0:
+            prob = 1.0 if r['media'] < limite else 0.0
+        else:
+            prob = t_cdf((limite - r['media']) / (desvio / math.sqrt(n)), n - 1)
+        r['prob_abaixo_limite'] = prob
+        if n >= self.minimo_repeticoes:
+            if prob >= self.confianca:
+                r['decisao'] = 'passa'
+            elif prob <= 1 - self.confianca:
+                r['decisao'] = 'falha'
+        return r
+
+    def avaliar(self) -> dict:
+        """
+        Retorna {'decisao': 'passa'|'falha'|None, 'confianca': float|None, 'criterios': {...}}.
+        A confiança é a probabilidade da decisão tomada (a menor entre os critérios, quando 'passa').
+        """
+        criterios = {c: self._avaliar_criterio(c) for c in self.limites}
+        falhas = [r for r in criterios.values() if r['decisao'] == 'falha']
+        decisao, confianca = None, None
+        if falhas:
+            decisao = 'falha'
+            probs = [1 - r['prob_abaixo_limite'] for r in falhas if r['prob_abaixo_limite'] is not None]
+            confianca = max(probs) if probs else None
+        elif criterios and all(r['decisao'] == 'passa' for r in criterios.values()):
+            decisao = 'passa'
+            confianca = min(r['prob_abaixo_limite'] for r in criterios.values())
+        return {'decisao': decisao, 'confianca': confianca, 'criterios': criterios}
@@ -0,0 +1,105 @@
+import http from 'k6/http';
+import { check, sleep } from 'k6';
+import { uuidv4 } from 'https://jslib.k6.io/k6-utils/1.4.0/index.js';
+
+// Script genérico dirigido por um cenário JSON (cenarios_k6.py), recebido inteiro em --env CENARIO.
+// executar_k6 passa o cenário automaticamente quando --k6_script aponta para um .json.
+const CENARIO = JSON.parse(__ENV.CENARIO || '{"operacoes":{"get":1},"executor":"vus","vus":1,"duracao":"30s","pausa":1,"thresholds":{}}');
+
+function montarExecutor(c) {
+    if (c.executor === 'taxa_constante') {
+        return {
+            executor: 'constant-arrival-rate',
+            rate: c.taxa,
+            timeUnit: '1s',
+            duration: c.duracao,
+            preAllocatedVUs: c.pre_vus || Math.max(1, Math.ceil(c.taxa)),
+            maxVUs: c.max_vus || Math.max(1, Math.ceil(c.taxa)) * 10,
+        };
+    }
+    if (c.executor === 'rampa_vus') {
+        // Mesmo perfil dos scripts com stages: sobe de 0 até vus ao longo de toda a duração
+        return { executor: 'ramping-vus', startVUs: 0, stages: [{ duration: c.duracao, target: c.vus }] };
+    }
+    return { executor: 'constant-vus', vus: c.vus, duration: c.duracao };
+}
+
+// Exporta no summary os percentis usados nos thresholds (o padrão do K6 só traz p(90) e p(95)),
+// para o Python avaliar cada threshold com o valor medido
+const ESTATISTICAS = ['avg', 'min', 'med', 'max', 'p(90)', 'p(95)'];
+for (const expressoes of Object.values(CENARIO.thresholds)) {
+    for (const expr of expressoes) {
+        const percentil = expr.match(/p\([0-9.]+\)/);
+        if (percentil && !ESTATISTICAS.includes(percentil[0])) {
+            ESTATISTICAS.push(percentil[0]);
+        }
+    }
+}
+
+export let options = {
+    scenarios: { principal: montarExecutor(CENARIO) },
+    thresholds: CENARIO.thresholds,
+    summaryTrendStats: ESTATISTICAS,
+};
+
+const BASE_URL = __ENV.BASE_URL || 'http://localhost:3000';
+const PARAMS = { headers: { 'Content-Type': 'application/json' } };
+
+// Ciclo de operações com os pesos do cenário: {post: 1, get: 1} alterna POST e GET como os scripts mix
+const CICLO = [];
+for (const [operacao, peso] of Object.entries(CENARIO.operacoes)) {
+    for (let i = 0; i < peso; i++) {
+        CICLO.push(operacao);
+    }
+}
+
+function usuario(nome, username, nascimento) {
+    return JSON.stringify({
+        name: `${nome} ${uuidv4()}`,
+        username: `${username}_${uuidv4()}`,
+        email: `${uuidv4()}@mail.com`,
+        dateOfBirth: nascimento,
+        gender: 'Other',
+        location: 'BR'
+    });
+}
+
+function verificar(res, status, rotulo) {
+    const checks = { [`status ${status}`]: (r) => r.status === status };
+    if (CENARIO.limite_check_ms) {
+        checks[`${rotulo} < ${CENARIO.limite_check_ms}ms`] = (r) => r.timings.duration < CENARIO.limite_check_ms;
+    }
+    check(res, checks);
+}
+
+function consultar() {
+    verificar(http.get(`${BASE_URL}/users`), 200, 'consulta');
+}
+
+function inserir() {
+    verificar(http.post(`${BASE_URL}/users`, usuario('Usuário', 'user', '1990-01-01'), PARAMS), 201, 'inserção');
+}
+
+function atualizar() {
+    // Cria o usuário que será atualizado (id no corpo ou no header Location)
+    const criado = http.post(`${BASE_URL}/users`, usuario('Usuário', 'user', '1990-01-01'), PARAMS);
+    let userId = '';
+    if (criado.status === 201 && criado.json && criado.json('id')) {
+        userId = criado.json('id');
+    } else if (criado.headers['Location']) {
+        userId = criado.headers['Location'].split('/').pop();
+    }
+    if (!userId) {
+        return;
+    }
+    verificar(http.put(`${BASE_URL}/users/${userId}`, usuario('Usuário Atualizado', 'user_updated', '1991-01-01'), PARAMS), 200, 'atualização');
+}
+
+const FUNCOES = { get: consultar, post: inserir, put: atualizar };
+
+export default function () {
+    FUNCOES[CICLO[__ITER % CICLO.length]]();
+    if (CENARIO.pausa) {
+        sleep(CENARIO.pausa);
+    }
+}
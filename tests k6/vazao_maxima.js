@@ -0,0 +1,75 @@
+import http from 'k6/http';
+import exec from 'k6/execution';
+import { check } from 'k6';
+import { uuidv4 } from 'https://jslib.k6.io/k6-utils/1.4.0/index.js';
+
+// Degraus de taxa de chegada (iterações/s): TAXA_INICIAL, TAXA_INICIAL + TAXA_PASSO, ... até TAXA_MAXIMA,
+// cada um por DURACAO_DEGRAU segundos. Usado por scripts/config_vazao_maxima.py para achar a maior taxa
+// em que os thresholds ainda valem numa única execução.
+const TAXA_INICIAL = parseInt(__ENV.TAXA_INICIAL || '10');
+const TAXA_PASSO = parseInt(__ENV.TAXA_PASSO || '10');
+const TAXA_MAXIMA = parseInt(__ENV.TAXA_MAXIMA || '500');
+const DURACAO_DEGRAU = parseInt(__ENV.DURACAO_DEGRAU || '30');
+// Início de cada degrau (rampa de 1 s até a nova taxa) marcado como transição, fora das estatísticas do degrau
+const DESCARTE_MS = parseInt(__ENV.DESCARTE_MS || '2000');
+const OPERACAO = __ENV.OPERACAO || 'get';
+
+const stages = [];
+for (let taxa = TAXA_INICIAL; taxa <= TAXA_MAXIMA; taxa += TAXA_PASSO) {
+    stages.push({ duration: '1s', target: taxa });
+    stages.push({ duration: `${DURACAO_DEGRAU - 1}s`, target: taxa });
+}
+
+export let options = {
+    scenarios: {
+        degraus: {
+            executor: 'ramping-arrival-rate',
+            startRate: TAXA_INICIAL,
+            timeUnit: '1s',
+            preAllocatedVUs: parseInt(__ENV.VUS_INICIAIS || '50'),
+            maxVUs: parseInt(__ENV.VUS_MAX || '1000'),
+            stages: stages,
+        },
+    },
+    thresholds: {
+        http_req_duration: [`p(95)<${__ENV.LIMITE_P95 || '500'}`],
+        http_req_failed: [`rate<${__ENV.LIMITE_FALHA || '0.01'}`],
+    }
+};
+
+const BASE_URL = __ENV.BASE_URL || 'http://localhost:3000';
+
+function tags() {
+    const decorrido = exec.instance.currentTestRunDuration;
+    return {
+        degrau: String(Math.floor(decorrido / (DURACAO_DEGRAU * 1000))),
+        transicao: decorrido % (DURACAO_DEGRAU * 1000) < DESCARTE_MS ? '1' : '0',
+    };
+}
+
+function inserir() {
+    const payload = JSON.stringify({
+        name: `Usuário ${uuidv4()}`,
+        username: `user_${uuidv4()}`,
+        email: `${uuidv4()}@mail.com`,
+        dateOfBirth: '1990-01-01',
+        gender: 'Other',
+        location: 'BR'
+    });
+    const params = { headers: { 'Content-Type': 'application/json' }, tags: tags() };
+    let res = http.post(`${BASE_URL}/users`, payload, params);
+    check(res, { 'status 201': (r) => r.status === 201 });
+}
+
+function consultar() {
+    let res = http.get(`${BASE_URL}/users`, { tags: tags() });
+    check(res, { 'status 200': (r) => r.status === 200 });
+}
+
+export default function () {
+    if (OPERACAO === 'post' || (OPERACAO === 'mix' && __ITER % 2 === 0)) {
+        inserir();
+    } else {
+        consultar();
+    }
+}
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Os módulos ficam na raiz do repositório e em scripts/ (mesmo ajuste de caminho dos scripts)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
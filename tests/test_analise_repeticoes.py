@@ -0,0 +1,35 @@
+import numpy as np
+
+from analise_repeticoes import analisar_matriz
+
+
+def test_outlier_marcado_pelo_mad():
+    valores = np.array([
+        [100.0, 101.0, 99.0, 100.0, 102.0, 400.0],
+        [200.0, 201.0, 199.0, 200.0, 202.0, 198.0],
+    ])
+    r = analisar_matriz(valores, n_bootstrap=500)
+    assert r['outliers'].tolist() == [[False] * 5 + [True], [False] * 6]
+    # A mediana não é puxada pelo outlier
+    assert r['mediana'][0] == 100.5
+    assert r['ic_inferior'][0] <= r['mediana'][0] <= r['ic_superior'][0]
+
+
+def test_linha_so_com_nan():
+    valores = np.array([
+        [np.nan, np.nan, np.nan],
+        [10.0, 10.0, 10.0],
+    ])
+    r = analisar_matriz(valores, n_bootstrap=200)
+    assert r['n'].tolist() == [0, 3]
+    assert np.isnan(r['mediana'][0]) and np.isnan(r['ic_inferior'][0]) and np.isnan(r['ic_superior'][0])
+    assert not r['outliers'][0].any()
+    assert r['mais_repeticoes'].tolist() == [True, False]
+    # Repetições idênticas: IC degenerado na própria mediana
+    assert r['ic_inferior'][1] == r['ic_superior'][1] == 10.0
+
+
+def test_ic_contendo_o_limite_pede_mais_repeticoes():
+    valores = np.array([[480.0, 520.0, 490.0, 510.0, 500.0]])
+    assert analisar_matriz(valores, limite=500, limite_cv=1.0, limite_ic=1.0)['mais_repeticoes'].tolist() == [True]
+    assert analisar_matriz(valores, limite=900, limite_cv=1.0, limite_ic=1.0)['mais_repeticoes'].tolist() == [False]
@@ -0,0 +1,42 @@
+import json
+
+from cache_execucoes import CacheExecucoes
+from catalogo import registrar_execucao
+
+SUMMARY = {'metrics': {'http_req_duration': {'avg': 100.0, 'p(95)': 200.0}}}
+
+
+def _cenario(pasta):
+    script = pasta / 'get_users_50vus.js'
+    script.write_text('export default function () {}')
+    return {'backend': 'node-postgres', 'backend_cpu': 1, 'backend_ram': 1024, 'db_cpu': 0.5, 'db_ram': 1024,
+            'k6_script': str(script)}
+
+
+def _gravar(pasta, nome, cenario, chave, **campos):
+    caminho = pasta / f"{nome}_metrics.json"
+    metrics = dict({'cenario': dict(cenario, nome=nome), 'chave_cache': chave, 'k6_summary': SUMMARY}, **campos)
+    caminho.write_text(json.dumps(metrics))
+    registrar_execucao(str(caminho), metrics)
+    return metrics
+
+
+def test_chave_separa_coletor_e_script(tmp_path):
+    cenario = _cenario(tmp_path)
+    prometheus = CacheExecucoes(extras={'coletor': 'prometheus', 'script': 'config_fixed_backend_prometheus.py',
+                                        'abortar_cedo': False})
+    ssh = CacheExecucoes(extras={'coletor': 'ssh_comandos', 'script': 'config_fixed_backend_ssh.py',
+                                 'abortar_cedo': False})
+    assert prometheus.chave(cenario, 1) == prometheus.chave(cenario, 1)
+    assert prometheus.chave(cenario, 1) != ssh.chave(cenario, 1)
+
+
+def test_obter_ignora_execucao_abortada(tmp_path):
+    cenario = _cenario(tmp_path)
+    cache = CacheExecucoes(pasta=str(tmp_path), retomar=True)
+    chave = cache.chave(cenario, 1)
+    _gravar(tmp_path, '1.get_users_50vus-node-postgres-1_1024', cenario, chave, k6_abortado=True,
+            k6_motivo_aborto='p95 acima do limite')
+    assert cache.obter(chave) is None
+    completa = _gravar(tmp_path, '2.get_users_50vus-node-postgres-1_1024', cenario, chave, k6_abortado=False)
+    assert cache.obter(chave) == completa
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from cenarios_k6 import (normalizar_cenario, carregar_cenario, interpretar_threshold, thresholds_cenario,
+                         limites_planos, atende, valor_medido, duracao_segundos, variar_cenario, FATOR_MAX_VUS)
+
+CENARIOS = os.path.join(os.path.dirname(__file__), '..', 'cenarios')
+
+
+@pytest.mark.parametrize('expr, esperado', [
+    ('p(95)<500', {'agregacao': 'p95', 'operador': '<', 'valor': 500.0}),
+    ('p(99.9) <= 1500', {'agregacao': 'p99_9', 'operador': '<=', 'valor': 1500.0}),
+    ('avg<400', {'agregacao': 'avg', 'operador': '<', 'valor': 400.0}),
+    ('rate>0.99', {'agregacao': 'rate', 'operador': '>', 'valor': 0.99}),
+    ('count===0', {'agregacao': 'count', 'operador': '==', 'valor': 0.0}),
+    ('max!=-1', {'agregacao': 'max', 'operador': '!=', 'valor': -1.0}),
+])
+def test_interpretar_threshold(expr, esperado):
+    assert interpretar_threshold(expr) == esperado
+
+
+@pytest.mark.parametrize('expr', ['p95<500', 'avg<', 'rate=>0.5', 'mediana<3'])
+def test_threshold_invalido(expr):
+    with pytest.raises(ValueError):
+        interpretar_threshold(expr)
+
+
+@pytest.mark.parametrize('operador, valor, esperado', [
+    ('<', 499, True), ('<', 500, False), ('<=', 500, True), ('>', 0.995, True), ('>=', 0.99, True),
+    ('==', 0, False), ('!=', 0, True), ('<', None, False),
+])
+def test_atende(operador, valor, esperado):
+    alvo = 0.99 if operador in ('>', '>=') else 500
+    assert atende({'operador': operador, 'valor': alvo}, valor) is esperado
+
+
+def test_duracao_segundos():
+    assert duracao_segundos('3m') == 180
+    assert duracao_segundos('1m30s') == 90
+    assert duracao_segundos('500ms') == 0.5
+    assert duracao_segundos(45) == 45.0
+    with pytest.raises(ValueError):
+        duracao_segundos('3 minutos')
+
+
+def test_pre_vus_pela_lei_de_little():
+    # 200 it/s, sem pausa, iterações de até 0.5 s (o maior limite de http_req_duration): L = 200 x 0.5
+    cenario = normalizar_cenario({'executor': 'taxa_constante', 'taxa': 200,
+                                  'thresholds': {'http_req_duration': ['avg<300', 'p(95)<500']}})
+    assert cenario['pre_vus'] == 100
+    assert cenario['max_vus'] == 100 * FATOR_MAX_VUS
+    assert cenario['vus'] is None and cenario['pausa'] == 0
+    # Com pausa de 1 s entre iterações: 200 x 1.5; sem threshold de latência vale LATENCIA_PADRAO_S (1 s)
+    assert normalizar_cenario({'executor': 'taxa_constante', 'taxa': 200, 'pausa': 1,
+                               'thresholds': {'http_req_duration': ['p(95)<500']}})['pre_vus'] == 300
+    assert normalizar_cenario({'executor': 'taxa_constante', 'taxa': 7.5, 'thresholds': {}})['pre_vus'] == 8
+
+
+@pytest.mark.parametrize('spec', [
+    {'operacoes': {'delete': 1}},
+    {'operacoes': {'get': 0}},
+    {'executor': 'rampa'},
+    {'executor': 'taxa_constante'},
+    {'executor': 'taxa_constante', 'taxa': 10, 'pre_vus': 20, 'max_vus': 5},
+    {'vus': 0},
+    {'duracao': 'dez minutos'},
+    {'thresholds': {'http_req_duration': ['p95<500']}},
+])
+def test_cenario_invalido(spec):
+    with pytest.raises(ValueError):
+        normalizar_cenario(spec)
+
+
+def test_padroes_do_executor_por_vus():
+    cenario = normalizar_cenario({'operacoes': 'post', 'vus': '50'})
+    assert cenario['operacoes'] == {'post': 1} and cenario['vus'] == 50 and cenario['pausa'] == 1
+    assert cenario['thresholds'] == {'http_req_duration': ['p(95)<500'], 'http_req_failed': ['rate<0.01']}
+
+
+def test_limites_planos_do_cenario_mix():
+    cenario = carregar_cenario(os.path.join(CENARIOS, 'mix_users.json'))
+    assert limites_planos(cenario) == {
+        'http_req_duration_avg': 400.0, 'http_req_duration_p95': 800.0, 'http_req_failed': 0.01, 'checks': 0.99}
+    limites = thresholds_cenario(cenario)
+    assert limites['checks']['operador'] == '>' and limites['checks']['metrica'] == 'checks'
+    assert limites['http_req_duration_p95']['expressao'] == 'p(95)<800'
+
+
+def test_valor_medido_nos_dois_formatos_do_summary():
+    limite_p95 = interpretar_threshold('p(95)<500') | {'metrica': 'http_req_duration'}
+    limite_falha = interpretar_threshold('rate<0.01') | {'metrica': 'http_req_failed'}
+    limite_descarte = interpretar_threshold('count<10') | {'metrica': 'dropped_iterations'}
+    antigo = {'metrics': {'http_req_duration': {'avg': 120.0, 'p(95)': 450.0}, 'http_req_failed': {'value': 0.002}}}
+    novo = {'metrics': {'http_req_duration': {'values': {'p(95)': 550.0}}, 'http_req_failed': {'values': {'rate': 0.02}}}}
+    assert valor_medido(antigo, limite_p95) == 450.0 and valor_medido(antigo, limite_falha) == 0.002
+    assert valor_medido(novo, limite_p95) == 550.0 and valor_medido(novo, limite_falha) == 0.02
+    # Counter ausente no summary vale zero; summary vazio não tem valor
+    assert valor_medido(antigo, limite_descarte) == 0.0
+    assert valor_medido({}, limite_p95) is None
+
+
+def test_variar_cenario():
+    spec = {'operacoes': {'get': 1}, 'vus': 50, 'thresholds': {'http_req_duration': ['p(95)<500']}}
+    variantes = variar_cenario(spec, 'get_users', vus=[10, 250], taxas=[100])
+    assert sorted(variantes) == ['get_users_100rps', 'get_users_10vus', 'get_users_250vus']
+    assert variantes['get_users_250vus']['vus'] == 250
+    taxa = variantes['get_users_100rps']
+    assert taxa['executor'] == 'taxa_constante' and taxa['pausa'] == 0 and taxa['pre_vus'] == 50
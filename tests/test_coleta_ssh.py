@@ -0,0 +1,45 @@
+import time
+
+from coleta_ssh import ColetorStreamSSH
+
+# Saída do agente com o relógio remoto uma hora adiantado: INICIO, três blocos com 1 s de uptime entre eles
+SAIDA_AGENTE = [
+    f"INICIO {time.time() + 3600:.3f} 1000.00\n",
+    "T 1000.00\n", "cpu 100 0 100 800 0 0 0 0\n", "MEM MemTotal: 2048000\n", "MEM MemAvailable: 1024000\n", "FIM\n",
+    "T 1001.00\n", "cpu 150 0 150 900 0 0 0 0\n", "MEM MemTotal: 2048000\n", "MEM MemAvailable: 1024000\n", "FIM\n",
+    "T 1002.00\n", "cpu 200 0 200 1000 0 0 0 0\n", "MEM MemTotal: 2048000\n", "MEM MemAvailable: 1024000\n", "FIM\n",
+]
+
+
+class _Canal:
+    def exec_command(self, comando):
+        pass
+
+    def makefile(self, modo):
+        return iter(SAIDA_AGENTE)
+
+    def close(self):
+        pass
+
+
+class _SSH:
+    def get_transport(self):
+        return self
+
+    def open_session(self):
+        return _Canal()
+
+
+def test_instantes_no_relogio_local():
+    coletor = ColetorStreamSSH(_SSH())
+    antes = time.time()
+    coletor.iniciar('backend', 'db')
+    amostras = coletor.parar()
+    depois = time.time()
+    assert len(amostras) == 2
+    # Offsets do uptime remoto somados ao instante local em que o INICIO chegou, não ao epoch remoto
+    assert antes + 1 <= amostras[0]['instante'] <= depois + 1
+    assert amostras[1]['instante'] - amostras[0]['instante'] == 1.0
+    assert abs(coletor.desvio_relogio + 3600) < 5
+    assert amostras[0]['host_cpu'] == 50.0
+    assert amostras[0]['host_mem'] == 1000.0
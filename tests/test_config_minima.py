@@ -0,0 +1,18 @@
+import os
+
+from config_minima import extrair_thresholds_k6, limites_k6, limite_p95_k6
+
+SCRIPTS_K6 = os.path.join(os.path.dirname(__file__), '..', 'tests k6')
+
+
+def test_thresholds_de_script_js_com_p95():
+    script = os.path.join(SCRIPTS_K6, 'atualizacao_simultanea.js')
+    assert extrair_thresholds_k6(script) == {'http_req_failed': 0.02, 'http_req_duration_p95': 600.0}
+    assert limite_p95_k6(script) == 600.0
+
+
+def test_script_js_sem_p95_usa_o_padrao():
+    script = os.path.join(SCRIPTS_K6, 'get_users_50vus.js')
+    assert extrair_thresholds_k6(script) == {'http_req_failed': 0.01}
+    assert limites_k6(script)['http_req_duration_p95']['operador'] == '<'
+    assert limite_p95_k6(script) == 500.0
@@ -0,0 +1,39 @@
+import numpy as np
+
+from correlacao import ajustar_joelho, diagnosticar
+
+
+def _p95_com_joelho(t, joelho=60.0):
+    # Reta suave até o joelho e inclinação 25x maior depois dele
+    return 100 + 0.2 * t + 5 * np.maximum(0, t - joelho)
+
+
+def test_joelho_conhecido():
+    t = np.arange(120, dtype=float)
+    r = ajustar_joelho(t, _p95_com_joelho(t))
+    assert abs(r['x'] - 60) <= 2
+    assert abs(r['inclinacao_antes'] - 0.2) < 0.1
+    assert abs(r['inclinacao_depois'] - 5.2) < 0.2
+    assert r['melhoria'] > 0.9
+
+
+def test_sem_joelho_numa_reta():
+    t = np.arange(120, dtype=float)
+    assert ajustar_joelho(t, 100 + 0.5 * t) is None
+
+
+def test_diagnostico_aponta_o_recurso_que_satura():
+    t = 1_700_000_000 + np.arange(120, dtype=float)
+    segundos = t - t[0]
+    linhas = {
+        't': t,
+        'p95': _p95_com_joelho(segundos),
+        # CPU do backend chega a 100% do limite no segundo 58; memória estável em 30%
+        'uso_cpu_backend': np.minimum(1.0, segundos / 58),
+        'uso_mem_backend': np.full(len(t), 0.3),
+    }
+    r = diagnosticar(linhas)
+    assert abs(r['joelho_latencia']['segundos_desde_inicio'] - 60) <= 3
+    assert r['gargalo'] == {'recurso': 'uso_cpu_backend', 'criterio': 'saturacao'}
+    assert r['recursos']['uso_cpu_backend']['inicio_saturacao'] == t[0] + 53
+    assert r['recursos']['uso_mem_backend']['inicio_saturacao'] is None
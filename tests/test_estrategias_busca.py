@@ -0,0 +1,73 @@
+import pytest
+
+import config_minima
+from config_minima import primeiro_aprovado, buscar_linear, buscar_bisseccao, buscar_fronteira
+
+
+@pytest.fixture(autouse=True)
+def grade(monkeypatch):
+    # Grade maior que a padrão: 16 CPUs (0.5 a 2.0) x 8 RAMs (128 a 1024 MB)
+    for nome, valor in (('CPU_MIN', 0.5), ('CPU_MAX', 2.0), ('CPU_INC', 0.1),
+                        ('RAM_MIN', 128), ('RAM_MAX', 1024), ('RAM_INC', 128)):
+        monkeypatch.setattr(config_minima, nome, valor)
+
+
+def avaliador(cpu_min, ram_min):
+    """
+    avaliar(cpu, ram) monotônico: passa com cpu >= cpu_min e ram >= ram_min, com o gargalo do recurso que falta.
+    Guarda as configurações avaliadas (como encontrar_configuracao_minima, cada uma é medida uma vez).
+    """
+    avaliados = set()
+
+    def avaliar(cpu, ram):
+        avaliados.add((cpu, ram))
+        falta_cpu = cpu < cpu_min - 1e-9
+        falta_ram = ram < ram_min
+        return {'passou': not falta_cpu and not falta_ram,
+                'cpu_gargalo_backend': falta_cpu, 'mem_gargalo_backend': falta_ram,
+                'cpu_gargalo_database': False, 'mem_gargalo_database': False}
+    return avaliar, avaliados
+
+
+# Avaliações de cada estratégia na grade 16 x 8: a bissecção custa ~log2 por eixo; a linear anda um passo por
+# avaliação, mas a RAM dobra a cada passo; a fronteira mede também as RAMs intermediárias para montar a escada
+@pytest.mark.parametrize('cpu_min, ram_min, esperado, avaliacoes', [
+    # Só CPU limita
+    (1.2, 128, (1.2, 128), {'linear': 8, 'bisseccao': 6, 'fronteira': 10}),
+    # Só RAM limita
+    (0.5, 512, (0.5, 512), {'linear': 3, 'bisseccao': 9, 'fronteira': 13}),
+    # CPU e RAM limitam
+    (1.0, 512, (1.0, 512), {'linear': 8, 'bisseccao': 9, 'fronteira': 13}),
+])
+def test_estrategias_acham_o_mesmo_minimo(cpu_min, ram_min, esperado, avaliacoes):
+    contagem = {}
+    for nome, buscar in (('linear', buscar_linear), ('bisseccao', buscar_bisseccao), ('fronteira', buscar_fronteira)):
+        avaliar, avaliados = avaliador(cpu_min, ram_min)
+        assert buscar(avaliar) == esperado, nome
+        contagem[nome] = len(avaliados)
+    assert contagem == avaliacoes
+
+
+def test_nenhuma_configuracao_aprovada():
+    for buscar in (buscar_bisseccao, buscar_fronteira):
+        avaliar, avaliados = avaliador(5.0, 128)
+        assert buscar(avaliar) is None
+        # Basta a configuração máxima reprovar
+        assert avaliados == {(2.0, 1024)}
+
+
+def test_primeiro_aprovado():
+    grade = list(range(100))
+    chamadas = []
+
+    def passou(v):
+        chamadas.append(v)
+        return v >= 37
+    assert primeiro_aprovado(grade, passou) == 37
+    assert len(chamadas) <= 8
+    chamadas.clear()
+    # Galope a partir do início: poucas chamadas quando o aprovado está perto do início
+    assert primeiro_aprovado(grade, lambda v: passou(v) or v >= 3, galope=True) == 3
+    assert len(chamadas) <= 5
+    assert primeiro_aprovado(grade, lambda v: False) is None
+    assert primeiro_aprovado(grade, lambda v: True, inicio=10) == 10
@@ -0,0 +1,97 @@
+import os
+import random
+
+import pytest
+
+from k6_stream import AgregadorK6, HistogramaLog, MonitorK6, criterio_limites_estourados, resumir_resultado_k6
+
+# Saída --out json de uma carga de 60 s: rampa de 1 a 10 VUs nos segundos 0-9, platô de 10 VUs até o segundo 54 e
+# desaceleração até o 59; duas requisições por segundo (50 ms na rampa até o segundo 10, 100 e 300 ms no platô,
+# 80 ms na desaceleração), uma falha no segundo 30, mais uma requisição de setup e uma de teardown
+NDJSON = os.path.join(os.path.dirname(__file__), 'dados', 'k6_rampa_plato.json')
+T0 = 1714564800  # 2024-05-01T12:00:00Z, segundo 0 da carga
+
+
+def test_percentis_do_histograma_com_erro_relativo_limitado():
+    valores = list(range(1, 10001))
+    random.Random(0).shuffle(valores)
+    h = HistogramaLog()
+    for v in valores:
+        h.adicionar(v)
+    for p in (50, 90, 95, 99):
+        assert h.percentil(p) == pytest.approx(p * 100, rel=h.precisao)
+    assert (h.minimo, h.maximo, h.media()) == (1, 10000, 5000.5)
+
+
+def test_mesclar_histogramas_equivale_a_um_so():
+    a, b, total = HistogramaLog(), HistogramaLog(), HistogramaLog()
+    for v in range(1, 501):
+        a.adicionar(v)
+        total.adicionar(v)
+    for v in range(501, 1001):
+        b.adicionar(v, vezes=2)
+        total.adicionar(v, vezes=2)
+    a.mesclar(b)
+    assert a.resumo() == total.resumo()
+    assert HistogramaLog().percentil(95) is None
+
+
+def test_fases_pelo_plato_de_vus():
+    fases = AgregadorK6().processar_arquivo(NDJSON).fases_k6()
+    assert fases['criterio_estavel'] == 'plato'
+    assert fases['setup_k6']['requisicoes'] == 1 and fases['setup_k6']['inicio'] == pytest.approx(T0 - 2.5)
+    assert fases['teardown_k6']['requisicoes'] == 1
+    carga = fases['carga']
+    assert (carga['inicio'], carga['fim']) == (pytest.approx(T0 + 0.25), pytest.approx(T0 + 59.75))
+    assert carga['requisicoes'] == 120 and carga['erros'] == 1
+    # O platô começa no segundo 9, mas o aquecimento mínimo (10 s desde o início da carga) o empurra para o 11
+    assert fases['aquecimento']['fim'] == fases['estavel']['inicio'] == T0 + 11
+    assert fases['estavel']['fim'] == fases['desaceleracao']['inicio'] == T0 + 55
+    assert [fases[f]['requisicoes'] for f in ('aquecimento', 'estavel', 'desaceleracao')] == [22, 88, 10]
+    assert fases['estavel']['erros'] == 1 and fases['estavel']['vus_max'] == 10
+    assert fases['estavel']['latencia']['p50'] == pytest.approx(100, rel=0.01)
+    assert fases['estavel']['latencia']['p95'] == pytest.approx(300, rel=0.01)
+    assert fases['aquecimento']['latencia']['max'] == 50
+
+
+def test_resumo_e_serie_temporal(tmp_path):
+    resumo = resumir_resultado_k6(NDJSON, str(tmp_path / 'resumo.json'))
+    assert os.path.exists(tmp_path / 'resumo.json')
+    assert resumo['metricas']['http_reqs'] == {'tipo': 'counter', 'contagem': 122, 'soma': 122.0}
+    assert resumo['metricas']['http_req_failed']['taxa'] == pytest.approx(1 / 122)
+    serie = resumo['serie_temporal']
+    assert len(serie) == 60 and serie[0]['t'] == T0
+    assert [s['vus'] for s in serie[:3]] == [1, 2, 3]
+    assert all(s['rps'] == 2 for s in serie)
+    # Só as requisições da carga (sem setup/teardown); a URL é a mesma e o status separa a falha
+    assert {(t['status'], t['contagem']) for t in resumo['por_tag']} == {('200', 119), ('500', 1)}
+
+
+def _monitor():
+    monitor = MonitorK6(janela=30)
+    with open(NDJSON) as f:
+        for linha in f:
+            monitor._processar_linha(linha)
+    return monitor
+
+
+def test_janela_do_monitor():
+    estado = _monitor().estado()
+    assert estado['requisicoes_total'] == 122 and estado['erros_total'] == 1
+    assert estado['decorrido_segundos'] == pytest.approx(64.0)
+    # Janela dos últimos 30 s (desde o segundo 31.5): platô (100/300 ms), desaceleração (80 ms) e o teardown
+    assert estado['p95'] == 300
+    assert estado['taxa_erros'] == 0
+
+
+def test_criterio_aborta_so_com_limite_estourado():
+    estado = _monitor().estado()
+    assert 'p95' in criterio_limites_estourados(limite_p95=50, minimo_requisicoes=100)(estado)
+    assert criterio_limites_estourados(limite_p95=500, minimo_requisicoes=100)(estado) is None
+    # Antes do mínimo de requisições nunca aborta
+    assert criterio_limites_estourados(limite_p95=50, minimo_requisicoes=1000)(estado) is None
+    base = {'decorrido_segundos': 30, 'requisicoes_total': 500, 'p95': 100}
+    criterio = criterio_limites_estourados(limite_falha=0.01, limite_p95=500)
+    assert criterio(dict(base, taxa_erros=0.02)) is None
+    assert 'taxa de erros' in criterio(dict(base, taxa_erros=0.05))
+    assert criterio(dict(base, taxa_erros=0.05, decorrido_segundos=10)) is None
@@ -0,0 +1,28 @@
+import numpy as np
+
+from modelo_capacidade import ajustar_usl, prever_usl
+
+
+def test_usl_recupera_parametros_conhecidos():
+    lam, sigma, kappa = 50.0, 0.05, 0.0002
+    vus = np.array([1, 5, 10, 25, 50, 75, 100, 150, 200, 300])
+    r = ajustar_usl(vus, prever_usl(lam, sigma, kappa, vus))
+    assert abs(r['sigma'] - sigma) / sigma < 0.05
+    assert abs(r['kappa'] - kappa) / kappa < 0.05
+    assert abs(r['lambda'] - lam) / lam < 0.01
+    vus_pico = np.sqrt((1 - sigma) / kappa)
+    assert abs(r['vus_pico'] - vus_pico) / vus_pico < 0.05
+    assert abs(r['vazao_max'] - prever_usl(lam, sigma, kappa, vus_pico)) / r['vazao_max'] < 0.01
+    assert r['residuos']['r2'] > 0.999
+
+
+def test_usl_sem_retrocoerencia():
+    # κ = 0: a vazão só se aproxima de λ/σ, sem pico
+    vus = np.array([1, 10, 50, 100, 200])
+    r = ajustar_usl(vus, prever_usl(20.0, 0.1, 0.0, vus))
+    assert r['kappa'] == 0 and r['vus_pico'] is None
+    assert abs(r['vazao_max'] - 200.0) / 200.0 < 0.05
+
+
+def test_usl_exige_tres_niveis_de_vus():
+    assert ajustar_usl([50, 50, 250], [100.0, 101.0, 300.0]) is None
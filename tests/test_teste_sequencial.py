@@ -0,0 +1,98 @@
+import math
+
+import pytest
+
+from teste_sequencial import DecisorSequencial, extrair_valores_k6, t_cdf
+
+
+@pytest.mark.parametrize('t, gl, esperado', [
+    (0.0, 3, 0.5),
+    (12.706, 1, 0.975),
+    (2.920, 2, 0.95),
+    (2.776, 4, 0.975),
+    (2.015, 5, 0.95),
+    (3.169, 10, 0.995),
+    (-2.015, 5, 0.05),
+])
+def test_t_cdf_valores_tabelados(t, gl, esperado):
+    assert t_cdf(t, gl) == pytest.approx(esperado, abs=5e-4)
+
+
+def test_t_cdf_com_um_grau_de_liberdade_e_cauchy():
+    for t in (-3.0, -0.5, 0.7, 4.0):
+        assert t_cdf(t, 1) == pytest.approx(0.5 + math.atan(t) / math.pi)
+
+
+def _metrics(p95, falha=0.0):
+    return {'k6_summary': {'metrics': {'http_req_duration': {'p(95)': p95}, 'http_req_failed': {'value': falha}}}}
+
+
+def test_passa_com_repeticoes_bem_abaixo_do_limite():
+    decisor = DecisorSequencial({'http_req_duration_p95': 500, 'http_req_failed': 0.01})
+    assert not decisor.registrar(_metrics(200))
+    assert decisor.registrar(_metrics(210))
+    r = decisor.avaliar()
+    assert r['decisao'] == 'passa' and r['confianca'] >= 0.95
+
+
+def test_falha_com_repeticoes_acima_do_limite():
+    decisor = DecisorSequencial({'http_req_duration_p95': 500})
+    decisor.registrar(_metrics(800))
+    assert decisor.registrar(_metrics(820))
+    assert decisor.avaliar()['decisao'] == 'falha'
+
+
+def test_continua_perto_do_limite():
+    decisor = DecisorSequencial({'http_req_duration_p95': 500})
+    for p95 in (450, 560, 490):
+        assert not decisor.registrar(_metrics(p95))
+    r = decisor.avaliar()
+    assert r['decisao'] is None and 0.05 < r['criterios']['http_req_duration_p95']['prob_abaixo_limite'] < 0.95
+
+
+def test_desvio_zero_decide_sem_teste_t():
+    decisor = DecisorSequencial({'http_req_failed': 0.01})
+    decisor.registrar(_metrics(100, falha=0.0))
+    decisor.registrar(_metrics(100, falha=0.0))
+    r = decisor.avaliar()
+    assert r['decisao'] == 'passa' and r['criterios']['http_req_failed']['prob_abaixo_limite'] == 1.0
+    decisor = DecisorSequencial({'http_req_failed': 0.01})
+    decisor.registrar(_metrics(100, falha=0.02))
+    decisor.registrar(_metrics(100, falha=0.02))
+    assert decisor.avaliar()['decisao'] == 'falha'
+
+
+def test_uma_repeticao_so_falha_se_muito_acima():
+    decisor = DecisorSequencial({'http_req_duration_p95': 500})
+    assert not decisor.registrar(_metrics(4000))
+    decisor = DecisorSequencial({'http_req_duration_p95': 500})
+    assert decisor.registrar(_metrics(6000))
+    assert decisor.avaliar()['decisao'] == 'falha'
+
+
+def test_iteracoes_descartadas():
+    # Formato novo do summary ('values'), com dropped_iterations exportado
+    metrics = {'k6_summary': {'metrics': {
+        'http_req_duration': {'values': {'p(95)': 300.0}},
+        'iterations': {'values': {'count': 990}},
+        'dropped_iterations': {'values': {'count': 10}},
+    }}}
+    valores = extrair_valores_k6(metrics)
+    assert valores['http_req_duration_p95'] == 300.0
+    assert valores['iteracoes_descartadas'] == 10.0
+    assert valores['taxa_descarte'] == pytest.approx(0.01)
+
+
+def test_sem_dropped_iterations_com_taxa_de_chegada_vale_zero():
+    metrics = {'cenario_k6': {'executor': 'taxa_constante'},
+               'k6_summary': {'metrics': {'iterations': {'count': 500}}}}
+    valores = extrair_valores_k6(metrics)
+    assert valores['iteracoes_descartadas'] == 0.0 and valores['taxa_descarte'] == 0.0
+    # Com VUs fixos o K6 não descarta iterações: sem o counter, a taxa fica desconhecida
+    del metrics['cenario_k6']
+    assert extrair_valores_k6(metrics)['taxa_descarte'] is None
+
+
+def test_repeticao_sem_summary():
+    assert extrair_valores_k6({'erro': 'falhou antes do K6'}) == {
+        'http_req_failed': None, 'http_req_duration_p95': None, 'iteracoes_descartadas': None, 'taxa_descarte': None}
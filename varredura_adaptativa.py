@@ -0,0 +1,152 @@
+# Varredura adaptativa da grade CPU x RAM: em vez de testar todas as combinações, ajusta um processo gaussiano
+# (NumPy, só CPU) sobre o p95 das configurações já testadas e escolhe a próxima onde a incerteza sobre a
+# fronteira do threshold de p95 é maior (aquisição "straddle"). Sem threshold, escolhe a de maior incerteza.
+
+import os
+import json
+import math
+from statistics import mean
+import numpy as np
+
+ESCALAS_CANDIDATAS = (0.15, 0.25, 0.4, 0.6, 1.0)
+
+
+class ProcessoGaussiano:
+    """
+    Regressão por processo gaussiano com kernel RBF sobre entradas normalizadas em [0, 1].
+    A escala do kernel é escolhida entre ESCALAS_CANDIDATAS pela verossimilhança marginal.
+    """
+    def __init__(self, ruido=0.05):
+        self.ruido = ruido
+        self.escala = None
+
+    @staticmethod
+    def _kernel(a, b, escala):
+        d2 = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+        return np.exp(-0.5 * d2 / escala ** 2)
+
+    def ajustar(self, X, y):
+        self.X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.media_y = y.mean()
+        self.desvio_y = y.std() or 1.0
+        z = (y - self.media_y) / self.desvio_y
+        melhor = None
+        for escala in ESCALAS_CANDIDATAS:
+            K = self._kernel(self.X, self.X, escala) + self.ruido ** 2 * np.eye(len(z))
+            L = np.linalg.cholesky(K)
+            alfa = np.linalg.solve(L.T, np.linalg.solve(L, z))
+            verossimilhanca = -0.5 * z @ alfa - np.log(np.diag(L)).sum()
+            if melhor is None or verossimilhanca > melhor[0]:
+                melhor = (verossimilhanca, escala, L, alfa)
+        _, self.escala, self._L, self._alfa = melhor
+        return self
+
+    def prever(self, X):
+        """
+        Retorna (média, desvio) previstos para cada linha de X, na escala original de y.
+        """
+        X = np.asarray(X, dtype=float)
+        Ks = self._kernel(X, self.X, self.escala)
+        media = Ks @ self._alfa
+        v = np.linalg.solve(self._L, Ks.T)
+        variancia = np.clip(1.0 - (v ** 2).sum(axis=0), 1e-12, None)
+        return media * self.desvio_y + self.media_y, np.sqrt(variancia) * self.desvio_y
+
+
+def _normalizar(grade):
+    pontos = np.asarray(grade, dtype=float)
+    minimo = pontos.min(axis=0)
+    amplitude = pontos.max(axis=0) - minimo
+    amplitude[amplitude == 0] = 1.0
+    return (pontos - minimo) / amplitude
+
+
+def pontos_iniciais(grade):
+    """
+    Cantos e centro da grade, na ordem em que devem ser testados.
+    """
+    cpus = sorted({c for c, _ in grade})
+    rams = sorted({r for _, r in grade})
+    candidatos = [(cpus[0], rams[0]), (cpus[-1], rams[-1]), (cpus[0], rams[-1]), (cpus[-1], rams[0]),
+                  (cpus[len(cpus) // 2], rams[len(rams) // 2])]
+    iniciais = []
+    for ponto in candidatos:
+        if ponto in grade and ponto not in iniciais:
+            iniciais.append(ponto)
+    return iniciais
+
+
+def varrer_adaptativo(grade, avaliar, orcamento, limite_p95=None):
+    """
+    Testa até 'orcamento' configurações da grade [(cpu, ram), ...].
+    avaliar(cpu, ram) executa a configuração e retorna o p95 (ms) ou None se falhou.
+    Retorna {'avaliados': [...], 'previsao': [...]} com o p95 medido e o previsto (com incerteza) para toda a grade.
+    """
+    grade = list(grade)
+    X = _normalizar(grade)
+    avaliados = {}
+    fila = pontos_iniciais(grade)
+    alvo = math.log(limite_p95) if limite_p95 else None
+    modelo = None
+    while len(avaliados) < min(orcamento, len(grade)):
+        validos = [i for i, p in enumerate(grade) if avaliados.get(p) is not None]
+        pendentes = [i for i, p in enumerate(grade) if p not in avaliados]
+        if fila:
+            proximo = grade.index(fila.pop(0))
+        elif len(validos) < 2:
+            # Pouca informação para o modelo: escolhe o ponto mais distante dos já testados
+            testados = X[[i for i, p in enumerate(grade) if p in avaliados]]
+            distancias = [((X[i] - testados) ** 2).sum(axis=1).min() for i in pendentes]
+            proximo = pendentes[int(np.argmax(distancias))]
+        else:
+            # O modelo trabalha com log(p95): a latência cresce de forma multiplicativa perto da saturação
+            modelo = ProcessoGaussiano().ajustar(X[validos], [math.log(avaliados[grade[i]]) for i in validos])
+            media, desvio = modelo.prever(X[pendentes])
+            if alvo is not None:
+                aquisicao = 1.96 * desvio - np.abs(media - alvo)
+            else:
+                aquisicao = desvio
+            proximo = pendentes[int(np.argmax(aquisicao))]
+        cpu, ram = grade[proximo]
+        p95 = avaliar(cpu, ram)
+        avaliados[(cpu, ram)] = p95 if p95 is not None and p95 > 0 else None
+        print(f"[ADAPTATIVO] {len(avaliados)}/{orcamento}: CPU={cpu}, RAM={ram}, p95={avaliados[(cpu, ram)]}")
+    validos = [i for i, p in enumerate(grade) if avaliados.get(p) is not None]
+    previsao = []
+    if len(validos) >= 2:
+        modelo = ProcessoGaussiano().ajustar(X[validos], [math.log(avaliados[grade[i]]) for i in validos])
+        media, desvio = modelo.prever(X)
+        for (cpu, ram), m, d in zip(grade, media, desvio):
+            previsao.append({
+                'cpu': cpu,
+                'ram': ram,
+                'p95_previsto': math.exp(m),
+                # Intervalo de ~95% do p95 previsto
+                'p95_min': math.exp(m - 1.96 * d),
+                'p95_max': math.exp(m + 1.96 * d),
+                'abaixo_limite': bool(m < alvo) if alvo is not None else None,
+            })
+    return {
+        'limite_p95': limite_p95,
+        'avaliados': [{'cpu': c, 'ram': r, 'p95': p} for (c, r), p in avaliados.items()],
+        'previsao': previsao,
+    }
+
+
+def executar_adaptativo(configuracoes, avaliar_repeticoes, k6_script, stack, orcamento=None, limite_p95=None,
+                        pasta='resultados'):
+    """
+    Modo --modo adaptativo dos scripts de varredura: avaliar_repeticoes(cpu, ram) roda as repetições da
+    configuração e retorna os p95 (None nas que falharam); o p95 da configuração é a média dos válidos.
+    limite_p95 vem do threshold do script K6 (config_minima.limite_p95_k6). Grava o resultado em
+    <pasta>/adaptativo_<teste>_<stack>.json e o retorna.
+    """
+    def avaliar(cpu, ram):
+        p95s = [p for p in avaliar_repeticoes(cpu, ram) if p is not None]
+        return mean(p95s) if p95s else None
+    resultado = varrer_adaptativo(configuracoes, avaliar, orcamento or len(configuracoes), limite_p95=limite_p95)
+    nome_teste = os.path.splitext(os.path.basename(k6_script))[0]
+    with open(os.path.join(pasta, f"adaptativo_{nome_teste}_{stack}.json"), 'w') as f:
+        json.dump(resultado, f, indent=4, ensure_ascii=False)
+    return resultado
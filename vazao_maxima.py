@@ -0,0 +1,138 @@
+# Busca da vazão máxima sustentável numa única execução do K6: o script "tests k6/vazao_maxima.js" sobe a taxa de
+# chegada em degraus (ramping-arrival-rate) e marca cada requisição com o índice do degrau; aqui ficam os parâmetros
+# desse perfil, o critério de aborto ao vivo (MonitorK6) e a análise da saída NDJSON por degrau.
+# Um degrau passa quando o p95 e a taxa de erros ficam dentro dos limites e a vazão obtida acompanha a taxa pedida;
+# a vazão máxima sustentável é a maior taxa com todos os degraus até ela aprovados.
+# Uso: python vazao_maxima.py resultados/vazao_maxima_get-node-postgres-1.0_1024.json --taxa_inicial 10 --passo 10 --duracao_degrau 30
+
+import argparse
+
+from k6_stream import HistogramaLog, ler_pontos_k6, instante_epoch
+
+# Fração da taxa pedida que a vazão obtida pode ficar abaixo antes de o degrau ser considerado saturado
+TOLERANCIA_VAZAO = 0.1
+# Fração da duração útil do degrau que precisa ter requisições para ele entrar na análise (o último pode ser abortado)
+COBERTURA_MINIMA = 0.8
+# O K6 é abortado quando a janela do monitor passa deste múltiplo dos limites ou quando a vazão da janela fica
+# QUEDA_VAZAO_ABORTO abaixo da taxa do degrau anterior
+FATOR_ABORTO = 1.5
+QUEDA_VAZAO_ABORTO = 0.3
+# Segundos do início de cada degrau marcados como transição pelo script (DESCARTE_MS)
+DESCARTE_SEGUNDOS = 2
+
+
+def taxa_degrau(indice: int, taxa_inicial: float, passo: float) -> float:
+    return taxa_inicial + indice * passo
+
+
+def ambiente_degraus(taxa_inicial, passo, taxa_maxima, duracao_degrau, operacao='get', limite_p95=500,
+                     limite_falha=0.01, vus_max=1000) -> dict:
+    """
+    Variáveis de ambiente do vazao_maxima.js (passadas a executar_k6 em env).
+    """
+    return {
+        'TAXA_INICIAL': int(taxa_inicial), 'TAXA_PASSO': int(passo), 'TAXA_MAXIMA': int(taxa_maxima),
+        'DURACAO_DEGRAU': int(duracao_degrau), 'DESCARTE_MS': DESCARTE_SEGUNDOS * 1000, 'OPERACAO': operacao,
+        'LIMITE_P95': limite_p95, 'LIMITE_FALHA': limite_falha, 'VUS_MAX': int(vus_max),
+    }
+
+
+def criterio_degraus(taxa_inicial, passo, duracao_degrau, limite_p95, limite_falha, fator=FATOR_ABORTO):
+    """
+    criterio_aborto para o MonitorK6: depois do primeiro degrau, interrompe o K6 quando o p95 ou a taxa de erros da
+    janela passam de 'fator' vezes o limite, ou quando a vazão da janela fica muito abaixo da taxa do degrau anterior
+    (o backend já não acompanha a chegada). Os degraus seguintes não mudariam a resposta.
+    """
+    def criterio(estado):
+        decorrido = estado['decorrido_segundos']
+        if decorrido < duracao_degrau:
+            return None
+        p95 = estado.get('p95')
+        if p95 is not None and p95 > limite_p95 * fator:
+            return f"p95 {p95:.1f}ms > {fator}x limite {limite_p95}ms"
+        taxa = estado.get('taxa_erros')
+        if taxa is not None and taxa > limite_falha * fator:
+            return f"taxa de erros {taxa:.3f} > {fator}x limite {limite_falha}"
+        alvo = taxa_degrau(int(decorrido // duracao_degrau) - 1, taxa_inicial, passo)
+        if estado['rps'] < alvo * (1 - QUEDA_VAZAO_ABORTO):
+            return f"vazão {estado['rps']:.1f} req/s muito abaixo da taxa {alvo:g} req/s"
+        return None
+    return criterio
+
+
+def analisar_degraus(output_path: str, taxa_inicial, passo, duracao_degrau, limite_p95, limite_falha) -> dict:
+    """
+    Lê a saída NDJSON do K6 em streaming e resume cada degrau (sem as requisições de transição): taxa pedida,
+    vazão obtida, p95, taxa de erros, se passou e se foi executado por inteiro.
+    Retorna {'taxa_maxima_sustentavel', 'vazao_maxima_obtida' (maior vazão entre os degraus completos),
+    'primeiro_degrau_reprovado', 'degraus': [...]}.
+    """
+    degraus = {}
+    for nome, data in ler_pontos_k6(output_path):
+        if nome not in ('http_reqs', 'http_req_duration', 'http_req_failed'):
+            continue
+        tags = data.get('tags') or {}
+        if tags.get('degrau') is None or tags.get('transicao') == '1':
+            continue
+        d = degraus.get(tags['degrau'])
+        if d is None:
+            d = degraus[tags['degrau']] = {'requisicoes': 0, 'erros': 0, 'latencia': HistogramaLog(),
+                                           'inicio': None, 'fim': None}
+        if nome == 'http_reqs':
+            d['requisicoes'] += 1
+            t = instante_epoch(data['time'])
+            d['inicio'] = t if d['inicio'] is None else min(d['inicio'], t)
+            d['fim'] = t if d['fim'] is None else max(d['fim'], t)
+        elif nome == 'http_req_failed':
+            d['erros'] += 1 if data.get('value') else 0
+        else:
+            d['latencia'].adicionar(data.get('value', 0))
+    util = duracao_degrau - DESCARTE_SEGUNDOS
+    resultado = {'taxa_maxima_sustentavel': None, 'vazao_maxima_obtida': None, 'primeiro_degrau_reprovado': None,
+                 'degraus': []}
+    aprovado_ate_aqui = True
+    for indice in sorted(degraus, key=int):
+        d = degraus[indice]
+        taxa = taxa_degrau(int(indice), taxa_inicial, passo)
+        coberto = (d['fim'] - d['inicio']) if d['inicio'] is not None else 0
+        p95 = d['latencia'].percentil(95)
+        vazao = d['requisicoes'] / util
+        taxa_erros = d['erros'] / d['requisicoes'] if d['requisicoes'] else None
+        item = {
+            'degrau': int(indice), 'taxa': taxa, 'vazao': vazao, 'requisicoes': d['requisicoes'],
+            'p95': p95, 'taxa_erros': taxa_erros, 'completo': coberto >= COBERTURA_MINIMA * util,
+        }
+        item['passou'] = (p95 is not None and p95 <= limite_p95 and taxa_erros is not None
+                          and taxa_erros <= limite_falha and vazao >= taxa * (1 - TOLERANCIA_VAZAO))
+        resultado['degraus'].append(item)
+        if not item['completo']:
+            continue
+        resultado['vazao_maxima_obtida'] = max(vazao, resultado['vazao_maxima_obtida'] or 0)
+        if aprovado_ate_aqui and item['passou']:
+            resultado['taxa_maxima_sustentavel'] = taxa
+        elif aprovado_ate_aqui:
+            aprovado_ate_aqui = False
+            resultado['primeiro_degrau_reprovado'] = taxa
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('saida_k6', help='Saída NDJSON do K6 (--out json) de uma execução do vazao_maxima.js')
+    parser.add_argument('--taxa_inicial', type=float, default=10)
+    parser.add_argument('--passo', type=float, default=10)
+    parser.add_argument('--duracao_degrau', type=int, default=30)
+    parser.add_argument('--limite_p95', type=float, default=500)
+    parser.add_argument('--limite_falha', type=float, default=0.01)
+    args = parser.parse_args()
+    r = analisar_degraus(args.saida_k6, args.taxa_inicial, args.passo, args.duracao_degrau, args.limite_p95, args.limite_falha)
+    for d in r['degraus']:
+        print(f"degrau {d['degrau']}: taxa={d['taxa']:g}/s vazão={d['vazao']:.1f}/s p95={d['p95']} "
+              f"erros={d['taxa_erros']} {'OK' if d['passou'] else 'FALHOU'}{'' if d['completo'] else ' (incompleto)'}")
+    print(f"Vazão máxima sustentável: {r['taxa_maxima_sustentavel']} req/s (primeira reprovação em {r['primeiro_degrau_reprovado']})")
+
+
+if __name__ == "__main__":
+    # Como executar no terminal:
+    # python vazao_maxima.py resultados/vazao_maxima_get-node-postgres-1.0_1024.json --taxa_inicial 10 --passo 10 --limite_p95 500
+    main()